@@ -1,22 +1,90 @@
+import asyncio
 import csv
-from datetime import datetime, timedelta
-from fastapi import APIRouter, Response, Depends, HTTPException, status, Form, UploadFile, File, BackgroundTasks
+import json
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Response, Depends, HTTPException, status, Form, UploadFile, File, BackgroundTasks, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
 from app.utils import generate_qr_code, send_qr_code_via_email
-from app.services.biometric_service import generate_face_embedding
-from app.db.models import AccessLog, Employee, Admin
-from app.db.session import get_db
+from app.services.inference_client import InferenceUnavailable, generate_face_embedding
+from app.services.image_ingest import MAX_UPLOAD_BYTES, UploadTooLarge, read_upload
+from app.services import biometric_service, employee_backup, employee_directory, enrollment_photos, stats_service
+from app.services.blob_store import BlobNotFound, get_blob_store
+from app.services.event_broadcaster import access_events, notify_revoked
+from app.db.models import AccessLog, AccessLogStatus, Employee, EnrollmentPhoto, Admin
+from app.db.session import get_db, get_session_factory, SessionLocal
 from io import BytesIO, StringIO
 from typing import List, Optional
 import uuid
 
 from app.core import security
+from app.core.config import settings
 from app import schemas
 
 
 adminRouter = APIRouter(prefix="/admin", tags=["admin"])
 
+# Interval of keep-alive messages on idle live feeds, in seconds
+LIVE_FEED_KEEPALIVE_SECONDS = 15
+# Validity of new accounts created without an expiration date
+DEFAULT_ACCOUNT_VALIDITY_DAYS = settings.default_account_validity_days
+# Detail of 412 responses to a stale If-Match
+STALE_EMPLOYEE_DETAIL = "Employee was modified since it was read."
+
+
+def _discard_photos(db: Session, photos: list) -> None:
+    """
+    Rolls the session back and deletes the blobs just stored for `photos` again,
+    unless another photo row still uses them.
+    """
+    db.rollback()
+    enrollment_photos.delete_unreferenced(db, enrollment_photos.photo_digests(photos))
+
+
+def _commit_with_photos(db: Session, photos: list) -> None:
+    """
+    Commits the session; if the commit fails, discards the blobs just stored
+    for `photos` (see `_discard_photos`) and re-raises.
+    """
+    try:
+        db.commit()
+    except Exception:
+        _discard_photos(db, photos)
+        raise
+
+
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _if_match_version(if_match: Optional[str]) -> Optional[int]:
+    """
+    Reads the employee version an If-Match header refers to.
+
+    Returns:
+        int: The expected version, or None if the request is unconditional
+            (no header, or "*").
+
+    Raises:
+        HTTPException: 400 if the header is not an ETag of this API.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid If-Match header.")
+
+
+def _check_version(employee: Employee, expected_version: Optional[int]) -> None:
+    if expected_version is not None and employee.version != expected_version:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=STALE_EMPLOYEE_DETAIL)
+
 @adminRouter.get("/health")
 async def health_check():
     return {200: "OK"}
@@ -43,13 +111,27 @@ async def login_for_access_token(
 ):
     """
     Administrator Login:
-    1. Checks if the user exists in the database.
-    2. Verifies the password (hash).
-    3. Returns a JWT token.
+    1. Rejects usernames with too many recent failed attempts (429).
+    2. Checks if the user exists in the database.
+    3. Verifies the password (hash) in the dedicated bcrypt pool.
+    4. Returns a JWT token.
     """
-    admin = db.query(Admin).filter(Admin.username == form_data.username).first()
+    retry_after = security.login_throttle.acquire(form_data.username)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts. Try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
 
-    if not admin or not security.verify_password(form_data.password, admin.hashed_password):
+    authenticated = False
+    try:
+        admin = db.query(Admin).filter(Admin.username == form_data.username).first()
+        authenticated = bool(admin) and await security.verify_password_async(form_data.password, admin.hashed_password)
+    finally:
+        security.login_throttle.release(form_data.username, success=authenticated)
+
+    if not authenticated:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid login or password",
@@ -63,6 +145,36 @@ async def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+async def _embedding_from_photo(photo: UploadFile) -> tuple[Optional[list], bytes]:
+    """
+    Reads a reference photo with the upload size limit and computes its embedding
+    off the event loop.
+
+    Returns:
+        tuple: The embedding (None if the photo is empty or shows no face) and the photo bytes.
+
+    Raises:
+        HTTPException: 413 for oversized uploads, 400 for non-image data or several faces,
+            503 if the inference server is unavailable.
+    """
+    try:
+        photo_bytes = await read_upload(photo)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"Photo exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit.")
+
+    if not photo_bytes:
+        return None, photo_bytes
+
+    try:
+        return await run_in_threadpool(generate_face_embedding, photo_bytes), photo_bytes
+    except ValueError as e:
+        if str(e) == "INVALID_IMAGE":
+            raise HTTPException(status_code=400, detail="The uploaded file is not a supported image (JPEG, PNG, WebP, BMP).")
+        raise HTTPException(status_code=400, detail="More than one face detected in the provided photo.")
+    except InferenceUnavailable:
+        raise HTTPException(status_code=503, detail="Face recognition is temporarily unavailable.")
+
+
 # --- UPDATED CREATE ENDPOINT ---
 
 @adminRouter.post("/create_employee", response_model=schemas.EmployeeResponse)
@@ -80,7 +192,7 @@ async def create_employee(
 
     Workflow:
     1. Processes the photo to generate a 512-D biometric embedding.
-    2. Sets an account expiration date (defaults to 182 days if not provided).
+    2. Sets an account expiration date (defaults to DEFAULT_ACCOUNT_VALIDITY_DAYS if not provided).
     3. Generates a unique QR code and sends it via email as a background task.
 
     Args:
@@ -101,8 +213,7 @@ async def create_employee(
         raise HTTPException(status_code=400, detail="An employee with this email already exists.")
 
     # 2. Process Biometrics
-    photo_bytes = await photo.read()
-    embedding = generate_face_embedding(photo_bytes)
+    embedding, photo_bytes = await _embedding_from_photo(photo)
 
     if embedding is None:
         raise HTTPException(status_code=400, detail="No face detected in the provided photo.")
@@ -121,19 +232,24 @@ async def create_employee(
             )
 
     if final_expiration_date is None:
-        final_expiration_date = datetime.now() + timedelta(days=182)
+        final_expiration_date = datetime.now() + timedelta(days=DEFAULT_ACCOUNT_VALIDITY_DAYS)
 
     # 4. Create Database Record
     new_employee = Employee(
+        uuid=uuid.uuid4(),
         name=name,
         email=email,
         embedding=embedding,
+        embedding_model=biometric_service.MODEL_NAME,
+        embedding_detector=biometric_service.DETECTOR_BACKEND,
         is_active=True,
         expires_at=final_expiration_date
     )
 
     db.add(new_employee)
-    db.commit()
+    # Keep the photo, so templates can be recomputed without a new enrollment
+    stored_photo = await run_in_threadpool(enrollment_photos.store_enrollment_photo, db, new_employee.uuid, photo_bytes)
+    await run_in_threadpool(_commit_with_photos, db, [stored_photo])
     db.refresh(new_employee)
 
     # 5. Handle QR Code generation and dispatch
@@ -149,13 +265,28 @@ async def create_employee(
 
 @adminRouter.get("/employees", response_model=List[schemas.EmployeeResponse])
 async def get_all_employees(
+    response: Response,
+    limit: int = Query(employee_directory.DEFAULT_PAGE_SIZE, ge=1, le=employee_directory.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
+    is_active: Optional[bool] = None,
+    expiring_within_days: Optional[int] = Query(None, ge=0, le=3650),
     db: Session = Depends(get_db),
     current_admin: Admin = Depends(security.get_current_active_admin)
 ):
     """
-    Retrieves a list of all registered employees.
+    Retrieves a page of registered employees, ordered by name.
+
+    Only the listed columns are loaded (never the embeddings). When more
+    employees follow, the cursor of the next page is returned in the
+    `X-Next-Cursor` header.
 
     Args:
+        limit (int): Page size.
+        cursor (str, optional): `X-Next-Cursor` value of the previous page.
+        q (str, optional): Case-insensitive prefix of the name or email.
+        is_active (bool, optional): Only active or only inactive accounts.
+        expiring_within_days (int, optional): Only accounts expiring in the next N days.
         db (Session): Database session.
         current_admin (Admin): Authenticated administrator performing the request.
 
@@ -163,13 +294,79 @@ async def get_all_employees(
         List[schemas.Employee]: A list of employee objects including their IDs,
                                 names, emails, and account status.
     """
-    return db.query(Employee).all()
+    try:
+        employees, next_cursor = employee_directory.list_employees(
+            db, limit=limit, cursor=cursor, search=q, is_active=is_active, expiring_within_days=expiring_within_days
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return employees
+
+
+@adminRouter.get("/employees/export")
+async def export_employees(
+    session_factory: sessionmaker = Depends(get_session_factory),
+    current_admin: Admin = Depends(security.get_current_active_admin)
+):
+    """
+    Streams a portable backup of all employees and their face templates.
+
+    The format is described in services/employee_backup.py. The table is read
+    in batches while the response is sent, so memory use does not grow with
+    the number of employees. Enrollment photos are not included.
+
+    Returns:
+        StreamingResponse: The backup, as an attachment.
+    """
+    filename = f"employees_{datetime.now():%Y%m%d_%H%M%S}.ebak"
+    return StreamingResponse(
+        employee_backup.iter_export(session_factory),
+        media_type=employee_backup.BACKUP_CONTENT_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@adminRouter.post("/employees/import")
+async def import_employees(
+    request: Request,
+    on_conflict: employee_backup.OnConflict = "skip",
+    session_factory: sessionmaker = Depends(get_session_factory),
+    current_admin: Admin = Depends(security.get_current_active_admin)
+):
+    """
+    Restores employees from a backup sent as the raw request body.
+
+    Records are applied in batches while the body is received (COPY on
+    PostgreSQL). No photos are needed and no QR emails are sent.
+
+    Args:
+        on_conflict (str): "skip" keeps employees that already exist (same
+            UUID), "update" overwrites them with the backup. Records whose
+            email belongs to another employee are always skipped.
+
+    Returns:
+        dict: Numbers of inserted, updated and skipped employees.
+
+    Raises:
+        HTTPException: 400 if the body is not a valid backup. Batches before
+            the invalid part remain imported.
+    """
+    try:
+        counts = await employee_backup.import_stream(request.stream(), session_factory, on_conflict)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return counts
 
 
 @adminRouter.patch("/employees/{employee_uid}/status")
 async def update_employee_status(
     employee_uid: str,
     status_data: schemas.EmployeeStatusUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
     db: Session = Depends(get_db),
     current_admin: Admin = Depends(security.get_current_active_admin)
 ):
@@ -186,46 +383,80 @@ async def update_employee_status(
             the current status remains unchanged.
         expiration_date (datetime, optional): A specific timestamp (ISO 8601)
             representing when the employee's access expires.
+        if_match (str, optional): ETag of the employee as last read; the
+            change is only applied if nobody modified the employee since.
         db (Session): Database session dependency.
         current_admin (Admin): The authenticated administrator performing the action.
 
     Returns:
-        dict: A success message along with the updated status and expiration date.
+        dict: A success message along with the updated status, expiration date
+            and version (also sent as the ETag header).
 
     Raises:
         HTTPException:
-            - 400: If the UUID format is invalid.
+            - 400: If the UUID format or the If-Match header is invalid.
             - 404: If no employee is found with the provided UUID.
+            - 412: If the employee was modified since the If-Match version.
     """
     try:
         uid_obj = uuid.UUID(employee_uid)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid UUID format")
+    expected_version = _if_match_version(if_match)
 
-    employee = db.query(Employee).filter(Employee.uuid == uid_obj).first()
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee not found")
-
+    values = {}
     if status_data.is_active is not None:
-        employee.is_active = not status_data.is_active
+        values["is_active"] = not status_data.is_active
 
     if status_data.expiration_date:
         try:
-            parsed_date = datetime.fromisoformat(status_data.expiration_date.replace('Z', '+00:00'))
-            employee.expires_at = parsed_date
+            values["expires_at"] = datetime.fromisoformat(status_data.expiration_date.replace('Z', '+00:00'))
         except ValueError:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid date format. Expected ISO string, got: {status_data.expiration_date}"
             )
 
+    # One conditional statement instead of a read-modify-write: a concurrent
+    # change either happens entirely before it or makes it match no row
+    conditions = [Employee.uuid == uid_obj]
+    if expected_version is not None:
+        conditions.append(Employee.version == expected_version)
+    returned = (Employee.is_active, Employee.expires_at, Employee.version)
+    was_active = False
+    if values.get("is_active") is False:
+        # Locked until the commit, so the state before the update is the one it replaces
+        was_active = bool(db.execute(
+            select(Employee.is_active).where(Employee.uuid == uid_obj).with_for_update()
+        ).scalar())
+    if values:
+        statement = (
+            update(Employee)
+            .where(*conditions)
+            .values(**values, version=Employee.version + 1)
+            .returning(*returned)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        statement = select(*returned).where(*conditions)
+    row = db.execute(statement).first()
     db.commit()
-    db.refresh(employee)
 
+    if row is None:
+        if db.query(Employee.uuid).filter(Employee.uuid == uid_obj).first() is None:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=STALE_EMPLOYEE_DETAIL)
+
+    # Terminals are only told about an actual change from active to inactive
+    if was_active and not row.is_active:
+        notify_revoked(uid_obj, "DEACTIVATED")
+
+    response.headers["ETag"] = _etag(row.version)
     return {
         "message": "Employee status and expiration updated successfully",
-        "is_active": employee.is_active,
-        "expires_at": employee.expires_at
+        "is_active": row.is_active,
+        "expires_at": row.expires_at,
+        "version": row.version,
     }
 
 
@@ -233,11 +464,13 @@ async def update_employee_status(
 async def update_employee(
     employee_uid: str,
     background_tasks: BackgroundTasks,
+    response: Response,
     name: Optional[str] = Form(None),
     email: Optional[str] = Form(None),
     photo: UploadFile = File(None),
     is_active: Optional[bool] = Form(None),
     expiration_date: Optional[str] = Form(None),
+    if_match: Optional[str] = Header(None, alias="If-Match"),
     db: Session = Depends(get_db),
     current_admin: Admin = Depends(security.get_current_active_admin)
 ):
@@ -248,6 +481,10 @@ async def update_employee(
     biometrics (via photo upload), and administrative access controls. If a new
     photo is uploaded, the system re-calculates the facial embedding vector.
 
+    The change is applied by one conditional UPDATE, so a concurrent change is
+    never overwritten. With a photo, the version is checked before the
+    embedding is computed, so a stale request fails before doing that work.
+
     Args:
         employee_uid (str): Unique identifier of the employee to be updated.
         name (str, optional): New full name of the employee.
@@ -255,92 +492,243 @@ async def update_employee(
         photo (UploadFile, optional): New reference image for facial recognition.
         is_active (bool, optional): Administrative override to enable/disable access.
         expiration_date (datetime, optional): Specific timestamp for access expiration.
+        if_match (str, optional): ETag of the employee as last read; the
+            update is only applied if nobody modified the employee since.
         db (Session): Database session dependency.
         current_admin (Admin): The authenticated administrator performing the update.
 
     Returns:
-        dict: Confirmation message and the updated employee UUID.
+        dict: Confirmation message, expiration date and the new version (also
+            sent as the ETag header).
 
     Raises:
         HTTPException:
-            - 400: Invalid UUID, email already taken, or no face detected in photo.
+            - 400: Invalid UUID or If-Match header, invalid date, or email already taken.
             - 404: Employee not found.
+            - 412: The employee was modified since the If-Match version.
     """
     try:
         uid_obj = uuid.UUID(employee_uid)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid UUID format")
+    expected_version = _if_match_version(if_match)
 
-    employee = db.query(Employee).filter(Employee.uuid == uid_obj).first()
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee not found")
-
-    needs_new_qr = False
-
+    values = {}
     if name:
-        employee.name = name
-
-    if email and email != employee.email:
-        employee.email = email
-        needs_new_qr = True
-
+        values["name"] = name
+    if email:
+        values["email"] = email
     if is_active is not None:
-        employee.is_active = is_active
-
+        values["is_active"] = is_active
     if expiration_date and expiration_date.strip():
         try:
             dt_utc = datetime.fromisoformat(expiration_date.replace('Z', '+00:00'))
             pl_time = dt_utc.astimezone(timezone(timedelta(hours=1)))
-            final_expiration_date = pl_time.replace(tzinfo=None)
-            employee.expires_at = final_expiration_date
+            values["expires_at"] = pl_time.replace(tzinfo=None)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format")
 
+    stored_photos = []
     if photo:
-        photo_bytes = await photo.read()
-        if photo_bytes:
-            new_embedding = generate_face_embedding(photo_bytes)
-            if new_embedding:
-                employee.embedding = new_embedding
-                needs_new_qr = True
+        # Checked before the embedding and blob work, which a stale request would waste
+        current_version = db.execute(select(Employee.version).where(Employee.uuid == uid_obj)).scalar()
+        if current_version is None:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        if expected_version is not None and current_version != expected_version:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=STALE_EMPLOYEE_DETAIL)
+
+        new_embedding, photo_bytes = await _embedding_from_photo(photo)
+        if new_embedding:
+            stored_photos.append(
+                await run_in_threadpool(enrollment_photos.store_enrollment_photo, db, uid_obj, photo_bytes)
+            )
+            values.update(
+                embedding=new_embedding,
+                embedding_model=biometric_service.MODEL_NAME,
+                embedding_detector=biometric_service.DETECTOR_BACKEND,
+                # A pending re-embedding was computed from the previous photo
+                next_embedding=None, next_embedding_model=None, next_embedding_detector=None,
+            )
 
-    db.commit()
-    db.refresh(employee)
+    previous = None
+    if "email" in values or values.get("is_active") is False:
+        # Locked until the commit, so the email and state before the update are the ones it replaces
+        previous = db.execute(
+            select(Employee.email, Employee.is_active).where(Employee.uuid == uid_obj).with_for_update()
+        ).first()
+
+    # One conditional statement instead of a read-modify-write: a concurrent
+    # change either happens entirely before it or makes it match no row
+    conditions = [Employee.uuid == uid_obj]
+    if expected_version is not None:
+        conditions.append(Employee.version == expected_version)
+    statement = (
+        update(Employee)
+        .where(*conditions)
+        .values(**values, version=Employee.version + 1)
+        .returning(Employee.email, Employee.is_active, Employee.expires_at, Employee.version)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        row = db.execute(statement).first()
+    except IntegrityError:
+        await run_in_threadpool(_discard_photos, db, stored_photos)
+        raise HTTPException(status_code=400, detail="An employee with this email already exists.")
+
+    if row is None:
+        await run_in_threadpool(_discard_photos, db, stored_photos)
+        if db.query(Employee.uuid).filter(Employee.uuid == uid_obj).first() is None:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=STALE_EMPLOYEE_DETAIL)
+    await run_in_threadpool(_commit_with_photos, db, stored_photos)
 
-    if needs_new_qr:
-        qr_stream = generate_qr_code(str(employee.uuid))
-        background_tasks.add_task(send_qr_code_via_email, employee.email, qr_stream)
+    # Terminals are only told about an actual change from active to inactive
+    if previous is not None and previous.is_active and not row.is_active:
+        notify_revoked(uid_obj, "DEACTIVATED")
 
-    return {"message": "Updated successfully", "expires_at": employee.expires_at}
+    if stored_photos or (previous is not None and previous.email != row.email):
+        qr_stream = generate_qr_code(str(uid_obj))
+        background_tasks.add_task(send_qr_code_via_email, row.email, qr_stream)
+
+    response.headers["ETag"] = _etag(row.version)
+    return {"message": "Updated successfully", "expires_at": row.expires_at, "version": row.version}
+
+
+@adminRouter.get("/employees/{employee_uid}/photos", response_model=List[schemas.EnrollmentPhotoResponse])
+async def list_enrollment_photos(
+    employee_uid: str,
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(security.get_current_active_admin)
+):
+    """
+    Lists the stored enrollment photos of an employee, oldest first.
+
+    Args:
+        employee_uid (str): UUID of the employee.
+
+    Returns:
+        List[EnrollmentPhotoResponse]: Photo metadata; bytes are served by `get_enrollment_photo`.
+    """
+    try:
+        uid_obj = uuid.UUID(employee_uid)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid UUID format")
+
+    photos = (
+        db.query(EnrollmentPhoto)
+        .filter(EnrollmentPhoto.employee_id == uid_obj)
+        .order_by(EnrollmentPhoto.created_at, EnrollmentPhoto.id)
+        .all()
+    )
+    return [schemas.EnrollmentPhotoResponse.from_photo(photo) for photo in photos]
+
+
+@adminRouter.get("/employees/{employee_uid}/photos/{photo_id}")
+async def get_enrollment_photo(
+    employee_uid: str,
+    photo_id: int,
+    request: Request,
+    variant: str = Query("original", pattern="^(original|thumbnail)$"),
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(security.get_current_active_admin)
+):
+    """
+    Streams a stored enrollment photo or its thumbnail from the blob store.
+
+    Blobs are immutable and addressed by their hash, which doubles as the ETag,
+    so browsers revalidate with a 304 instead of downloading the photo again.
+
+    Args:
+        employee_uid (str): UUID of the employee.
+        photo_id (int): ID of the photo.
+        variant (str): "original" or "thumbnail".
+    """
+    try:
+        uid_obj = uuid.UUID(employee_uid)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid UUID format")
+
+    photo = db.query(EnrollmentPhoto).filter(EnrollmentPhoto.id == photo_id, EnrollmentPhoto.employee_id == uid_obj).first()
+    if not photo:
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    digest = photo.sha256 if variant == "original" else photo.thumbnail_sha256
+    if not digest:
+        raise HTTPException(status_code=404, detail="Thumbnail not available")
+
+    headers = {"ETag": f'"{digest}"', "Cache-Control": "private, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    chunks = get_blob_store().iter_chunks(digest)
+    try:
+        # Fail before the response starts if the blob is missing
+        first = next(chunks, b"")
+    except BlobNotFound:
+        raise HTTPException(status_code=404, detail="Photo content missing from storage")
+
+    def body():
+        yield first
+        yield from chunks
+
+    media_type = photo.content_type if variant == "original" else "image/jpeg"
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
 
 
 @adminRouter.delete("/employees/{employee_uid}")
-async def delete_employee(employee_uid: str, db: Session = Depends(get_db), current_admin: Admin = Depends(security.get_current_active_admin)):
+async def delete_employee(
+    employee_uid: str,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(security.get_current_active_admin)
+):
     """
     Permanently removes an employee and their associated data from the system.
 
-    This action will also remove the employee's biometric embeddings and access logs.
+    This action will also remove the employee's biometric embeddings and access logs,
+    and their enrollment photos and thumbnails from the blob store.
     Revokes access immediately as the QR code associated with this ID will no longer be valid.
 
     Args:
         employee_id (int): The numeric ID of the employee to be deleted.
+        if_match (str, optional): ETag of the employee as last read; the
+            employee is only deleted if nobody modified it since.
         db (Session): Database session.
         current_admin (Admin): Authenticated administrator performing the action.
 
     Returns:
         dict: Success message upon deletion.
+
+    Raises:
+        HTTPException:
+            - 400: Invalid UUID or If-Match header.
+            - 404: Employee not found.
+            - 409: The employee was modified while being deleted.
+            - 412: The employee was modified since the If-Match version.
     """
     try:
         uid_obj = uuid.UUID(employee_uid)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid UUID format")
+    expected_version = _if_match_version(if_match)
 
     employee = db.query(Employee).filter(Employee.uuid == uid_obj).first()
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
+    _check_version(employee, expected_version)
 
+    was_active = employee.is_active
+    photo_blobs = enrollment_photos.remove_employee_photos(db, uid_obj)
     db.delete(employee)
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=STALE_EMPLOYEE_DETAIL)
+    if was_active:
+        notify_revoked(uid_obj, "DELETED")
+    # Photos and thumbnails go once the deletion is committed; identical uploads of other employees stay
+    await run_in_threadpool(enrollment_photos.delete_unreferenced, db, photo_blobs)
 
     return {"message": "Employee deleted successfully"}
 
@@ -364,22 +752,114 @@ async def get_access_logs(
         List[schemas.LogEntry]: A list of access log entries.
     """
     logs = db.query(AccessLog).order_by(AccessLog.timestamp.desc()).all()
-    response_logs = []
 
-    for log in logs:
-        employee_name = log.employee.name if log.employee else "Unknown"
-        response_logs.append(
-            schemas.LogEntry(
-                id=log.id,
-                timestamp=(log.timestamp + timedelta(hours=1)).isoformat(),
-                employee_name=employee_name,
-                status=log.status.value,
-                reason=log.reason,
-                employee_email=log.employee.email if log.employee else None,
-            )
-        )
+    return [schemas.LogEntry.from_log(log, log.employee) for log in logs]
+
+
+@adminRouter.get("/logs/stream")
+async def stream_access_logs(
+    request: Request,
+    status_filter: Optional[AccessLogStatus] = Query(None, alias="status"),
+    employee_id: Optional[uuid.UUID] = None,
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(security.get_current_active_admin)
+):
+    """
+    Streams access decisions in real time as Server-Sent Events.
+
+    Every decision made by the terminal endpoint is pushed as an `access` event
+    carrying the same fields as `/admin/logs`, so the dashboard can stop polling.
+
+    Args:
+        request (Request): Used to detect client disconnects.
+        status_filter (AccessLogStatus, optional): Only stream events with this status.
+        employee_id (uuid.UUID, optional): Only stream events for this employee.
+        db (Session): Database session used for authentication only.
+        current_admin (Admin): Authenticated administrator.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` response that stays open.
+    """
+    # Release the pooled connection right away, the stream may stay open for hours
+    db.close()
+
+    subscription = access_events.subscribe(
+        status=status_filter.value if status_filter else None,
+        employee_id=str(employee_id) if employee_id else None,
+    )
+
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=LIVE_FEED_KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: access\ndata: {json.dumps(event)}\n\n"
+        finally:
+            access_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@adminRouter.websocket("/logs/ws")
+async def access_logs_websocket(
+    websocket: WebSocket,
+    token: str = Query(...),
+    status_filter: Optional[AccessLogStatus] = Query(None, alias="status"),
+    employee_id: Optional[uuid.UUID] = None,
+):
+    """
+    Pushes access decisions in real time over a WebSocket.
+
+    Browsers cannot set an Authorization header on WebSockets, so the JWT is
+    passed in the `token` query parameter. Each message is a JSON object with
+    the same fields as `/admin/logs`.
+    """
+    def authenticate() -> Optional[Admin]:
+        db = SessionLocal()
+        try:
+            return security.authenticate_token(token, db)
+        finally:
+            db.close()
+
+    admin = await run_in_threadpool(authenticate)
+
+    if admin is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    subscription = access_events.subscribe(
+        status=status_filter.value if status_filter else None,
+        employee_id=str(employee_id) if employee_id else None,
+    )
+    await websocket.accept()
 
-    return response_logs
+    async def wait_for_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    disconnected = asyncio.create_task(wait_for_disconnect())
+    try:
+        while True:
+            next_event = asyncio.create_task(subscription.get(timeout=LIVE_FEED_KEEPALIVE_SECONDS))
+            await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_event.cancel()
+                break
+
+            event = next_event.result()
+            await websocket.send_json(event if event is not None else {"type": "keepalive"})
+    finally:
+        disconnected.cancel()
+        access_events.unsubscribe(subscription)
 
 
 @adminRouter.get("/logs/export")
@@ -414,3 +894,112 @@ async def export_logs_csv(
     response.headers["Content-Disposition"] = f"attachment; filename=access_report_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
 
     return response
+
+
+# --- STATISTICS ENDPOINTS ---
+
+@adminRouter.get("/stats/timeseries", response_model=List[schemas.StatsBucket])
+async def get_access_timeseries(
+    granularity: str = Query("hour", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status_filter: Optional[AccessLogStatus] = Query(None, alias="status"),
+    employee_id: Optional[uuid.UUID] = None,
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(security.get_current_active_admin)
+):
+    """
+    Returns access counts per hour or day, split by status.
+
+    Served from the pre-aggregated rollup table, so the cost depends only on the
+    number of buckets requested (capped at 744), never on the size of access_logs.
+
+    Args:
+        granularity (str): "hour" (default: last 24 hours) or "day" (default: last 30 days).
+        start (datetime, optional): Beginning of the period.
+        end (datetime, optional): End of the period (exclusive). Defaults to now.
+        status_filter (AccessLogStatus, optional): Only count this status.
+        employee_id (uuid.UUID, optional): Only count entries of this employee.
+        db (Session): Database session.
+        current_admin (Admin): Authenticated administrator.
+
+    Returns:
+        List[schemas.StatsBucket]: One entry per (bucket, status) with a non-zero count.
+    """
+    start, end = stats_service.clamp_range(granularity, start, end)
+    return stats_service.get_timeseries(db, granularity, start, end, status_filter, employee_id)
+
+
+@adminRouter.get("/stats/reasons", response_model=List[schemas.ReasonCount])
+async def get_access_reasons(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(security.get_current_active_admin)
+):
+    """
+    Returns access counts per status and reason (e.g. denial rate by cause).
+
+    Args:
+        start (datetime, optional): Beginning of the period. Defaults to 30 days ago.
+        end (datetime, optional): End of the period (exclusive). Defaults to now.
+        db (Session): Database session.
+        current_admin (Admin): Authenticated administrator.
+
+    Returns:
+        List[schemas.ReasonCount]: Counts ordered from the most frequent reason.
+    """
+    start, end = stats_service.clamp_range("day", start, end)
+    return stats_service.get_reason_breakdown(db, start, end)
+
+
+@adminRouter.get("/stats/employees", response_model=List[schemas.EmployeeAccessCount])
+async def get_employee_access_counts(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(security.get_current_active_admin)
+):
+    """
+    Returns per-employee entry counts, busiest employees first.
+
+    Args:
+        start (datetime, optional): Beginning of the period. Defaults to 30 days ago.
+        end (datetime, optional): End of the period (exclusive). Defaults to now.
+        limit (int): Maximum number of employees returned.
+        db (Session): Database session.
+        current_admin (Admin): Authenticated administrator.
+
+    Returns:
+        List[schemas.EmployeeAccessCount]: Granted/denied totals per employee.
+            Attempts with an unknown QR code are reported with employee_id null.
+    """
+    start, end = stats_service.clamp_range("day", start, end)
+    return stats_service.get_employee_counts(db, start, end, limit)
+
+
+@adminRouter.post("/stats/rebuild")
+async def rebuild_access_stats(
+    start: datetime,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_admin: Admin = Depends(security.get_current_active_admin)
+):
+    """
+    Re-materializes the statistics rollups from the raw access logs.
+
+    Intended for backfilling logs written before the rollups existed. Regular
+    entries are counted incrementally and never need a rebuild.
+
+    Args:
+        start (datetime): Beginning of the period to rebuild (aligned to whole days).
+        end (datetime, optional): End of the period. Defaults to now.
+        db (Session): Database session.
+        current_admin (Admin): Authenticated administrator.
+
+    Returns:
+        dict: Number of access logs aggregated.
+    """
+    processed = await run_in_threadpool(stats_service.materialize_rollups, db, start, end or datetime.now())
+    return {"message": "Statistics rebuilt successfully", "processed_logs": processed}
@@ -1,24 +1,135 @@
 from datetime import datetime
+import asyncio
+import hmac
+import time
 import uuid
 import logging
-from fastapi import APIRouter, Depends, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import Any, Dict
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Query, Request, Response, WebSocket
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Any, Awaitable, Callable, Dict, MutableMapping, Optional
 from fastapi.concurrency import run_in_threadpool
 
-from app.db.session import get_db
+from app import schemas
+from app.core import metrics
+from app.core.config import settings
+from app.core.timing import current_timer, request_timer, timed
+from app.db.session import get_db, get_session_factory
 from app.db.models import Employee, AccessLog, AccessLogStatus
-from app.services.biometric_service import generate_face_embedding, verify_face
+from app.services.biometric_service import verify_face
+from app.services.inference_client import generate_face_embedding
+from app.services import biometric_service, embedding_cache, idempotency, stats_service
+from app.services.capture_store import CAPTURE_ENABLED, capture_store
+from app.services.image_ingest import MAX_UPLOAD_BYTES, StreamReader, UploadTooLarge, read_upload, sniff_image_type
+from app.services.terminal_frames import read_frame_header
+from app.services.thresholds import thresholds
+from app.services.event_broadcaster import access_events, terminal_notices
+from app.services.shadow import shadow_evaluator
 
 # Setup logging
 logger = logging.getLogger("uvicorn")
 
 terminalRouter = APIRouter(prefix="/api/terminal", tags=["terminal"])
 
+# Verifications processed concurrently for one terminal WebSocket; further frames wait
+TERMINAL_WS_MAX_IN_FLIGHT = settings.terminal_ws_max_in_flight
+# Terminals allowed to skip face detection for their RAW8 aligned faces
+TERMINAL_TOKENS = settings.terminal_tokens
+
+
+def _trusted_terminal(terminal_id: str, token: Optional[str]) -> bool:
+    """
+    Checks a terminal's token against TERMINAL_TOKENS.
+
+    Returns:
+        bool: True if the terminal is configured and sent its token.
+    """
+    expected = TERMINAL_TOKENS.get(terminal_id)
+    return bool(expected and token) and hmac.compare_digest(expected.encode(), token.encode())
+
+
+def _record_access(
+    db: Session,
+    status: AccessLogStatus,
+    reason: str,
+    employee: Optional[Employee] = None,
+    employee_id: Optional[uuid.UUID] = None,
+    distance: Optional[float] = None,
+    photo: Optional[bytes] = None,
+) -> AccessLog:
+    """
+    Persists a single access decision, updates the statistics rollups and
+    publishes it to the live event feed.
+
+    Args:
+        db (Session): Database session of the current request.
+        status (AccessLogStatus): Outcome of the verification.
+        reason (str): Machine-readable cause (e.g. "SUCCESS", "FACE_MISMATCH").
+        employee (Employee, optional): The employee the QR code resolved to.
+        employee_id (uuid.UUID, optional): Employee ID when no row was loaded.
+        distance (float, optional): Cosine distance of the face comparison, kept
+            for offline threshold calibration.
+        photo (bytes, optional): The verified frame, offered to the capture store
+            and the shadow pipeline.
+
+    Returns:
+        AccessLog: The stored log entry.
+    """
+    log = AccessLog(
+        timestamp=datetime.now(),
+        status=status,
+        employee_id=employee.uuid if employee else employee_id,
+        reason=reason,
+        debug_distance=None if distance is None else float(distance),
+        request_id=idempotency.current_key(),
+        frame_hash=idempotency.current_frame_hash(),
+    )
+    with timed("log"):
+        db.add(log)
+        # Flush first so the generated ID can be read without a refresh after commit
+        db.flush()
+
+        event = schemas.LogEntry.from_log(log, employee).model_dump(mode="json")
+        stats_service.record_access(db, log)
+        db.commit()
+
+    metrics.record_decision(status.value, stats_service.normalize_reason(reason))
+    access_events.publish(event)
+
+    if photo:
+        _offer_frame(photo, log, employee)
+    return log
+
+
+def _offer_frame(photo: bytes, log: AccessLog, employee: Optional[Employee]) -> None:
+    """
+    Hands a verified frame to the capture store and the shadow pipeline.
+    Both only enqueue work for their own background threads.
+    """
+    if CAPTURE_ENABLED:
+        timer = current_timer()
+        capture_store.offer(photo, {
+            "log_id": log.id,
+            "timestamp": log.timestamp.isoformat(),
+            "employee_id": str(log.employee_id) if log.employee_id else None,
+            "status": log.status.value,
+            "reason": log.reason,
+            "distance": log.debug_distance,
+            "model": biometric_service.MODEL_NAME,
+            "detector": biometric_service.DETECTOR_BACKEND,
+            "stages_ms": {name: seconds * 1000 for name, seconds in timer.stages.items()} if timer else {},
+        })
+
+    production = {"access": "GRANTED" if log.status == AccessLogStatus.GRANTED else "DENIED", "reason": log.reason}
+    template, template_model, _ = biometric_service.select_template(employee) if employee else (None, None, None)
+    shadow_evaluator.maybe_evaluate(photo, template, production, reference_model=template_model)
+
+
 @terminalRouter.post("/access-verify")
 async def verify_access(
+    response: Response,
     employee_uid: str = Form(...),
     file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=128),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -30,6 +141,10 @@ async def verify_access(
     Args:
         employee_uid (str): The unique identifier decoded from the employee's QR code.
         file (UploadFile): Real-time image capture from the terminal camera.
+        idempotency_key (str, optional): Unique per scan attempt and repeated on
+            its retries. A retry gets the decision of the first attempt without
+            being processed or logged again (marked `Idempotent-Replayed: true`).
+            A key reused with a different frame is rejected with 409.
         db (Session): Database session provided by the dependency injection.
 
     Returns:
@@ -39,9 +154,258 @@ async def verify_access(
             - name (str, optional): Employee's full name if access is granted.
 
     Note:
-        The biometric threshold is currently set to 0.3 for the Facenet512 model.
+        The biometric threshold defaults to 0.3 for the Facenet512 model and can be
+        calibrated globally or per employee (see `FACE_THRESHOLDS_FILE`).
+        Per-stage durations are returned in the `Server-Timing` header and
+        recorded in the Prometheus histograms exposed on `/metrics`.
+    """
+    try:
+        return await _handle_verification(response.headers, employee_uid, lambda: read_upload(file), db, idempotency_key)
+    finally:
+        # Ensure file is closed after reading to free resources
+        await file.close()
+
+
+@terminalRouter.post("/access-verify/frame")
+async def verify_access_frame(
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=128),
+    terminal_token: Optional[str] = Header(None, alias="X-Terminal-Token", max_length=256),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """
+    Same verification as `verify_access`, for frames posted as a compact binary body.
+
+    The body (format in services/terminal_frames.py) carries the QR UUID, the
+    terminal id and an optional crop box ahead of the image, and is read
+    straight from the request stream, skipping multipart parsing and the
+    temporary file behind UploadFile. The image may be a face crop or a
+    RAW8 aligned face. A RAW8 face from a terminal listed in TERMINAL_TOKENS
+    that sends its `X-Terminal-Token` is embedded without running the
+    detector, the terminal taking over the no-face and single-face checks;
+    from any other client it goes through detection like any image.
+
+    Returns:
+        Dict[str, Any]: The same response as `verify_access`.
+
+    Raises:
+        HTTPException: 400 if the body is not a valid frame.
+    """
+    reader = StreamReader(request.stream())
+    try:
+        header = await read_frame_header(reader)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid frame.")
+
+    logger.info(f"Frame from terminal '{header.terminal_id}' (crop: {header.crop})")
+    trusted = _trusted_terminal(header.terminal_id, terminal_token)
+    return await _handle_verification(
+        response.headers, header.employee_uid, reader.read_rest, db, idempotency_key, trusted_terminal=trusted
+    )
+
+
+async def _single_chunk(data: bytes):
+    yield data
+
+
+@terminalRouter.websocket("/ws")
+async def terminal_websocket(
+    websocket: WebSocket,
+    terminal_id: str = Query("", max_length=255),
+    token: Optional[str] = Query(None, max_length=256),
+    session_factory: sessionmaker = Depends(get_session_factory),
+):
+    """
+    Long-lived channel of one terminal, carrying verifications and server notices.
+
+    The connection replaces an HTTP request, form parsing and dependency setup
+    per entry. Messages from the terminal are binary: a 16-byte request UUID
+    followed by a frame in the format of `verify_access_frame`. The request
+    UUID also serves as the Idempotency-Key, so a frame re-sent after a
+    reconnect is not verified twice.
+
+    Messages to the terminal are JSON:
+        - {"type": "config", ...}: sent on connect; settings changes reach
+          terminals when they reconnect after a restart.
+        - {"type": "result", "request_id": ..., "access": ..., ...}: the
+          `verify_access` response. Results of concurrent frames may arrive
+          out of order.
+        - {"type": "error", "request_id": ..., "detail": ...}: malformed message, or a request ID re-sent with a different frame.
+        - {"type": "revoked", "employee_ref": ..., "reason": ...}: access of an
+          employee was withdrawn, for terminals that cache employee data. The
+          employee is identified by the SHA-256 of its UUID (see
+          `event_broadcaster.employee_ref`), never by the QR credential itself.
+
+    Up to TERMINAL_WS_MAX_IN_FLIGHT frames are verified at once; each uses its
+    own short database session, so idle terminals hold no pooled connection.
+
+    A terminal listed in TERMINAL_TOKENS connects with `?token=...`; only then
+    are its RAW8 faces embedded without detection. A wrong token is refused
+    before the connection is accepted.
+    """
+    trusted = _trusted_terminal(terminal_id, token)
+    if token is not None and not trusted:
+        logger.warning(f"Terminal '{terminal_id}' refused: invalid token")
+        # 1008: policy violation
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    outbox: asyncio.Queue = asyncio.Queue()
+    slots = asyncio.Semaphore(TERMINAL_WS_MAX_IN_FLIGHT)
+    subscription = terminal_notices.subscribe()
+    logger.info(f"Terminal '{terminal_id}' connected")
+
+    async def send_loop():
+        while True:
+            await websocket.send_json(await outbox.get())
 
+    async def forward_notices():
+        while True:
+            await outbox.put(await subscription.get())
+
+    async def verify(message: bytes):
+        request_id = None
+        db = session_factory()
+        try:
+            request_id = str(uuid.UUID(bytes=message[:16]))
+            reader = StreamReader(_single_chunk(message[16:]))
+            header = await read_frame_header(reader)
+            headers: Dict[str, str] = {}
+            result = await _handle_verification(
+                headers, header.employee_uid, reader.read_rest, db, request_id, trusted_terminal=trusted
+            )
+            await outbox.put({
+                "type": "result", "request_id": request_id, **result,
+                **({"replayed": True} if "Idempotent-Replayed" in headers else {}),
+            })
+        except ValueError:
+            await outbox.put({"type": "error", "request_id": request_id, "detail": "Invalid frame."})
+        except HTTPException as e:
+            await outbox.put({"type": "error", "request_id": request_id, "detail": e.detail})
+        finally:
+            db.close()
+            slots.release()
+
+    await outbox.put({
+        "type": "config",
+        "model": biometric_service.MODEL_NAME,
+        "detector": biometric_service.TERMINAL_DETECTOR or biometric_service.DETECTOR_BACKEND,
+        "max_upload_bytes": MAX_UPLOAD_BYTES,
+        "max_in_flight": TERMINAL_WS_MAX_IN_FLIGHT,
+    })
+    def log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Terminal '{terminal_id}' channel task failed: {task.exception()!r}")
+
+    background = {asyncio.create_task(send_loop()), asyncio.create_task(forward_notices())}
+    for task in background:
+        task.add_done_callback(log_failure)
+    verifications: set[asyncio.Task] = set()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is None:
+                await outbox.put({"type": "error", "request_id": None, "detail": "Frames must be sent as binary messages."})
+                continue
+
+            # Stops reading while the terminal has too many verifications running
+            await slots.acquire()
+            task = asyncio.create_task(verify(message["bytes"]))
+            verifications.add(task)
+            task.add_done_callback(verifications.discard)
+    finally:
+        for task in background | verifications:
+            task.cancel()
+        terminal_notices.unsubscribe(subscription)
+        logger.info(f"Terminal '{terminal_id}' disconnected")
+
+
+async def _handle_verification(
+    headers: MutableMapping[str, str],
+    employee_uid: str,
+    read_photo: Callable[[], Awaitable[bytes]],
+    db: Session,
+    idempotency_key: Optional[str],
+    trusted_terminal: bool = False,
+) -> Dict[str, Any]:
+    """
+    Runs `_verify_access` under the request timer, at most once per Idempotency-Key.
+    Timing and replay information is written to `headers`.
+
+    With a key, the frame is read up front: a retry is only answered with the
+    stored decision if it carries the same frame.
+
+    Raises:
+        HTTPException: 409 if the key was already used with a different frame.
+    """
+    started = time.perf_counter()
+    with request_timer("access_verify") as timer:
+        try:
+            if not idempotency_key:
+                return await _verify_access(employee_uid, read_photo, db, trusted_terminal)
+
+            with timed("read"):
+                photo, read_photo = await _read_ahead(read_photo)
+            try:
+                result, replayed = await idempotency.run_once(
+                    idempotency_key, employee_uid, idempotency.frame_hash(photo),
+                    lambda: _verify_access(employee_uid, read_photo, db, trusted_terminal), db
+                )
+            except idempotency.IdempotencyConflict:
+                logger.warning(f"Idempotency-Key {idempotency_key} reused with a different frame")
+                raise HTTPException(status_code=409, detail="Idempotency-Key was already used with a different frame.")
+            if replayed:
+                logger.info(f"Replaying decision of request {idempotency_key} for UUID: {employee_uid}")
+                headers["Idempotent-Replayed"] = "true"
+            return result
+        finally:
+            headers["Server-Timing"] = timer.server_timing()
+            metrics.observe_request(timer, time.perf_counter() - started)
+
+
+async def _read_ahead(
+    read_photo: Callable[[], Awaitable[bytes]]
+) -> tuple[Optional[bytes], Callable[[], Awaitable[bytes]]]:
+    """
+    Reads the frame once and returns it with a reader replaying the outcome,
+    so an oversized upload is still reported where the verification reads it.
+
+    Returns:
+        tuple: The frame (None if oversized) and the replaying reader.
+    """
+    try:
+        photo = await read_photo()
+    except UploadTooLarge as e:
+        error = e
+
+        async def raise_too_large() -> bytes:
+            raise error
+
+        return None, raise_too_large
+
+    async def buffered() -> bytes:
+        return photo
+
+    return photo, buffered
+
+
+async def _verify_access(
+    employee_uid: str, read_photo: Callable[[], Awaitable[bytes]], db: Session, trusted_terminal: bool = False
+) -> Dict[str, Any]:
+    """
+    Runs the verification flow shared by the access-verify endpoints.
+
+    Args:
+        employee_uid (str): The scanned QR code.
+        read_photo (Callable): Reads the uploaded image, raising UploadTooLarge;
+            only called once the employee is known to be allowed in.
+        db (Session): Database session.
+        trusted_terminal (bool): The request comes from a terminal authenticated
+            by its token, whose RAW8 faces may skip detection.
+    """
     logger.info(f"Processing verification request for UUID: {employee_uid}")
 
     # 1. UUID Validation
@@ -50,61 +414,73 @@ async def verify_access(
     except ValueError:
         logger.warning(f"Invalid UUID format received: {employee_uid}")
 
-        log = AccessLog(
-            status=AccessLogStatus.DENIED_QR,
-            employee_id=None,
-            reason="QR_INVALID_FORMAT"
-        )
-        db.add(log)
-        db.commit()
+        _record_access(db, AccessLogStatus.DENIED_QR, "QR_INVALID_FORMAT")
 
         return {"access": "DENIED", "reason": "QR_INVALID_FORMAT"}
 
 
     # 2. Fetch Employee from Database
-    employee = db.query(Employee).filter(Employee.uuid == uid_obj).first()
+    with timed("lookup"):
+        employee = db.query(Employee).filter(Employee.uuid == uid_obj).first()
 
-    # Logic: If employee does not exist, is inactive, or expired -> Deny access
+    # Logic: If employee does not exist, is inactive, or expired -> Deny access.
+    # Expired accounts are deactivated by the expiry sweeper; the date comparison
+    # only covers the interval between two sweeps.
     if not employee or not employee.is_active or (employee.expires_at and datetime.now() > employee.expires_at):
         logger.info(f"Access denied (QR): Unknown or inactive employee {employee_uid}")
-        log = AccessLog(
-            status=AccessLogStatus.DENIED_QR,
-            employee_id=uid_obj if employee else None,
-            reason="QR_INVALID_OR_INACTIVE"
-        )
-        db.add(log)
-        db.commit()
+        _record_access(db, AccessLogStatus.DENIED_QR, "QR_INVALID_OR_INACTIVE", employee=employee)
         return {"access": "DENIED", "reason": "QR_INVALID_OR_INACTIVE"}
 
     logger.info(f"QR Validated for employee: {employee.name}. Starting biometric check.")
 
     # 3. Biometric Verification
     try:
-        # Read file content safely
-        photo_bytes = await file.read()
+        # Read file content safely, refusing oversized uploads while streaming
+        try:
+            with timed("read"):
+                photo_bytes = await read_photo()
+        except UploadTooLarge:
+            logger.warning(f"Access denied: Oversized upload for {employee.name}")
+            _record_access(db, AccessLogStatus.DENIED_FACE, "IMAGE_TOO_LARGE", employee=employee)
+            return {"access": "DENIED", "reason": "IMAGE_TOO_LARGE"}
 
         if not photo_bytes:
             return {"access": "DENIED", "reason": "EMPTY_IMAGE_FILE"}
 
+        # The live image must be embedded by the model that produced the stored template
+        template, model_name, detector_backend = biometric_service.select_template(employee)
+        # A different detector only changes the face crop; the model must stay the template's
+        detector_backend = biometric_service.TERMINAL_DETECTOR or detector_backend
+        if trusted_terminal and sniff_image_type(photo_bytes) == "raw":
+            # Already cropped and aligned by the terminal, which also checked for a single face.
+            # Any other client could use RAW8 to switch the no-face and multiple-face checks off.
+            detector_backend = "skip"
+
+        async def compute_embedding():
+            with metrics.inference_slot():
+                return await run_in_threadpool(generate_face_embedding, photo_bytes, model_name, detector_backend)
+
         # Attempt to generate embedding from the uploaded photo
+        # Retried or double-submitted captures reuse the result of the first one
         try:
-            new_embedding = await run_in_threadpool(generate_face_embedding, photo_bytes)
+            with timed("embedding"):
+                new_embedding = await embedding_cache.get_or_compute(
+                    photo_bytes, compute_embedding, variant=(model_name, detector_backend), scope=employee.uuid
+                )
 
         except ValueError as e:
             # Check for multiple faces exception (Anti-Tailgating)
             if str(e) == "MULTIPLE_FACES_DETECTED":
                 logger.warning(f"Access denied: Multiple faces detected for {employee.name}")
 
-                log = AccessLog(
-                    status=AccessLogStatus.DENIED_FACE,
-                    employee_id=employee.uuid,
-                    reason="MULTIPLE_FACES"
-                )
-                db.add(log)
-                db.commit()
+                _record_access(db, AccessLogStatus.DENIED_FACE, "MULTIPLE_FACES", employee=employee, photo=photo_bytes)
 
                 # Return strict denial
                 return {"access": "DENIED", "reason": "MULTIPLE_FACES"}
+            elif str(e) == "INVALID_IMAGE":
+                logger.warning(f"Access denied: Corrupt or non-image upload for {employee.name}")
+                _record_access(db, AccessLogStatus.DENIED_FACE, "INVALID_IMAGE", employee=employee, photo=photo_bytes)
+                return {"access": "DENIED", "reason": "INVALID_IMAGE"}
             else:
                 # Other ValueErrors (e.g., no face found by DeepFace internally)
                 new_embedding = None
@@ -112,31 +488,23 @@ async def verify_access(
         # Handle cases where no face is detected (or other minor errors)
         if new_embedding is None:
             logger.warning(f"Biometrics failed: No face detected for {employee.name}")
-            log = AccessLog(
-                status=AccessLogStatus.DENIED_FACE,
-                employee_id=employee.uuid,
-                reason="NO_FACE_DETECTED"
-            )
-            db.add(log)
-            db.commit()
+            _record_access(db, AccessLogStatus.DENIED_FACE, "NO_FACE_DETECTED", employee=employee, photo=photo_bytes)
             return {"access": "DENIED", "reason": "NO_FACE_DETECTED"}
 
         # Compare with the stored biometric vector
         # Returns (is_match, distance)
-        is_match, distance = verify_face(employee.embedding, new_embedding)
+        # Global or per-employee threshold from the calibration file, for the
+        # model of the selected template (the next one during a re-embedding)
+        threshold = thresholds.threshold_for(employee.uuid, model_name)
+        with timed("compare"):
+            is_match, distance = verify_face(template, new_embedding, threshold=threshold)
 
         # Log distance for debugging purposes
-        logger.info(f"DEBUG: Comparison for {employee.name} | Distance: {distance:.4f} | Threshold: 0.3")
+        logger.info(f"DEBUG: Comparison for {employee.name} | Distance: {distance:.4f} | Threshold: {threshold}")
 
         if is_match:
             # SUCCESS: Face matches the QR owner
-            log = AccessLog(
-                status=AccessLogStatus.GRANTED,
-                employee_id=employee.uuid,
-                reason="SUCCESS"
-            )
-            db.add(log)
-            db.commit()
+            _record_access(db, AccessLogStatus.GRANTED, "SUCCESS", employee=employee, distance=distance, photo=photo_bytes)
             return {
                 "access": "GRANTED",
                 "name": employee.name,
@@ -145,13 +513,7 @@ async def verify_access(
         else:
             # FAILURE: Face does not match
             logger.info(f"Access denied (Face): Distance {distance:.4f} too high for {employee.name}")
-            log = AccessLog(
-                status=AccessLogStatus.DENIED_FACE,
-                employee_id=employee.uuid,
-                reason="FACE_MISMATCH"
-            )
-            db.add(log)
-            db.commit()
+            _record_access(db, AccessLogStatus.DENIED_FACE, "FACE_MISMATCH", employee=employee, distance=distance, photo=photo_bytes)
             return {
                 "access": "DENIED",
                 "reason": "FACE_MISMATCH",
@@ -161,19 +523,9 @@ async def verify_access(
         logger.error(f"Biometric processing critical error: {str(e)}")
 
         try:
-            error_log = AccessLog(
-                status=AccessLogStatus.DENIED_FACE,
-                employee_id=employee.uuid if employee else None,
-                reason=f"SYS_ERR: {str(e)[:50]}"
-            )
-            db.add(error_log)
-            db.commit() # Próbujemy zapisać ten jeden log
+            _record_access(db, AccessLogStatus.DENIED_FACE, f"SYS_ERR: {str(e)[:50]}", employee=employee)
         except Exception as db_error:
             logger.error(f"Failed to log error to DB: {db_error}")
             db.rollback()
 
         return {"access": "DENIED", "reason": "PROCESSING_ERROR"}
-
-    finally:
-        # Ensure file is closed after reading to free resources
-        await file.close()
@@ -0,0 +1,92 @@
+import json
+from typing import Iterable
+
+from app.core.config import settings
+
+# Multipart boundaries and the form fields sent alongside an upload
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# Largest request body accepted by the API: one upload plus its form
+MAX_REQUEST_BYTES = settings.max_upload_bytes + MULTIPART_OVERHEAD_BYTES
+
+
+class BodySizeLimitMiddleware:
+    """
+    Refuses request bodies larger than `max_bytes` with 413, before they are parsed.
+
+    Starlette reads a whole multipart body, spooling files to disk, before the
+    endpoint gets its UploadFile, so a size check while reading the file comes
+    after the work it should prevent. A declared Content-Length above the limit
+    is refused without reading the body; a chunked body is counted as it
+    arrives and cut off once it passes the limit.
+
+    Args:
+        app: The ASGI application.
+        max_bytes (int): Largest accepted body.
+        exempt_paths (Iterable[str]): Paths without a limit (e.g. bulk imports,
+            which stream their body).
+        error (dict): JSON body of the 413 response.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_bytes: int = MAX_REQUEST_BYTES,
+        exempt_paths: Iterable[str] = (),
+        error: dict = None,
+    ):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.exempt_paths = frozenset(exempt_paths)
+        self.error = json.dumps(error or {"detail": "Request body too large."}).encode()
+
+    async def _reject(self, send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(self.error)).encode())],
+        })
+        await send({"type": "http.response.body", "body": self.error})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    rejected = True
+                    if not response_started:
+                        await self._reject(send)
+                    # The application stops reading as if the client had gone
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # The disconnect surfaces as an error in the body parser; the 413 is already sent
+            if not rejected:
+                raise
@@ -0,0 +1,186 @@
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy.engine import Engine
+
+from app.core.timing import StageTimer
+
+# Buckets from 1 ms to 10 s: covers a DB lookup as well as a cold model inference
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+VERIFY_SECONDS = Histogram(
+    "entry_verify_duration_seconds",
+    "Total duration of access-verify requests.",
+    buckets=LATENCY_BUCKETS,
+)
+VERIFY_STAGE_SECONDS = Histogram(
+    "entry_verify_stage_duration_seconds",
+    "Duration of the individual stages of access-verify requests.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+ACCESS_DECISIONS = Counter(
+    "entry_access_decisions_total",
+    "Access decisions by status and reason.",
+    ["status", "reason"],
+)
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "entry_embedding_cache_lookups_total",
+    "Embedding cache lookups by result (hit, shared in-flight computation, miss).",
+    ["result"],
+)
+IDEMPOTENT_REPLAYS = Counter(
+    "entry_idempotent_replays_total",
+    "Access-verify retries answered with a stored decision, by where it was found (memory, in_flight, log).",
+    ["source"],
+)
+SHADOW_EVALUATIONS = Counter(
+    "entry_shadow_evaluations_total",
+    "Shadow pipeline evaluations by agreement with production (agree, disagree, skipped).",
+    ["result"],
+)
+SHADOW_SECONDS = Histogram(
+    "entry_shadow_inference_duration_seconds",
+    "Inference duration of the shadow pipeline.",
+    buckets=LATENCY_BUCKETS,
+)
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "entry_inference_queue_depth",
+    "Requests waiting for or running a face embedding.",
+    # Under gunicorn: the sum over the running workers
+    multiprocess_mode="livesum",
+)
+
+
+def observe_request(timer: StageTimer, seconds: float) -> None:
+    """
+    Records the total and per-stage durations of one access-verify request.
+    """
+    VERIFY_SECONDS.observe(seconds)
+    for stage, duration in timer.stages.items():
+        VERIFY_STAGE_SECONDS.labels(stage).observe(duration)
+
+
+def record_decision(status: str, reason: str) -> None:
+    """
+    Counts one access decision. `reason` must come from a bounded set
+    (see stats_service.normalize_reason) to keep label cardinality low.
+    """
+    ACCESS_DECISIONS.labels(status, reason).inc()
+
+
+def record_embedding_cache(result: str) -> None:
+    EMBEDDING_CACHE_LOOKUPS.labels(result).inc()
+
+
+def record_idempotent_replay(source: str) -> None:
+    IDEMPOTENT_REPLAYS.labels(source).inc()
+
+
+def record_shadow(result: str) -> None:
+    SHADOW_EVALUATIONS.labels(result).inc()
+
+
+def observe_shadow_latency(seconds: float) -> None:
+    SHADOW_SECONDS.observe(seconds)
+
+
+@contextmanager
+def inference_slot() -> Iterator[None]:
+    """
+    Tracks a request in the inference queue depth gauge while the block runs.
+    """
+    INFERENCE_QUEUE_DEPTH.inc()
+    try:
+        yield
+    finally:
+        INFERENCE_QUEUE_DEPTH.dec()
+
+
+class DatabasePoolCollector:
+    """
+    Reports the SQLAlchemy connection pool state at scrape time.
+
+    Reading the pool on demand costs nothing between scrapes, unlike
+    listening to every checkout/checkin event.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def collect(self):
+        pool = self.engine.pool
+        for name, description in (
+            ("size", "Configured size of the connection pool."),
+            ("checkedout", "Connections currently in use."),
+            ("checkedin", "Idle connections in the pool."),
+            ("overflow", "Connections opened beyond the pool size."),
+        ):
+            reader = getattr(pool, name, None)
+            if callable(reader):
+                yield GaugeMetricFamily(f"entry_db_pool_{name}", description, value=float(reader()))
+
+
+_pool_collector: Optional[DatabasePoolCollector] = None
+
+
+def register_pool_collector(engine: Engine) -> None:
+    """
+    Exposes the pool of `engine` on /metrics. Calling it again switches the engine.
+    """
+    global _pool_collector
+    if _pool_collector is not None:
+        REGISTRY.unregister(_pool_collector)
+    _pool_collector = DatabasePoolCollector(engine)
+    REGISTRY.register(_pool_collector)
+
+
+def multiprocess_dir() -> Optional[str]:
+    """
+    Returns the directory of prometheus_client's multiprocess mode, or None.
+
+    Under gunicorn (see gunicorn.conf.py) every worker writes its metrics to
+    files in PROMETHEUS_MULTIPROC_DIR, so that /metrics, whichever worker
+    serves it, reports the whole server.
+    """
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+def prepare_multiprocess_dir(path: str) -> None:
+    """
+    Creates the multiprocess directory, or empties it: files left by a
+    previous server would be added to the new counters and gauges.
+    """
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob("*.db"):
+        stale.unlink(missing_ok=True)
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drops the live gauges of a worker that exited (its counters are kept).
+    """
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """
+    Returns the Prometheus text exposition of all metrics and its content type.
+
+    In multiprocess mode the metrics of all workers are aggregated; the
+    database pool gauges remain those of the worker serving the scrape.
+    """
+    if not multiprocess_dir():
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    if _pool_collector is not None:
+        registry.register(_pool_collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,21 +1,51 @@
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from passlib.context import CryptContext
-import os
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
+from app.core.config import settings
+from app.core.cache import TTLCache
 from app.db.session import get_db
 from app.db.models import Admin
 
 
-SECRET_KEY = os.getenv("SECRET_KEY", "zmien_mnie_na_bardzo_dlugi_losowy_ciag_znakow")
+SECRET_KEY = settings.secret_key
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+
+# Verified identities are cached briefly so dashboard polling does not
+# decode the JWT and query the admins table on every request.
+# Invalidation is process-local: a change made by another worker (or directly
+# in the database) is only seen here once the entry expires, so a deleted
+# admin may stay authenticated for up to AUTH_CACHE_TTL_SECONDS. Keep it short.
+AUTH_CACHE_TTL_SECONDS = settings.auth_cache_ttl_seconds
+AUTH_CACHE_MAX_SIZE = settings.auth_cache_max_size
+
+_token_cache = TTLCache(maxsize=AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+_admin_cache = TTLCache(maxsize=AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+# bcrypt takes 100-300 ms of CPU per call. It runs in a small dedicated pool
+# so logins never block the event loop or the threadpool used by terminals.
+PASSWORD_HASH_WORKERS = settings.password_hash_workers
+
+# Failed-login throttle: at most LOGIN_MAX_FAILED_ATTEMPTS per username
+# within LOGIN_THROTTLE_WINDOW_SECONDS, checked before any bcrypt work.
+LOGIN_MAX_FAILED_ATTEMPTS = settings.login_max_failed_attempts
+LOGIN_THROTTLE_WINDOW_SECONDS = settings.login_throttle_window_seconds
+LOGIN_THROTTLE_MAX_TRACKED = settings.login_throttle_max_tracked
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -25,6 +55,133 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a password in the bounded bcrypt pool without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
+class _LoginAttempts:
+    """Failed-attempt timestamps and in-progress checks for one username."""
+
+    __slots__ = ("failures", "in_flight")
+
+    def __init__(self):
+        self.failures: deque = deque()
+        self.in_flight = 0
+
+
+class LoginThrottle:
+    """
+    Limits login attempts per username in a sliding time window.
+
+    Attempts that are still being checked count toward the limit, so a burst
+    of parallel requests cannot all get past the check before the first one
+    fails. At most `max_tracked` usernames are kept, so spraying random
+    usernames cannot grow memory. When the table is full, the least recently
+    used usernames that are neither locked out nor being checked are
+    forgotten first; a locked-out username is never evicted, so spraying
+    cannot unlock it. If every tracked username is locked, attempts for new
+    usernames are refused until the oldest lockouts expire.
+
+    Args:
+        max_attempts (int): Failed or in-progress attempts allowed inside the window.
+        window_seconds (float): Length of the sliding window, in seconds.
+        max_tracked (int): Maximum number of usernames tracked at once.
+    """
+
+    def __init__(self, max_attempts: int, window_seconds: float, max_tracked: int = 10000):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.max_tracked = max_tracked
+        self._attempts: "OrderedDict[str, _LoginAttempts]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, state: _LoginAttempts, now: float) -> _LoginAttempts:
+        while state.failures and now - state.failures[0] > self.window_seconds:
+            state.failures.popleft()
+        return state
+
+    def _locked(self, state: _LoginAttempts) -> bool:
+        return len(state.failures) + state.in_flight >= self.max_attempts
+
+    def _make_room(self, now: float) -> bool:
+        """
+        Evicts one username that holds no lockout or check, oldest first.
+
+        Returns:
+            bool: False if every tracked username must be kept.
+        """
+        for username, state in self._attempts.items():
+            self._expire(state, now)
+            if state.in_flight == 0 and not self._locked(state):
+                del self._attempts[username]
+                return True
+        return False
+
+    def _retry_after(self, state: _LoginAttempts, now: float) -> int:
+        if not state.failures:
+            return 1
+        return max(1, int(self.window_seconds - (now - state.failures[0])) + 1)
+
+    def acquire(self, username: str) -> Optional[int]:
+        """
+        Reserves an attempt for the username before any password check.
+
+        Returns:
+            Optional[int]: Seconds to wait if the username is locked out. None
+                if the attempt was reserved, in which case `release` must follow.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._attempts.get(username)
+            if state is None:
+                if len(self._attempts) >= self.max_tracked and not self._make_room(now):
+                    oldest = next(iter(self._attempts.values()))
+                    return self._retry_after(oldest, now)
+                state = self._attempts[username] = _LoginAttempts()
+
+            self._attempts.move_to_end(username)
+            self._expire(state, now)
+            if self._locked(state):
+                return self._retry_after(state, now)
+
+            state.in_flight += 1
+            return None
+
+    def release(self, username: str, success: bool) -> None:
+        """
+        Completes an attempt reserved with `acquire`.
+
+        A success clears the username's failures, a failure is recorded in the
+        window. Attempts of the same username still being checked keep counting.
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Reserved usernames are never evicted, so the state is still there
+            state = self._attempts.setdefault(username, _LoginAttempts())
+            state.in_flight = max(0, state.in_flight - 1)
+            if success:
+                state.failures.clear()
+            else:
+                self._expire(state, now).failures.append(now)
+
+            if state.in_flight == 0 and not state.failures:
+                del self._attempts[username]
+
+    def tracked_count(self) -> int:
+        return len(self._attempts)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._attempts.clear()
+
+
+login_throttle = LoginThrottle(LOGIN_MAX_FAILED_ATTEMPTS, LOGIN_THROTTLE_WINDOW_SECONDS, LOGIN_THROTTLE_MAX_TRACKED)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     Generates a JWT (JSON Web Token) for administrator authentication.
@@ -50,6 +207,94 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="admin/login")
 
+
+def invalidate_admin_cache(*args) -> None:
+    """
+    Drops every cached token and admin identity.
+
+    Registered as a SQLAlchemy listener, so any ORM update or deletion of an
+    `Admin` row in this process forces the next request to re-validate against
+    the database. Admin changes are rare, so clearing everything is cheaper
+    than tracking which tokens belong to which account.
+    """
+    _token_cache.clear()
+    _admin_cache.clear()
+
+
+def _invalidate_after_bulk_change(context) -> None:
+    # Bulk query(...).update()/.delete() bypass the mapper-level events
+    if context.mapper.class_ is Admin:
+        invalidate_admin_cache()
+
+
+event.listen(Admin, "after_update", invalidate_admin_cache)
+event.listen(Admin, "after_delete", invalidate_admin_cache)
+event.listen(Session, "after_bulk_update", _invalidate_after_bulk_change)
+event.listen(Session, "after_bulk_delete", _invalidate_after_bulk_change)
+
+
+def _decode_token_subject(token: str) -> Optional[str]:
+    """
+    Returns the username stored in a valid token, or None if the token is invalid.
+
+    Successful decodes are cached until the token's own expiry (capped by
+    AUTH_CACHE_TTL_SECONDS), so an expired token can never be served from cache.
+    """
+    username = _token_cache.get(token)
+    if username is not None:
+        return username
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+    username = payload.get("sub")
+    if username is None:
+        return None
+
+    ttl = AUTH_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    _token_cache.set(token, username, ttl=ttl)
+
+    return username
+
+
+def authenticate_token(token: str, db: Session) -> Optional[Admin]:
+    """
+    Resolves a bearer token to an administrator, using the identity caches.
+
+    Shared by the HTTP dependency and by WebSocket endpoints, which cannot use
+    the OAuth2 header scheme and pass the token as a query parameter instead.
+
+    Args:
+        token (str): Encoded JWT.
+        db (Session): Database session used on a cache miss.
+
+    Returns:
+        Optional[Admin]: The administrator, or None if the token is invalid.
+    """
+    username = _decode_token_subject(token)
+    if username is None:
+        return None
+
+    admin = _admin_cache.get(username)
+    if admin is not None:
+        return admin
+
+    admin = db.query(Admin).filter(Admin.username == username).first()
+    if admin is None:
+        return None
+
+    # Detach the instance so it can be safely shared between request sessions
+    db.expunge(admin)
+    _admin_cache.set(username, admin)
+
+    return admin
+
+
 async def get_current_active_admin(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -73,15 +318,7 @@ async def get_current_active_admin(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    admin = db.query(Admin).filter(Admin.username == username).first()
+    admin = authenticate_token(token, db)
 
     if admin is None:
         raise credentials_exception
@@ -0,0 +1,82 @@
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+try:
+    # Optional: stages become OpenTelemetry spans when the API is installed.
+    # Without a configured SDK the tracer is a no-op.
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("entry_system")
+except ImportError:
+    _tracer = None
+
+
+def _span(name: str):
+    return _tracer.start_as_current_span(name) if _tracer else nullcontext()
+
+
+class StageTimer:
+    """
+    Collects wall-clock durations of the named stages of one request.
+
+    Durations of repeated stages are summed. The result is exposed to clients
+    through the standard `Server-Timing` header, which the benchmark suite and
+    browser dev tools can read without any extra endpoint.
+    """
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            with _span(name):
+                yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items())
+
+
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar("current_stage_timer", default=None)
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _current_timer.get()
+
+
+@contextmanager
+def request_timer(name: str = "request") -> Iterator[StageTimer]:
+    """
+    Makes a new StageTimer current for the duration of the block.
+
+    The timer is stored in a context variable, so `timed()` works in helpers
+    and in functions run through `run_in_threadpool` without passing it around.
+
+    Args:
+        name (str): Name of the enclosing tracing span, if tracing is enabled.
+    """
+    timer = StageTimer()
+    token = _current_timer.set(timer)
+    try:
+        with _span(name):
+            yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Times a stage on the current request timer. A no-op outside of a request.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+
+    with timer.stage(name):
+        yield
@@ -0,0 +1,84 @@
+import zlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+
+def lock_key(name: str) -> int:
+    """
+    Returns the advisory lock key of a name; crc32 rather than hash(), so it is the same in every process.
+    """
+    return zlib.crc32(name.encode())
+
+
+class AdvisoryLock:
+    """
+    A PostgreSQL session-level advisory lock, held on a dedicated connection.
+
+    Background loops run in every worker process of the server; the lock lets
+    one of them do each round of work while the others skip it. A worker that
+    dies releases the lock with its connection. On other databases (SQLite,
+    a single process) acquiring always succeeds.
+
+    Args:
+        engine (Engine): Database engine.
+        name (str): Name of the guarded work, identical in every process.
+    """
+
+    def __init__(self, engine: Engine, name: str):
+        self.engine = engine
+        self.key = lock_key(name)
+        self._connection: Optional[Connection] = None
+
+    def acquire(self) -> bool:
+        """
+        Takes the lock if no other process holds it, without waiting.
+
+        Returns:
+            bool: True if this process now holds the lock.
+        """
+        if self.engine.dialect.name != "postgresql":
+            return True
+
+        connection = self.engine.connect()
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def release(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            self._connection.commit()
+        finally:
+            self._connection.close()
+            self._connection = None
+
+
+@asynccontextmanager
+async def exclusively(engine: Engine, name: str) -> AsyncIterator[bool]:
+    """
+    Runs a block of background work in at most one process at a time.
+
+    Yields:
+        bool: Whether this process holds the lock; if not, the block should skip its work.
+    """
+    lock = AdvisoryLock(engine, name)
+    acquired = await run_in_threadpool(lock.acquire)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            await run_in_threadpool(lock.release)
@@ -1,8 +1,9 @@
 import uuid
 import enum
 from datetime import datetime
-from sqlalchemy import Column, Float, String, Integer, Boolean, DateTime, ForeignKey, Enum as SqlEnum, PickleType
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Float, String, Integer, Boolean, DateTime, ForeignKey, Identity, Index, Enum as SqlEnum, PickleType, SmallInteger, func
+# Generic Uuid: native UUID on PostgreSQL, CHAR(32) on SQLite (benchmarks, local runs)
+from sqlalchemy import Uuid as UUID
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -27,18 +28,65 @@ class Employee(Base):
     email = Column(String, unique=True, nullable=False, index=True)
     is_active = Column(Boolean, nullable=False)
     expires_at = Column(DateTime, nullable=True)
+    # Expiry date the last reminder email was sent for (see services/expiry_sweeper.py)
+    expiry_reminder_sent_for = Column(DateTime, nullable=True)
 
     # PickleType permits saving lists/arrays from DeepFace
     embedding = Column(PickleType, nullable=True)
+    # Model and detector that produced the embedding (NULL: legacy Facenet512/retinaface)
+    embedding_model = Column(String, nullable=True)
+    embedding_detector = Column(String, nullable=True)
+
+    # Template computed by a re-embedding job for the next model, promoted once the migration completes
+    next_embedding = Column(PickleType, nullable=True)
+    next_embedding_model = Column(String, nullable=True)
+    next_embedding_detector = Column(String, nullable=True)
+
+    # Optimistic concurrency: incremented by every change to the editable data
+    # (profile, status, template), sent to clients as the ETag. ORM flushes
+    # only write if the row still has the version that was read; the
+    # application sets new versions itself so that background bookkeeping
+    # (reminders, pending re-embeddings) does not invalidate admins' ETags.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # Relation to logs
     logs = relationship("AccessLog", back_populates="employee")
 
+    # Stored enrollment photos; loaded only on access, never with employee lists
+    photos = relationship(
+        "EnrollmentPhoto", back_populates="employee", cascade="all, delete-orphan", passive_deletes=True,
+        order_by="EnrollmentPhoto.created_at",
+    )
+
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
+# Expiry sweeper and "expiring soon" filters scan expires_at ranges
+Index("ix_employees_expires_at", Employee.expires_at)
+# Admin listing: keyset pagination on (name, uuid) and case-insensitive prefix search
+Index("ix_employees_name_uuid", Employee.name, Employee.uuid)
+Index(
+    "ix_employees_lower_name", func.lower(Employee.name).label("lower_name"),
+    postgresql_ops={"lower_name": "text_pattern_ops"},
+)
+Index(
+    "ix_employees_lower_email", func.lower(Employee.email).label("lower_email"),
+    postgresql_ops={"lower_email": "text_pattern_ops"},
+)
+
 class AccessLog(Base):
     __tablename__ = "access_logs"
+    # Range-partitioned by month on PostgreSQL (see services/log_partitions.py),
+    # which requires the partition key to be part of the primary key.
+    __table_args__ = (
+        Index("ix_access_logs_timestamp", "timestamp"),
+        Index("ix_access_logs_employee_id_timestamp", "employee_id", "timestamp"),
+        Index("ix_access_logs_status_timestamp", "status", "timestamp"),
+        Index("ix_access_logs_request_id", "request_id"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.now, nullable=False)
+    id = Column(Integer, Identity(), primary_key=True)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.now, nullable=False)
 
     # Entry status
     status = Column(SqlEnum(AccessLogStatus), nullable=False)
@@ -52,3 +100,61 @@ class AccessLog(Base):
     employee = relationship("Employee", back_populates="logs")
 
     debug_distance = Column(Float, nullable=True, default=0.0)
+
+    # Idempotency-Key of the terminal request, used to answer retries (see services/idempotency.py)
+    request_id = Column(String(128), nullable=True)
+    # SHA-256 of the frame of that request; a retry is only answered for the same frame
+    frame_hash = Column(String(64), nullable=True)
+
+
+class AccessStatsRollup(Base):
+    """
+    Pre-aggregated access counters, maintained incrementally by the log writer.
+
+    Every decision increments two kinds of rows per granularity ("hour", "day"):
+    a total per (status, reason) stored under ALL_EMPLOYEES, and a per-employee
+    total per status stored under ANY_REASON. Dashboards read these rows instead
+    of scanning access_logs.
+
+    The ALL_EMPLOYEES totals are incremented by every terminal, so each one is
+    spread over several `shard` rows picked at random; readers sum the shards.
+    """
+    __tablename__ = "access_stats_rollups"
+
+    granularity = Column(String(8), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    status = Column(SqlEnum(AccessLogStatus), primary_key=True)
+    reason = Column(String, primary_key=True)
+
+    # No foreign key: sentinel IDs mark aggregate and unknown-employee rows
+    employee_id = Column(UUID(as_uuid=True), primary_key=True)
+    shard = Column(SmallInteger, primary_key=True, default=0)
+
+    count = Column(Integer, nullable=False, default=0)
+
+
+class EnrollmentPhoto(Base):
+    """
+    Metadata of a stored enrollment photo.
+
+    The image bytes live in the content-addressed blob store (see
+    services/blob_store.py) under `sha256`, with a normalized thumbnail under
+    `thumbnail_sha256`; only the digests are kept here.
+    """
+    __tablename__ = "enrollment_photos"
+    __table_args__ = (
+        Index("ix_enrollment_photos_employee_id_created_at", "employee_id", "created_at"),
+        Index("ix_enrollment_photos_sha256", "sha256"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.uuid", ondelete="CASCADE"), nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    thumbnail_sha256 = Column(String(64), nullable=True)
+    content_type = Column(String, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+    employee = relationship("Employee", back_populates="photos")
@@ -0,0 +1,188 @@
+"""
+Standalone inference server holding the face recognition model.
+
+API workers send images here (see services/inference_client.py, enabled with
+INFERENCE_URL) instead of loading DeepFace themselves, so HTTP workers can be
+scaled without multiplying model memory:
+
+    uvicorn app.inference_server:app --host 0.0.0.0 --port 8001
+
+Each server process holds one model and runs inference on a single thread.
+Requests that arrive while a batch is running are embedded together in the
+next DeepFace call.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.core.config import settings
+from app.services import biometric_service
+from app.services.biometric_service import DETECTOR_BACKEND, MODEL_NAME
+from app.services.image_ingest import MAX_UPLOAD_BYTES
+from app.services.inference_client import EMBEDDING_CONTENT_TYPE, encode_embedding
+
+logger = logging.getLogger("uvicorn")
+
+# Largest number of images embedded by one DeepFace call
+INFERENCE_MAX_BATCH = settings.inference_max_batch
+# How long a batch waits for more requests; 0 batches only requests that queued up during the previous batch
+INFERENCE_BATCH_WAIT_MS = settings.inference_batch_wait_ms
+
+
+class MicroBatcher:
+    """
+    Groups concurrent inference requests for the same model into batches.
+
+    Batches run one at a time on a dedicated thread. At low load every request
+    runs alone without added latency; under load, requests queue up while the
+    model is busy and are embedded together by the next call.
+
+    Args:
+        embed_batch (Callable): Embeds a list of images for (model, detector),
+            see `biometric_service.generate_face_embeddings`.
+        max_batch (int): Largest batch.
+        max_wait (float): Seconds a batch waits for more requests.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable = biometric_service.generate_face_embeddings,
+        max_batch: int = INFERENCE_MAX_BATCH,
+        max_wait: float = INFERENCE_BATCH_WAIT_MS / 1000,
+    ):
+        self.embed_batch = embed_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self.executor.shutdown(wait=False)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, image: bytes, model_name: str, detector_backend: str):
+        """
+        Queues an image and waits for its result (embedding, None or ValueError).
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((model_name, detector_backend), image, future))
+        return await future
+
+    async def _next_batch(self, first: tuple) -> tuple[list, Optional[tuple]]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        batch = [first]
+        while len(batch) < self.max_batch:
+            try:
+                if self._queue.empty() and self.max_wait > 0:
+                    item = await asyncio.wait_for(self._queue.get(), max(0.0, deadline - loop.time()))
+                else:
+                    item = self._queue.get_nowait()
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            if item[0] != first[0]:
+                # Different model: starts the next batch
+                return batch, item
+            batch.append(item)
+        return batch, None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        held = None
+        while True:
+            first = held or await self._queue.get()
+            batch, held = await self._next_batch(first)
+            (model_name, detector_backend), images = first[0], [image for _, image, _ in batch]
+
+            try:
+                results = await loop.run_in_executor(self.executor, self.embed_batch, images, model_name, detector_backend)
+            except Exception as e:
+                logger.error(f"Inference batch of {len(batch)} failed: {e}")
+                results = [e] * len(batch)
+
+            for (_, _, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception) and not isinstance(result, ValueError):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+batcher = MicroBatcher()
+state = {"ready": False}
+
+
+async def _load_model() -> None:
+    try:
+        await asyncio.get_running_loop().run_in_executor(batcher.executor, biometric_service.load_models)
+        state["ready"] = True
+        logger.info(f"Inference model {MODEL_NAME}/{DETECTOR_BACKEND} loaded")
+    except Exception as e:
+        logger.error(f"Loading the inference model failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    batcher.start()
+    # Loads on the inference thread, so requests queue behind it instead of racing it
+    loading = asyncio.create_task(_load_model())
+    yield
+    loading.cancel()
+    await batcher.stop()
+
+
+app = FastAPI(title="FaceOn Inference Server", lifespan=lifespan)
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES, error={"error": "IMAGE_TOO_LARGE"})
+
+
+@app.get("/health")
+async def health() -> JSONResponse:
+    """
+    Readiness of the server: 200 once the model is loaded, 503 before.
+    """
+    body = {
+        "status": "ok" if state["ready"] else "loading",
+        "model": MODEL_NAME,
+        "detector": DETECTOR_BACKEND,
+        "pending": batcher.pending,
+    }
+    return JSONResponse(body, status_code=200 if state["ready"] else 503)
+
+
+@app.post("/v1/embed")
+async def embed(request: Request, model: str = MODEL_NAME, detector: str = DETECTOR_BACKEND) -> Response:
+    """
+    Embeds the image sent as the raw request body.
+
+    Returns:
+        Response: 200 with the embedding as little-endian float32, 204 if no
+            face was found, 422 with {"error": ...} for multiple faces or an
+            invalid image, 413 for oversized bodies (refused by the middleware
+            before the body is read).
+    """
+    image = await request.body()
+
+    result = await batcher.submit(image, model, detector)
+    if isinstance(result, ValueError):
+        return JSONResponse({"error": str(result)}, status_code=422)
+    if result is None:
+        return Response(status_code=204)
+    return Response(content=encode_embedding(result), media_type=EMBEDDING_CONTENT_TYPE)
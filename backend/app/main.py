@@ -1,22 +1,60 @@
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.admin_routes import adminRouter
 from app.api.terminal_routes import terminalRouter
 from app.db.session import engine
 from app.db import models
+from app.core import metrics
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.services import biometric_service, expiry_sweeper, inference_client, log_partitions
+from app.services.capture_store import capture_store
+from app.services.shadow import shadow_evaluator
 from app.utils import create_default_admin
-from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 
-models.Base.metadata.create_all(bind=engine)
+_database_initialized = False
+
+
+def init_database() -> None:
+    """
+    Creates missing tables, the current access log partitions and the default
+    admin account, once per process tree.
+
+    Under gunicorn this runs in the master before the workers are forked
+    (see gunicorn.conf.py), so the workers skip it instead of racing each other.
+    """
+    global _database_initialized
+    if _database_initialized:
+        return
+    models.Base.metadata.create_all(bind=engine)
+    log_partitions.prepare_partitions(engine)
+    create_default_admin()
+    _database_initialized = True
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_default_admin()
+    app.state.ready = False
+    # Schema creation runs at startup, not import, so importing the app stays cheap
+    init_database()
+    if biometric_service.BIOMETRIC_PRELOAD:
+        # Loads the model in-process, or checks the inference server when INFERENCE_URL is set
+        await run_in_threadpool(inference_client.get_inference_client().warm_up)
+    partition_maintenance = asyncio.create_task(log_partitions.maintenance_loop(engine))
+    expiry_sweep = asyncio.create_task(expiry_sweeper.sweep_loop())
+    app.state.ready = True
     yield
+    # Graceful shutdown: report not ready, then drain the background writers
+    app.state.ready = False
+    expiry_sweep.cancel()
+    partition_maintenance.cancel()
+    await run_in_threadpool(capture_store.close)
+    await run_in_threadpool(shadow_evaluator.close)
 
 app = FastAPI(
     title="FaceOn Entry System API",
@@ -39,7 +77,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+# Oversized uploads are refused before multipart parsing spools them; backup imports stream their body
+app.add_middleware(BodySizeLimitMiddleware, exempt_paths=("/admin/employees/import",))
 
 app.include_router(adminRouter)
 app.include_router(terminalRouter)
+
+metrics.register_pool_collector(engine)
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics() -> Response:
+    """
+    Exposes latency histograms, access decision counters, inference queue
+    depth and database pool usage in the Prometheus text format.
+    """
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/health/live", include_in_schema=False)
+def liveness() -> dict:
+    """
+    Liveness probe: the worker is running.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/health/ready", include_in_schema=False)
+def readiness(response: Response) -> dict:
+    """
+    Readiness probe: 200 once startup (database, model warm-up) is complete,
+    503 before that and while shutting down.
+    """
+    ready = getattr(app.state, "ready", False)
+    if not ready:
+        response.status_code = 503
+    return {"status": "ready" if ready else "starting"}
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # React's sending info
 class AdminLogin(BaseModel):
@@ -21,18 +21,60 @@ class LogEntry(BaseModel):
     reason: str | None = None
     employee_email: str | None = None
     debug_distance: float | None = None
+    employee_id: uuid.UUID | None = None
+
+    @classmethod
+    def from_log(cls, log, employee=None) -> "LogEntry":
+        """
+        Builds the dashboard representation of an AccessLog row.
+
+        Args:
+            log (AccessLog): The stored log entry.
+            employee (Employee, optional): Related employee, if already loaded.
+        """
+        return cls(
+            id=log.id,
+            timestamp=(log.timestamp + timedelta(hours=1)).isoformat(),
+            employee_name=employee.name if employee else "Unknown",
+            status=log.status.value,
+            reason=log.reason,
+            employee_email=employee.email if employee else None,
+            debug_distance=log.debug_distance,
+            employee_id=log.employee_id,
+        )
 
 class EmployeeStatusUpdate(BaseModel):
     is_active: Optional[bool] = None
     expiration_date: Optional[str] = None
 
 
+class StatsBucket(BaseModel):
+    bucket_start: datetime
+    status: str
+    count: int
+
+
+class ReasonCount(BaseModel):
+    status: str
+    reason: str
+    count: int
+
+
+class EmployeeAccessCount(BaseModel):
+    employee_id: uuid.UUID | None = None
+    total: int
+    granted: int
+    denied: int
+
+
 class EmployeeResponse(BaseModel):
     uuid: uuid.UUID
     name: str
     email: str
     is_active: bool
     expires_at: Optional[datetime]  # Added to allow frontend to see the expiration date
+    # Sent back in If-Match to detect concurrent edits
+    version: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -40,3 +82,27 @@ class EmployeeResponse(BaseModel):
 class EmployeeStatusUpdate(BaseModel):
     is_active: Optional[bool] = None
     expiration_date: Optional[str] = None
+
+
+class EnrollmentPhotoResponse(BaseModel):
+    id: int
+    sha256: str
+    content_type: str
+    size_bytes: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    created_at: datetime
+    has_thumbnail: bool
+
+    @classmethod
+    def from_photo(cls, photo) -> "EnrollmentPhotoResponse":
+        return cls(
+            id=photo.id,
+            sha256=photo.sha256,
+            content_type=photo.content_type,
+            size_bytes=photo.size_bytes,
+            width=photo.width,
+            height=photo.height,
+            created_at=photo.created_at,
+            has_thumbnail=photo.thumbnail_sha256 is not None,
+        )
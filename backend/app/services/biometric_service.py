@@ -1,45 +1,107 @@
-from deepface import DeepFace
-from scipy.spatial.distance import cosine
-import numpy as np
-import cv2
 import logging
+import math
+from typing import Optional
+
+from app.core.config import settings
+from app.core.timing import timed
+from app.services.image_ingest import decode_image
 
 # Configuration for DeepFace
 # RetinaFace is slower but much more accurate for detection.
 # Facenet512 provides 512-dimensional embeddings
-DETECTOR_BACKEND = 'retinaface'
-MODEL_NAME = 'Facenet512'
+DETECTOR_BACKEND = settings.embedding_detector
+MODEL_NAME = settings.embedding_model
+# Detector for live terminal frames when it should differ from the enrollment detector
+TERMINAL_DETECTOR = settings.terminal_detector
+
+# Producer of templates stored before the model was recorded per employee
+LEGACY_MODEL_NAME = 'Facenet512'
+LEGACY_DETECTOR_BACKEND = 'retinaface'
+
+# Load the recognition model at startup instead of on the first verification.
+# Workers that only serve the admin API set this to false and never import
+# DeepFace/TensorFlow (imported on first use below).
+BIOMETRIC_PRELOAD = settings.biometric_preload
+
+
+def load_models(model_name: str = MODEL_NAME) -> None:
+    """
+    Imports DeepFace and builds the recognition model, so the first
+    verification does not pay for it.
+    """
+    from deepface import DeepFace
+
+    DeepFace.build_model(model_name)
+
 
-def generate_face_embedding(file_bytes: bytes) -> list:
+def select_template(employee) -> tuple[Optional[list], str, str]:
+    """
+    Picks the stored template to verify an employee against, with the model
+    and detector the live image must be embedded with to be comparable.
+
+    During a model migration an employee may hold two templates: the current
+    one and the one computed by the re-embedding job (`next_embedding`). The
+    template produced by the active model is preferred; otherwise the
+    verification falls back to the model of the stored template (dual read).
+
+    Args:
+        employee (Employee): The employee being verified.
+
+    Returns:
+        tuple: (embedding, model name, detector backend).
+    """
+    current = (
+        employee.embedding,
+        employee.embedding_model or LEGACY_MODEL_NAME,
+        employee.embedding_detector or LEGACY_DETECTOR_BACKEND,
+    )
+    upcoming = (employee.next_embedding, employee.next_embedding_model, employee.next_embedding_detector)
+
+    for template in (current, upcoming):
+        if template[0] is not None and template[1:] == (MODEL_NAME, DETECTOR_BACKEND):
+            return template
+    return current if current[0] is not None or upcoming[0] is None else upcoming
+
+def generate_face_embedding(file_bytes: bytes, model_name: str = MODEL_NAME, detector_backend: str = DETECTOR_BACKEND) -> list:
     """
     Generates a facial embedding vector for the given image bytes using DeepFace.
 
     Args:
         file_bytes (bytes): The raw bytes of the image file (e.g., from an upload).
+        model_name (str): DeepFace recognition model, defaults to the production model.
+        detector_backend (str): DeepFace face detector, defaults to the production detector.
 
     Returns:
         list: A list of floats representing the facial embedding if a face is detected.
         None: If no face is detected or an error occurs.
+
+    Raises:
+        ValueError: "INVALID_IMAGE" for corrupt or non-image data,
+                    "MULTIPLE_FACES_DETECTED" if more than one face is found.
     """
     try:
-        # Convert bytes to numpy array
-        np_array = np.frombuffer(file_bytes, np.uint8)
-        img = cv2.imdecode(np_array, cv2.IMREAD_COLOR)
+        # Validate and decode, downscaled to the detector resolution
+        with timed("decode"):
+            img = decode_image(file_bytes)
 
         # Generate embedding
         # enforce_detection=True raises ValueError if no face is found
-        embedding_obj = DeepFace.represent(
-            img_path=img,
-            model_name=MODEL_NAME,
-            detector_backend=DETECTOR_BACKEND,
-            enforce_detection=True
-        )
+        # Detection and representation run inside a single DeepFace call
+        from deepface import DeepFace
+
+        with timed("detect_embed"):
+            embedding_obj = DeepFace.represent(
+                img_path=img,
+                model_name=model_name,
+                detector_backend=detector_backend,
+                enforce_detection=True
+            )
         if len(embedding_obj) > 1:
             raise ValueError("MULTIPLE_FACES_DETECTED")
         return embedding_obj[0]["embedding"]
 
     except ValueError as e:
-        if str(e) == "MULTIPLE_FACES_DETECTED":
+        if str(e) in ("MULTIPLE_FACES_DETECTED", "INVALID_IMAGE"):
             raise e
         return None
     except Exception as e:
@@ -47,6 +109,55 @@ def generate_face_embedding(file_bytes: bytes) -> list:
         return None
 
 
+def generate_face_embeddings(images: list, model_name: str = MODEL_NAME, detector_backend: str = DETECTOR_BACKEND) -> list:
+    """
+    Embeds several images with one DeepFace call (used by the inference server).
+
+    DeepFace fails a whole batch when one image has no face, in which case the
+    images are embedded one by one instead.
+
+    Args:
+        images (list[bytes]): Raw image bytes.
+        model_name (str): DeepFace recognition model.
+        detector_backend (str): DeepFace face detector.
+
+    Returns:
+        list: Per image, the embedding, None if no face was found, or the
+            ValueError `generate_face_embedding` would raise.
+    """
+    results = [None] * len(images)
+    decoded = []
+    for i, file_bytes in enumerate(images):
+        try:
+            decoded.append((i, decode_image(file_bytes)))
+        except ValueError as e:
+            results[i] = e
+
+    if len(decoded) > 1:
+        from deepface import DeepFace
+
+        try:
+            batch = DeepFace.represent(
+                img_path=[img for _, img in decoded],
+                model_name=model_name,
+                detector_backend=detector_backend,
+                enforce_detection=True
+            )
+        except Exception:
+            pass
+        else:
+            for (i, _), faces in zip(decoded, batch):
+                results[i] = ValueError("MULTIPLE_FACES_DETECTED") if len(faces) > 1 else faces[0]["embedding"]
+            return results
+
+    for i, _ in decoded:
+        try:
+            results[i] = generate_face_embedding(images[i], model_name, detector_backend)
+        except ValueError as e:
+            results[i] = e
+    return results
+
+
 def verify_face(embedding_db: list, embedding_new: list, threshold: float = 0.3) -> tuple[bool, float]:
     """
     Compares two facial embedding vectors using Cosine Similarity.
@@ -66,7 +177,11 @@ def verify_face(embedding_db: list, embedding_new: list, threshold: float = 0.3)
         return False, 1.0
 
     # Calculate cosine distance (lower means more similar)
-    distance = cosine(embedding_db, embedding_new)
+    dot = sum(a * b for a, b in zip(embedding_db, embedding_new))
+    norm = math.sqrt(sum(a * a for a in embedding_db)) * math.sqrt(sum(b * b for b in embedding_new))
+    if norm == 0:
+        return False, 1.0
+    distance = 1.0 - dot / norm
 
     is_match = distance < threshold
     return is_match, distance
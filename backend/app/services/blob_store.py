@@ -0,0 +1,170 @@
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+# "file:///var/lib/entry/blobs" or "s3://bucket/prefix" (with S3_ENDPOINT_URL for MinIO and other local stand-ins)
+BLOB_STORE_URL = settings.blob_store_url
+S3_ENDPOINT_URL = settings.s3_endpoint_url
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BlobNotFound(Exception):
+    """Raised when no blob exists for a digest."""
+
+
+class LocalBlobStore:
+    """
+    Content-addressed blob storage on the local filesystem.
+
+    Blobs are stored under their SHA-256 digest (`ab/cd/abcd...`), so storing
+    the same bytes twice keeps a single copy. Writes go to a temporary file in
+    the same directory and are renamed into place, so a reader never sees a
+    partial blob.
+
+    Args:
+        root (str): Base directory.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self._path(digest).is_file()
+
+    def put_stream(self, chunks: Iterable[bytes]) -> str:
+        """
+        Stores a stream of chunks, hashing while writing.
+
+        Returns:
+            str: SHA-256 hex digest of the content.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        sha = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=self.root, delete=False, suffix=".partial") as tmp:
+            for chunk in chunks:
+                sha.update(chunk)
+                tmp.write(chunk)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+
+        digest = sha.hexdigest()
+        target = self._path(digest)
+        if target.exists():
+            os.unlink(tmp.name)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp.name, target)
+        return digest
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        if self.exists(digest):
+            return digest
+        return self.put_stream([data])
+
+    def iter_chunks(self, digest: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            f = open(self._path(digest), "rb")
+        except FileNotFoundError:
+            raise BlobNotFound(digest)
+        with f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def get(self, digest: str) -> bytes:
+        return b"".join(self.iter_chunks(digest))
+
+    def delete(self, digest: str) -> None:
+        self._path(digest).unlink(missing_ok=True)
+
+
+class S3BlobStore:
+    """
+    Content-addressed blob storage in an S3-compatible bucket (e.g. MinIO).
+
+    Requires the optional `boto3` package. Same digest-addressed layout and
+    interface as LocalBlobStore.
+
+    Args:
+        bucket (str): Bucket name.
+        prefix (str): Key prefix inside the bucket.
+        endpoint_url (str, optional): Endpoint of a non-AWS S3 implementation.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = None):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("boto3 is required for s3:// blob storage (pip install boto3)")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _key(self, digest: str) -> str:
+        return "/".join(filter(None, (self.prefix, digest[:2], digest[2:4], digest)))
+
+    def exists(self, digest: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(digest))
+            return True
+        except ClientError:
+            return False
+
+    def put_stream(self, chunks: Iterable[bytes]) -> str:
+        # The key depends on the hash, so the content is spooled (in memory up to 8 MB) first
+        sha = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+            for chunk in chunks:
+                sha.update(chunk)
+                spool.write(chunk)
+            digest = sha.hexdigest()
+            if not self.exists(digest):
+                spool.seek(0)
+                self.client.upload_fileobj(spool, self.bucket, self._key(digest))
+        return digest
+
+    def put(self, data: bytes) -> str:
+        return self.put_stream([data])
+
+    def iter_chunks(self, digest: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        from botocore.exceptions import ClientError
+
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._key(digest))["Body"]
+        except ClientError:
+            raise BlobNotFound(digest)
+        yield from body.iter_chunks(chunk_size)
+
+    def get(self, digest: str) -> bytes:
+        return b"".join(self.iter_chunks(digest))
+
+    def delete(self, digest: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(digest))
+
+
+@lru_cache(maxsize=None)
+def get_blob_store(url: str = BLOB_STORE_URL):
+    """
+    Returns the blob store configured by BLOB_STORE_URL.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "s3":
+        return S3BlobStore(parsed.netloc, parsed.path, endpoint_url=S3_ENDPOINT_URL)
+    if parsed.scheme in ("file", ""):
+        return LocalBlobStore(parsed.netloc + parsed.path if parsed.scheme else url)
+    raise ValueError(f"Unsupported blob store URL: {url}")
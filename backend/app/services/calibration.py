@@ -0,0 +1,158 @@
+"""
+Offline calibration of face match thresholds.
+
+Works on two kinds of input:
+* labelled embeddings (several photos per person), turned into genuine and
+  impostor cosine distance sets with a single vectorized distance matrix;
+* stored access log distances (`AccessLog.debug_distance`) with externally
+  provided genuine/impostor labels.
+
+From those sets it computes FAR/FRR curves, the equal error rate and the
+threshold meeting a target false accept rate, globally and per employee.
+"""
+from dataclasses import dataclass
+from typing import Hashable, Iterable, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class ErrorCurve:
+    thresholds: np.ndarray
+    far: np.ndarray
+    frr: np.ndarray
+
+
+def cosine_distance_matrix(a: np.ndarray, b: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Returns the pairwise cosine distances between the rows of `a` and `b` (or `a` itself).
+    """
+    a = np.asarray(a, dtype=np.float64)
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    if b is None:
+        b = a
+    else:
+        b = np.asarray(b, dtype=np.float64)
+        b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return 1.0 - a @ b.T
+
+
+def genuine_impostor_distances(embeddings: np.ndarray, labels: Sequence[Hashable]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Splits all distinct pairs of a labelled embedding set into genuine
+    (same person) and impostor (different people) distances.
+
+    Args:
+        embeddings (np.ndarray): (n, d) array of embeddings.
+        labels (Sequence): Identity of each row.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Genuine distances, impostor distances.
+    """
+    distances = cosine_distance_matrix(embeddings)
+    _, ids = np.unique(np.asarray(labels, dtype=object).astype(str), return_inverse=True)
+    same = ids[:, None] == ids[None, :]
+    upper = np.triu(np.ones_like(same, dtype=bool), k=1)
+    return distances[same & upper], distances[~same & upper]
+
+
+def error_curve(genuine: np.ndarray, impostor: np.ndarray, thresholds: Optional[np.ndarray] = None) -> ErrorCurve:
+    """
+    Computes FAR and FRR for every threshold, with the rule `distance < threshold` = match.
+
+    FAR is the share of impostor distances below the threshold, FRR the share
+    of genuine distances at or above it. Uses sorted arrays and binary search,
+    so the cost is O((n + t) log n) instead of comparing every pair per threshold.
+    """
+    genuine = np.sort(np.asarray(genuine, dtype=np.float64))
+    impostor = np.sort(np.asarray(impostor, dtype=np.float64))
+    if thresholds is None:
+        thresholds = np.linspace(0.0, 1.0, 1001)
+
+    far = np.searchsorted(impostor, thresholds, side="left") / max(len(impostor), 1)
+    frr = (len(genuine) - np.searchsorted(genuine, thresholds, side="left")) / max(len(genuine), 1)
+    return ErrorCurve(np.asarray(thresholds), far, frr)
+
+
+def equal_error_rate(curve: ErrorCurve) -> tuple[float, float]:
+    """
+    Returns (EER, threshold) at the point where FAR and FRR are closest.
+    """
+    index = int(np.argmin(np.abs(curve.far - curve.frr)))
+    return float((curve.far[index] + curve.frr[index]) / 2), float(curve.thresholds[index])
+
+
+def threshold_for_far(curve: ErrorCurve, target_far: float) -> tuple[float, float, float]:
+    """
+    Picks the highest threshold (fewest false rejects) whose FAR stays within `target_far`.
+
+    Returns:
+        tuple[float, float, float]: Threshold, its FAR, its FRR.
+    """
+    allowed = np.nonzero(curve.far <= target_far)[0]
+    index = int(allowed[-1]) if len(allowed) else 0
+    return float(curve.thresholds[index]), float(curve.far[index]), float(curve.frr[index])
+
+
+def per_employee_thresholds(
+    distances: np.ndarray,
+    is_genuine: np.ndarray,
+    employee_ids: Sequence[Hashable],
+    global_threshold: float,
+    target_far: float,
+    min_samples: int = 20,
+    max_delta: float = 0.05,
+) -> dict[str, float]:
+    """
+    Proposes thresholds for employees with enough labelled attempts.
+
+    Each employee's threshold meets `target_far` on their own impostor attempts
+    and is clamped to `global_threshold ± max_delta`, so a handful of unusual
+    samples can never open a wide gap for one person.
+
+    Args:
+        distances (np.ndarray): Distance of each labelled attempt.
+        is_genuine (np.ndarray): True for attempts by the claimed employee.
+        employee_ids (Sequence): Claimed employee of each attempt.
+        global_threshold (float): The calibrated global threshold.
+        target_far (float): Maximum false accept rate.
+        min_samples (int): Minimum genuine and impostor attempts per employee.
+        max_delta (float): Maximum deviation from the global threshold.
+
+    Returns:
+        dict[str, float]: Employee ID -> threshold, only for calibrated employees.
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    is_genuine = np.asarray(is_genuine, dtype=bool)
+    ids = np.asarray([str(e) for e in employee_ids])
+
+    result = {}
+    for employee_id in np.unique(ids):
+        mask = ids == employee_id
+        genuine, impostor = distances[mask & is_genuine], distances[mask & ~is_genuine]
+        if len(genuine) < min_samples or len(impostor) < min_samples:
+            continue
+
+        threshold, _, _ = threshold_for_far(error_curve(genuine, impostor), target_far)
+        result[str(employee_id)] = float(np.clip(threshold, global_threshold - max_delta, global_threshold + max_delta))
+    return result
+
+
+def summarize(genuine: Iterable[float], impostor: Iterable[float], target_far: float) -> dict:
+    """
+    Returns the EER and the target-FAR operating point of a genuine/impostor set.
+    """
+    genuine, impostor = np.asarray(list(genuine)), np.asarray(list(impostor))
+    curve = error_curve(genuine, impostor)
+    eer, eer_threshold = equal_error_rate(curve)
+    threshold, far, frr = threshold_for_far(curve, target_far)
+    return {
+        "genuine_samples": int(len(genuine)),
+        "impostor_samples": int(len(impostor)),
+        "eer": eer,
+        "eer_threshold": eer_threshold,
+        "threshold": threshold,
+        "far": far,
+        "frr": frr,
+        "target_far": target_far,
+    }
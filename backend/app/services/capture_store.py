@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import random
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn")
+
+# Captured frames are biometric data: capturing is off unless explicitly enabled
+CAPTURE_ENABLED = settings.capture_enabled
+CAPTURE_DIR = settings.capture_dir
+# Fraction of verifications whose frame is kept
+CAPTURE_SAMPLE_RATE = settings.capture_sample_rate
+CAPTURE_RETENTION_DAYS = settings.capture_retention_days
+CAPTURE_MAX_BYTES = settings.capture_max_bytes
+# Frames waiting to be written; more are dropped instead of buffering without bound
+CAPTURE_MAX_PENDING = settings.capture_max_pending
+
+PRUNE_EVERY = 100
+
+
+class CaptureStore:
+    """
+    Keeps verification inputs on disk for offline replay.
+
+    Each capture is a frame (`<id>.img`) and a JSON sidecar with the production
+    decision, stored under one directory per day. Writes happen on a single
+    background thread so the request path only enqueues bytes; when the writer
+    falls behind, captures are dropped. Day directories older than the retention
+    period, and the oldest days beyond `max_bytes`, are deleted periodically.
+
+    Args:
+        root (str): Base directory.
+        retention_days (int): Days of captures kept.
+        max_bytes (int): Upper bound of the total capture size.
+        sample_rate (float): Fraction of offered frames that are kept.
+    """
+
+    def __init__(
+        self,
+        root: str = CAPTURE_DIR,
+        retention_days: int = CAPTURE_RETENTION_DAYS,
+        max_bytes: int = CAPTURE_MAX_BYTES,
+        sample_rate: float = CAPTURE_SAMPLE_RATE,
+        max_pending: int = CAPTURE_MAX_PENDING,
+    ):
+        self.root = Path(root)
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture-writer")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._written = 0
+
+    def close(self) -> None:
+        """
+        Waits for the queued frames to be written (graceful shutdown).
+        """
+        self._executor.shutdown(wait=True)
+
+    def offer(self, frame: bytes, metadata: Dict[str, Any]) -> bool:
+        """
+        Queues a frame for storage, subject to sampling and the pending limit.
+
+        Returns:
+            bool: True if the frame was queued.
+        """
+        if not frame or random.random() >= self.sample_rate:
+            return False
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+
+        self._executor.submit(self._write, frame, metadata)
+        return True
+
+    def _write(self, frame: bytes, metadata: Dict[str, Any]) -> None:
+        try:
+            self.write(frame, metadata)
+            self._written += 1
+            if self._written % PRUNE_EVERY == 0:
+                self.prune()
+        except Exception as e:
+            logger.error(f"Failed to store capture: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def write(self, frame: bytes, metadata: Dict[str, Any]) -> Path:
+        """
+        Stores a frame and its sidecar synchronously. Returns the frame path.
+        """
+        captured_at = datetime.fromisoformat(metadata["timestamp"])
+        directory = self.root / captured_at.date().isoformat()
+        directory.mkdir(parents=True, exist_ok=True)
+
+        capture_id = f"{captured_at.strftime('%H%M%S%f')}-{metadata.get('log_id') or os.urandom(4).hex()}"
+        frame_path = directory / f"{capture_id}.img"
+        frame_path.write_bytes(frame)
+        # Sidecar last: a capture without one is incomplete and ignored by readers
+        (directory / f"{capture_id}.json").write_text(json.dumps(metadata, default=str))
+        return frame_path
+
+    def prune(self, today: Optional[date] = None) -> int:
+        """
+        Deletes day directories past the retention period, then the oldest
+        remaining days while the store exceeds `max_bytes`.
+
+        Returns:
+            int: Number of day directories removed.
+        """
+        if not self.root.is_dir():
+            return 0
+
+        cutoff = (today or date.today()) - timedelta(days=self.retention_days)
+        days = sorted(p for p in self.root.iterdir() if p.is_dir())
+        removed = 0
+
+        sizes = {day: sum(f.stat().st_size for f in day.iterdir()) for day in days}
+        total = sum(sizes.values())
+        for day in days:
+            try:
+                expired = date.fromisoformat(day.name) < cutoff
+            except ValueError:
+                continue
+            if expired or total > self.max_bytes:
+                shutil.rmtree(day, ignore_errors=True)
+                total -= sizes[day]
+                removed += 1
+        return removed
+
+    def iter_captures(self) -> Iterator[tuple[Path, Dict[str, Any]]]:
+        """
+        Yields (frame path, metadata) of every complete capture, oldest first.
+        """
+        if not self.root.is_dir():
+            return
+        for sidecar in sorted(self.root.glob("*/*.json")):
+            frame = sidecar.with_suffix(".img")
+            if frame.exists():
+                yield frame, json.loads(sidecar.read_text())
+
+
+capture_store = CaptureStore()
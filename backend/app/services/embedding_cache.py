@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from app.core.config import settings
+from app.core import metrics
+from app.core.cache import TTLCache
+
+# "exact" keys results by a SHA-256 of the upload, "perceptual" by a difference
+# hash of the decoded image (also matches re-encoded, near-identical consecutive
+# frames), "off" disables the cache
+EMBEDDING_CACHE_MODE = settings.embedding_cache_mode
+# Long enough to cover a terminal's retry, short enough that a new person never gets an old result
+EMBEDDING_CACHE_TTL_SECONDS = settings.embedding_cache_ttl_seconds
+EMBEDDING_CACHE_MAX_SIZE = settings.embedding_cache_max_size
+# Differing bits (out of 64) up to which two frames count as the same in perceptual mode
+EMBEDDING_CACHE_MAX_HASH_DISTANCE = settings.embedding_cache_max_hash_distance
+
+_results = TTLCache(maxsize=EMBEDDING_CACHE_MAX_SIZE, ttl=EMBEDDING_CACHE_TTL_SECONDS)
+# Computations currently running, shared by identical concurrent requests
+_in_flight: dict[Hashable, asyncio.Task] = {}
+
+
+def content_key(file_bytes: bytes) -> tuple[str, str]:
+    return ("sha256", hashlib.sha256(file_bytes).hexdigest())
+
+
+def perceptual_key(file_bytes: bytes) -> Optional[tuple[str, int]]:
+    """
+    Computes a 64-bit difference hash (dHash) of the image.
+
+    The image is decoded at 1/8 resolution in grayscale, which is a small
+    fraction of the cost of a full decode. Returns None for undecodable data.
+    """
+    import cv2
+    import numpy as np
+
+    img = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None:
+        return None
+
+    small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return ("dhash", int("".join("1" if bit else "0" for bit in bits), 2))
+
+
+def _is_near(key: Hashable, other: Hashable) -> bool:
+    if key == other:
+        return True
+    if key[0] != "dhash" or other[0] != "dhash" or key[2:] != other[2:]:
+        return False
+    return bin(key[1] ^ other[1]).count("1") <= EMBEDDING_CACHE_MAX_HASH_DISTANCE
+
+
+def _lookup(key: Hashable) -> Optional[tuple]:
+    """
+    Finds the cached outcome of `key`, or of a near-identical frame in perceptual mode.
+
+    The scan is bounded by EMBEDDING_CACHE_MAX_SIZE and only compares integers.
+    """
+    outcome = _results.get(key)
+    if outcome is not None or key[0] != "dhash":
+        return outcome
+
+    for candidate in _results.keys():
+        if _is_near(key, candidate):
+            outcome = _results.get(candidate)
+            if outcome is not None:
+                return outcome
+    return None
+
+
+def _in_flight_task(key: Hashable) -> Optional[asyncio.Task]:
+    for candidate, task in list(_in_flight.items()):
+        if _is_near(key, candidate) and not task.done():
+            return task
+    return None
+
+
+def cache_key(
+    file_bytes: bytes, mode: str = EMBEDDING_CACHE_MODE, variant: Hashable = None, scope: Hashable = None
+) -> Optional[Hashable]:
+    """
+    Builds the cache key of an image; `variant` separates results of different
+    models/detectors computed from the same image.
+
+    In perceptual mode the key also carries `scope` (the QR code being
+    verified): the dHash covers the whole frame, so another person in front
+    of the same background can hash within the match distance, and must not
+    get the previous person's embedding.
+    """
+    if mode == "off":
+        return None
+    if mode == "perceptual":
+        return (perceptual_key(file_bytes) or content_key(file_bytes)) + (variant, scope)
+    return content_key(file_bytes) + (variant,)
+
+
+def _store(key: Hashable, task: asyncio.Task) -> None:
+    _in_flight.pop(key, None)
+    if task.cancelled():
+        return
+
+    error = task.exception()
+    if error is None:
+        # "No face" (None) is a valid result and is cached as well
+        _results.set(key, ("result", task.result()))
+    elif isinstance(error, ValueError):
+        # Deterministic rejections such as MULTIPLE_FACES_DETECTED
+        _results.set(key, ("error", error))
+
+
+def _unwrap(outcome: tuple[str, Any]) -> Any:
+    kind, value = outcome
+    if kind == "error":
+        raise value
+    return value
+
+
+async def get_or_compute(
+    file_bytes: bytes, compute: Callable[[], Awaitable[Any]], variant: Hashable = None, scope: Hashable = None
+) -> Any:
+    """
+    Returns the embedding of an uploaded image, computing it at most once per
+    identical image within the cache TTL.
+
+    Identical requests arriving while the first one is still being processed
+    wait for that computation instead of starting their own, so a retry or a
+    double submit costs a single inference.
+
+    Args:
+        file_bytes (bytes): The uploaded image.
+        compute (Callable): Coroutine factory performing the actual inference.
+        variant (Hashable, optional): Identifies the model/detector used by `compute`.
+        scope (Hashable, optional): Who the frame is verified for; near-identical
+            frames are only shared within one scope (see `cache_key`).
+
+    Returns:
+        Any: The result of `compute` (an embedding, or None if no face was found).
+
+    Raises:
+        ValueError: Re-raised from `compute`, also for cached rejections.
+    """
+    key = cache_key(file_bytes, variant=variant, scope=scope)
+    if key is None:
+        return await compute()
+
+    outcome = _lookup(key)
+    if outcome is not None:
+        metrics.record_embedding_cache("hit")
+        return _unwrap(outcome)
+
+    task = _in_flight_task(key)
+    if task is not None:
+        metrics.record_embedding_cache("shared")
+    else:
+        metrics.record_embedding_cache("miss")
+        task = asyncio.ensure_future(compute())
+        _in_flight[key] = task
+        task.add_done_callback(lambda done: _store(key, done))
+
+    # Shielded: a disconnecting client must not cancel the inference others wait for
+    return await asyncio.shield(task)
+
+
+def clear() -> None:
+    _results.clear()
+    _in_flight.clear()
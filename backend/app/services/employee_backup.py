@@ -0,0 +1,360 @@
+"""
+Portable backup of employees and their face templates.
+
+A backup is a stream of length-prefixed records, independent of the
+database and of Python's pickle format:
+
+    b"EBAK" + uint16 version (1)
+    per employee:
+        uint32 record length
+        uint16 length + JSON of the scalar fields (uuid, name, email, is_active,
+            expires_at, embedding_model/detector, next_embedding_model/detector)
+        uint16 dimensions + float32 values of `embedding` (0: none)
+        uint16 dimensions + float32 values of `next_embedding` (0: none)
+    uint32 0 (end of backup)
+
+All integers and floats are little-endian. Templates are stored as float32,
+which is far below the precision that matters for cosine distances.
+Enrollment photos and access logs are not part of the backup.
+
+Exports read the table in keyset-paginated batches and are streamed as they
+are produced. Imports are applied in batches, each in its own transaction:
+on PostgreSQL through COPY into a temporary table followed by a single
+INSERT ... ON CONFLICT, elsewhere with bulk INSERT/UPDATE statements.
+"""
+import io
+import json
+import pickle
+import struct
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Iterator, Literal
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, insert, text, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db.models import Employee
+from app.services.inference_client import decode_embedding, encode_embedding
+
+BACKUP_CONTENT_TYPE = "application/x-entry-employees"
+BACKUP_MAGIC = b"EBAK"
+BACKUP_VERSION = 1
+# Employees read or written per transaction
+BACKUP_BATCH_SIZE = settings.backup_batch_size
+# Largest accepted record; a record with two 512-d templates is ~4.5 KB
+MAX_RECORD_BYTES = 1024 * 1024
+
+OnConflict = Literal["skip", "update"]
+
+_FILE_HEADER = struct.Struct("<4sH")
+_LENGTH = struct.Struct("<I")
+_SHORT = struct.Struct("<H")
+
+# Columns carried by a backup, in COPY order
+COLUMNS = (
+    "uuid", "name", "email", "is_active", "expires_at",
+    "embedding", "embedding_model", "embedding_detector",
+    "next_embedding", "next_embedding_model", "next_embedding_detector",
+)
+_TEMPLATES = ("embedding", "next_embedding")
+
+
+def _pack_template(values) -> bytes:
+    if values is None or len(values) == 0:
+        return _SHORT.pack(0)
+    return _SHORT.pack(len(values)) + encode_embedding(values)
+
+
+def encode_record(row: dict) -> bytes:
+    """
+    Encodes one employee (a dict with the keys of COLUMNS) as a length-prefixed record.
+    """
+    meta = {key: row[key] for key in COLUMNS if key not in _TEMPLATES}
+    meta["uuid"] = str(row["uuid"])
+    meta["expires_at"] = row["expires_at"].isoformat() if row["expires_at"] else None
+    meta = json.dumps(meta, separators=(",", ":")).encode()
+
+    body = _SHORT.pack(len(meta)) + meta + _pack_template(row["embedding"]) + _pack_template(row["next_embedding"])
+    return _LENGTH.pack(len(body)) + body
+
+
+def decode_record(body: bytes) -> dict:
+    """
+    Decodes the body of a record produced by `encode_record`.
+
+    Raises:
+        ValueError: If the record is malformed.
+    """
+    try:
+        (meta_length,) = _SHORT.unpack_from(body)
+        offset = _SHORT.size + meta_length
+        row = json.loads(body[_SHORT.size:offset])
+
+        for key in _TEMPLATES:
+            (dimensions,) = _SHORT.unpack_from(body, offset)
+            offset += _SHORT.size
+            end = offset + 4 * dimensions
+            if end > len(body):
+                raise ValueError("template exceeds the record")
+            row[key] = decode_embedding(body[offset:end]) if dimensions else None
+            offset = end
+        if offset != len(body):
+            raise ValueError("trailing data in record")
+
+        row["uuid"] = uuid.UUID(row["uuid"])
+        row["expires_at"] = datetime.fromisoformat(row["expires_at"]) if row.get("expires_at") else None
+        if not row.get("name") or not row.get("email") or not isinstance(row.get("is_active"), bool):
+            raise ValueError("missing name, email or is_active")
+        return {key: row.get(key) for key in COLUMNS}
+    except (ValueError, struct.error, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid backup record: {e}") from e
+
+
+class RecordDecoder:
+    """
+    Incremental parser of a backup: bytes are fed in chunks of any size and
+    complete records are returned as soon as they are available.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._started = False
+        self.done = False
+
+    def feed(self, data: bytes) -> list[dict]:
+        """
+        Raises:
+            ValueError: If the data is not a backup or contains a malformed record.
+        """
+        self._buffer += data
+        if not self._started:
+            if len(self._buffer) < _FILE_HEADER.size:
+                return []
+            magic, version = _FILE_HEADER.unpack_from(self._buffer)
+            if magic != BACKUP_MAGIC or version != BACKUP_VERSION:
+                raise ValueError("Not a version 1 employee backup")
+            del self._buffer[:_FILE_HEADER.size]
+            self._started = True
+
+        records = []
+        while not self.done and len(self._buffer) >= _LENGTH.size:
+            (length,) = _LENGTH.unpack_from(self._buffer)
+            if length == 0:
+                self.done = True
+                del self._buffer[:_LENGTH.size]
+                break
+            if length > MAX_RECORD_BYTES:
+                raise ValueError(f"Backup record of {length} bytes exceeds the limit")
+            if len(self._buffer) < _LENGTH.size + length:
+                break
+            records.append(decode_record(bytes(self._buffer[_LENGTH.size:_LENGTH.size + length])))
+            del self._buffer[:_LENGTH.size + length]
+
+        if self.done and self._buffer:
+            raise ValueError("Data after the end of the backup")
+        return records
+
+    def close(self) -> None:
+        if not self.done:
+            raise ValueError("Backup is truncated")
+
+
+def iter_export(session_factory: sessionmaker, batch_size: int = BACKUP_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Produces a backup of all employees, one chunk per batch.
+
+    Each batch is read in its own short session, ordered by uuid, so the
+    export holds no connection between chunks and never loads the whole table.
+
+    Yields:
+        bytes: The file header, the records of each batch, then the end marker.
+    """
+    yield _FILE_HEADER.pack(BACKUP_MAGIC, BACKUP_VERSION)
+
+    columns = [getattr(Employee, key) for key in COLUMNS]
+    last = None
+    while True:
+        with session_factory() as db:
+            query = db.query(*columns).order_by(Employee.uuid)
+            if last is not None:
+                query = query.filter(Employee.uuid > last)
+            rows = [row._asdict() for row in query.limit(batch_size)]
+
+        if rows:
+            yield b"".join(encode_record(row) for row in rows)
+            last = rows[-1]["uuid"]
+        if len(rows) < batch_size:
+            break
+
+    yield _LENGTH.pack(0)
+
+
+def _copy_value(value) -> str:
+    """
+    Formats a value for COPY ... FROM STDIN in text format.
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, bytes):
+        return "\\\\x" + value.hex()
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _import_batch_copy(db: Session, rows: list[dict], on_conflict: OnConflict) -> dict:
+    db.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS employee_import (LIKE employees INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    ))
+
+    buffer = io.StringIO()
+    for row in rows:
+        values = [
+            pickle.dumps(row[key], pickle.HIGHEST_PROTOCOL) if key in _TEMPLATES and row[key] is not None else row[key]
+            for key in COLUMNS
+        ]
+        buffer.write("\t".join(_copy_value(value) for value in values) + "\n")
+    buffer.seek(0)
+
+    column_list = ", ".join(COLUMNS)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY employee_import ({column_list}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+    if on_conflict == "update":
+        assignments = [f"{key} = EXCLUDED.{key}" for key in COLUMNS[1:]] + ["version = employees.version + 1"]
+        conflict = "DO UPDATE SET " + ", ".join(assignments)
+    else:
+        conflict = "DO NOTHING"
+
+    # One row per uuid and per email; emails owned by another employee are skipped
+    applied = db.execute(text(f"""
+        INSERT INTO employees ({column_list})
+        SELECT {column_list} FROM (
+            SELECT DISTINCT ON (email) * FROM (SELECT DISTINCT ON (uuid) * FROM employee_import) AS by_uuid
+        ) AS staged
+        WHERE NOT EXISTS (
+            SELECT 1 FROM employees existing WHERE existing.email = staged.email AND existing.uuid <> staged.uuid
+        )
+        ON CONFLICT (uuid) {conflict}
+        RETURNING (xmax = 0) AS inserted
+    """)).all()
+    db.commit()
+
+    inserted = sum(1 for row in applied if row.inserted)
+    return {"inserted": inserted, "updated": len(applied) - inserted, "skipped": len(rows) - len(applied)}
+
+
+def _import_batch_orm(db: Session, rows: list[dict], on_conflict: OnConflict) -> dict:
+    existing = {
+        row.uuid for row in db.query(Employee.uuid).filter(Employee.uuid.in_([row["uuid"] for row in rows]))
+    }
+    email_owners = dict(
+        db.query(Employee.email, Employee.uuid).filter(Employee.email.in_([row["email"] for row in rows])).all()
+    )
+
+    new, changed, skipped = [], [], 0
+    for row in rows:
+        owner = email_owners.get(row["email"])
+        if owner is not None and owner != row["uuid"]:
+            skipped += 1
+        elif row["uuid"] in existing:
+            if on_conflict == "update":
+                changed.append(row)
+            else:
+                skipped += 1
+        else:
+            new.append(row)
+            existing.add(row["uuid"])
+            email_owners[row["email"]] = row["uuid"]
+
+    if new:
+        db.execute(insert(Employee), new)
+    if changed:
+        # A Core UPDATE, so each overwritten employee also gets a new version
+        table = Employee.__table__
+        statement = (
+            update(table)
+            .where(table.c.uuid == bindparam("b_uuid", type_=table.c.uuid.type))
+            .values({key: bindparam(f"b_{key}", type_=table.c[key].type) for key in COLUMNS[1:]})
+            .values(version=table.c.version + 1)
+        )
+        db.execute(statement, [{f"b_{key}": value for key, value in row.items()} for row in changed])
+    db.commit()
+    return {"inserted": len(new), "updated": len(changed), "skipped": skipped}
+
+
+def import_batch(session_factory: sessionmaker, rows: list[dict], on_conflict: OnConflict = "skip") -> dict:
+    """
+    Writes one batch of decoded records in a single transaction.
+
+    An employee already present (same uuid) is left alone or overwritten
+    depending on `on_conflict`. A record whose email belongs to another
+    employee is skipped either way.
+
+    Returns:
+        dict: Numbers of inserted, updated and skipped employees.
+    """
+    with session_factory() as db:
+        if db.get_bind().dialect.name == "postgresql":
+            return _import_batch_copy(db, rows, on_conflict)
+        return _import_batch_orm(db, rows, on_conflict)
+
+
+def _add(totals: dict, counts: dict) -> None:
+    for key, value in counts.items():
+        totals[key] += value
+
+
+def import_chunks(
+    chunks: Iterable[bytes], session_factory: sessionmaker, on_conflict: OnConflict = "skip",
+    batch_size: int = BACKUP_BATCH_SIZE,
+) -> dict:
+    """
+    Imports a backup read as chunks (e.g. blocks of a file).
+
+    Batches already written stay written if a later part of the backup is invalid.
+
+    Returns:
+        dict: Numbers of inserted, updated and skipped employees.
+
+    Raises:
+        ValueError: If the data is not a complete, well-formed backup.
+    """
+    decoder, batch, totals = RecordDecoder(), [], {"inserted": 0, "updated": 0, "skipped": 0}
+    for chunk in chunks:
+        for record in decoder.feed(chunk):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _add(totals, import_batch(session_factory, batch, on_conflict))
+                batch = []
+    decoder.close()
+    if batch:
+        _add(totals, import_batch(session_factory, batch, on_conflict))
+    return totals
+
+
+async def import_stream(
+    chunks: AsyncIterator[bytes], session_factory: sessionmaker, on_conflict: OnConflict = "skip",
+    batch_size: int = BACKUP_BATCH_SIZE,
+) -> dict:
+    """
+    Same as `import_chunks` for a request body; database work runs in the threadpool.
+    """
+    decoder, batch, totals = RecordDecoder(), [], {"inserted": 0, "updated": 0, "skipped": 0}
+    async for chunk in chunks:
+        for record in decoder.feed(chunk):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _add(totals, await run_in_threadpool(import_batch, session_factory, batch, on_conflict))
+                batch = []
+    decoder.close()
+    if batch:
+        _add(totals, await run_in_threadpool(import_batch, session_factory, batch, on_conflict))
+    return totals
@@ -0,0 +1,91 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session, load_only
+
+from app.db.models import Employee
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Columns of the admin listing; the pickled embeddings are never read for it
+LISTING_COLUMNS = (
+    Employee.uuid, Employee.name, Employee.email, Employee.is_active, Employee.expires_at, Employee.version
+)
+
+
+def encode_cursor(employee: Employee) -> str:
+    """
+    Encodes the sort key of the last listed employee as an opaque cursor.
+    """
+    raw = json.dumps([employee.name, str(employee.uuid)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, uuid.UUID]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        name, uid = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(name), uuid.UUID(uid)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def list_employees(
+    db: Session,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    search: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    expiring_within_days: Optional[int] = None,
+) -> Tuple[List[Employee], Optional[str]]:
+    """
+    Returns one page of employees ordered by name, and the cursor of the next page.
+
+    Keyset pagination on (name, uuid) keeps every page an index range scan,
+    whatever its position. The search is a case-insensitive prefix match on
+    name or email, served by the lower() expression indexes.
+
+    Args:
+        db (Session): Database session.
+        limit (int): Page size.
+        cursor (str, optional): Cursor returned with the previous page.
+        search (str, optional): Prefix of the name or email.
+        is_active (bool, optional): Only active (True) or inactive (False) accounts.
+        expiring_within_days (int, optional): Only accounts expiring in the next N days.
+
+    Returns:
+        tuple: The employees of the page, and the next cursor (None on the last page).
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    query = db.query(Employee).options(load_only(*LISTING_COLUMNS))
+
+    if search:
+        prefix = search.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        query = query.filter(
+            func.lower(Employee.name).like(prefix, escape="\\") | func.lower(Employee.email).like(prefix, escape="\\")
+        )
+    if is_active is not None:
+        query = query.filter(Employee.is_active == is_active)
+    if expiring_within_days is not None:
+        now = datetime.now()
+        query = query.filter(Employee.expires_at >= now, Employee.expires_at < now + timedelta(days=expiring_within_days))
+    if cursor:
+        query = query.filter(tuple_(Employee.name, Employee.uuid) > decode_cursor(cursor))
+
+    # One extra row tells whether another page follows
+    rows = query.order_by(Employee.name, Employee.uuid).limit(limit + 1).all()
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+    return page, next_cursor
@@ -0,0 +1,154 @@
+import logging
+import uuid
+from typing import Iterable, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import EnrollmentPhoto
+from app.services.blob_store import get_blob_store
+from app.services.image_ingest import decode_image, image_size, sniff_image_type
+
+logger = logging.getLogger("uvicorn")
+
+# Longest side of the normalized thumbnail shown in the dashboard
+THUMBNAIL_MAX_SIDE = settings.thumbnail_max_side
+
+CONTENT_TYPES = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp", "bmp": "image/bmp"}
+
+
+def make_thumbnail(data: bytes, max_side: int = THUMBNAIL_MAX_SIDE) -> Optional[bytes]:
+    """
+    Renders a JPEG thumbnail of at most `max_side` pixels. Returns None for undecodable data.
+    """
+    import cv2
+
+    try:
+        img = decode_image(data, max_side=max_side)
+    except ValueError:
+        return None
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return encoded.tobytes() if ok else None
+
+
+def store_enrollment_photo(db: Session, employee_id: uuid.UUID, data: bytes) -> EnrollmentPhoto:
+    """
+    Stores an enrollment photo and its thumbnail and records them for the employee.
+
+    Bytes go to the blob store under their SHA-256, so identical uploads share
+    one copy. The thumbnail is rendered only the first time a photo is seen;
+    later uploads of the same image reuse it. The row is added to the session
+    and committed by the caller together with the employee change; if that
+    commit fails, the caller removes the new blobs with `delete_unreferenced`.
+
+    Args:
+        db (Session): Database session.
+        employee_id (uuid.UUID): Owner of the photo.
+        data (bytes): The validated image.
+
+    Returns:
+        EnrollmentPhoto: The new (or already recorded) photo row.
+    """
+    store = get_blob_store()
+    digest = store.put(data)
+
+    existing = (
+        db.query(EnrollmentPhoto)
+        .filter(EnrollmentPhoto.employee_id == employee_id, EnrollmentPhoto.sha256 == digest)
+        .first()
+    )
+    if existing is not None:
+        return existing
+
+    thumbnail_digest = (
+        db.query(EnrollmentPhoto.thumbnail_sha256)
+        .filter(EnrollmentPhoto.sha256 == digest, EnrollmentPhoto.thumbnail_sha256.isnot(None))
+        .limit(1)
+        .scalar()
+    )
+    if thumbnail_digest is None:
+        thumbnail = make_thumbnail(data)
+        thumbnail_digest = store.put(thumbnail) if thumbnail else None
+
+    kind = sniff_image_type(data)
+    width, height = image_size(data, kind) or (None, None)
+    photo = EnrollmentPhoto(
+        employee_id=employee_id,
+        sha256=digest,
+        thumbnail_sha256=thumbnail_digest,
+        content_type=CONTENT_TYPES.get(kind, "application/octet-stream"),
+        size_bytes=len(data),
+        width=width,
+        height=height,
+    )
+    db.add(photo)
+    return photo
+
+
+def latest_photo_bytes(db: Session, employee_id: uuid.UUID) -> Optional[bytes]:
+    """
+    Returns the most recent enrollment photo of an employee, or None.
+    """
+    digest = (
+        db.query(EnrollmentPhoto.sha256)
+        .filter(EnrollmentPhoto.employee_id == employee_id)
+        .order_by(EnrollmentPhoto.created_at.desc(), EnrollmentPhoto.id.desc())
+        .limit(1)
+        .scalar()
+    )
+    return get_blob_store().get(digest) if digest else None
+
+
+def photo_digests(photos: Iterable[EnrollmentPhoto]) -> set[str]:
+    """
+    Returns the blob digests (photos and thumbnails) of photo rows.
+    """
+    return {digest for photo in photos for digest in (photo.sha256, photo.thumbnail_sha256) if digest}
+
+
+def remove_employee_photos(db: Session, employee_id: uuid.UUID) -> set[str]:
+    """
+    Deletes the photo rows of an employee in the current transaction.
+
+    Returns:
+        set[str]: Digests of their blobs, to pass to `delete_unreferenced`
+            once the transaction is committed.
+    """
+    photos = db.query(EnrollmentPhoto).filter(EnrollmentPhoto.employee_id == employee_id).all()
+    for photo in photos:
+        db.delete(photo)
+    return photo_digests(photos)
+
+
+def delete_unreferenced(db: Session, digests: Iterable[str]) -> int:
+    """
+    Deletes the blobs among `digests` that no enrollment photo refers to.
+
+    Blobs are shared between identical uploads, so a blob is only removed once
+    its last row is gone. Called after the commit that removed the rows, or
+    after the rollback of a transaction whose new rows never got stored.
+    A blob that cannot be deleted is logged and left behind.
+
+    Returns:
+        int: Number of deleted blobs.
+    """
+    digests = set(digests)
+    if not digests:
+        return 0
+
+    referenced = {
+        digest for row in db.query(EnrollmentPhoto.sha256, EnrollmentPhoto.thumbnail_sha256).filter(
+            or_(EnrollmentPhoto.sha256.in_(digests), EnrollmentPhoto.thumbnail_sha256.in_(digests))
+        )
+        for digest in row
+    }
+    store = get_blob_store()
+    deleted = 0
+    for digest in digests - referenced:
+        try:
+            store.delete(digest)
+            deleted += 1
+        except Exception as e:
+            logger.warning(f"Failed to delete blob {digest}: {e}")
+    return deleted
@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn")
+
+# Events buffered per subscriber before the oldest ones are dropped
+EVENT_BUFFER_SIZE = settings.event_buffer_size
+
+
+class Subscription:
+    """
+    A single consumer of the access event feed.
+
+    Events are kept in a bounded queue. When a slow client falls behind, the
+    oldest events are discarded (and counted in `dropped`) so that one stuck
+    dashboard can never grow memory or slow down the terminals.
+
+    Args:
+        buffer_size (int): Maximum number of undelivered events.
+        status (str, optional): Only deliver events with this status.
+        employee_id (str, optional): Only deliver events for this employee.
+    """
+
+    def __init__(self, buffer_size: int, status: Optional[str] = None, employee_id: Optional[str] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.loop = asyncio.get_running_loop()
+        self.status = status
+        self.employee_id = employee_id
+        self.dropped = 0
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if self.status and event.get("status") != self.status:
+            return False
+        if self.employee_id and event.get("employee_id") != self.employee_id:
+            return False
+        return True
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Waits for the next event. Returns None if `timeout` elapses first.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class AccessEventBroadcaster:
+    """
+    In-process fan-out of access decisions to live dashboard subscribers
+    (and of notices to connected terminals).
+
+    `publish` never blocks: it is called on the hot path of `verify_access`
+    and only enqueues the event for every matching subscriber.
+    """
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, status: Optional[str] = None, employee_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(self.buffer_size, status=status, employee_id=employee_id)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+        if subscription.dropped:
+            logger.info(f"Event subscriber disconnected after dropping {subscription.dropped} events")
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = [s for s in self._subscribers if s.matches(event)]
+
+        for subscription in subscribers:
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+
+            if running_loop is subscription.loop:
+                subscription._put(event)
+            else:
+                # Published from a worker thread: hand over to the subscriber's loop
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription._put, event)
+                except RuntimeError:
+                    self.unsubscribe(subscription)
+
+
+access_events = AccessEventBroadcaster()
+# Notices pushed to terminals over their WebSocket (see terminal_routes.terminal_websocket).
+# Like the live feed, they reach the terminals connected to this worker process.
+terminal_notices = AccessEventBroadcaster()
+
+
+def employee_ref(employee_id) -> str:
+    """
+    Returns the identifier of an employee in terminal notices: the SHA-256 of its UUID.
+
+    The UUID itself is the QR credential and must not be broadcast; a terminal
+    hashes the QR codes it has cached to match a notice.
+    """
+    return hashlib.sha256(str(employee_id).encode()).hexdigest()
+
+
+def notify_revoked(employee_id, reason: str) -> None:
+    """
+    Tells connected terminals that an employee may no longer enter.
+
+    Args:
+        employee_id: UUID of the employee.
+        reason (str): "DEACTIVATED", "EXPIRED" or "DELETED".
+    """
+    terminal_notices.publish({"type": "revoked", "employee_ref": employee_ref(employee_id), "reason": reason})
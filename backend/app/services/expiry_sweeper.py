@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db.locks import exclusively
+from app.db.models import Employee
+from app.db.session import SessionLocal
+from app.services.event_broadcaster import notify_revoked
+from app.utils import send_expiry_reminder_email
+
+logger = logging.getLogger("uvicorn")
+
+EXPIRY_SWEEP_INTERVAL_SECONDS = settings.expiry_sweep_interval_seconds
+EXPIRY_SWEEP_BATCH_SIZE = settings.expiry_sweep_batch_size
+# Employees are reminded once, this many days before their access expires
+EXPIRY_REMINDER_DAYS = settings.expiry_reminder_days
+
+
+def deactivate_expired(db: Session, now: datetime, batch_size: int = EXPIRY_SWEEP_BATCH_SIZE) -> list[uuid.UUID]:
+    """
+    Deactivates one batch of active accounts whose expiry date has passed.
+
+    Candidates are read through the expires_at index, oldest expiry first, and
+    switched off in a single UPDATE.
+
+    Args:
+        db (Session): Database session.
+        now (datetime): Reference time.
+        batch_size (int): Maximum number of accounts deactivated.
+
+    Returns:
+        list[uuid.UUID]: The deactivated employees.
+    """
+    expired = [
+        row.uuid for row in db.query(Employee.uuid)
+        .filter(Employee.expires_at <= now, Employee.is_active.is_(True))
+        .order_by(Employee.expires_at)
+        .limit(batch_size)
+    ]
+    if expired:
+        db.execute(
+            update(Employee)
+            .where(Employee.uuid.in_(expired), Employee.is_active.is_(True))
+            .values(is_active=False, version=Employee.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return expired
+
+
+def due_reminders(
+    db: Session, now: datetime, days: int = EXPIRY_REMINDER_DAYS, batch_size: int = EXPIRY_SWEEP_BATCH_SIZE
+) -> list[tuple]:
+    """
+    Returns active accounts expiring within `days` that were not reminded of this expiry date yet.
+
+    Returns:
+        list[tuple]: (uuid, name, email, expires_at) rows.
+    """
+    return [
+        tuple(row) for row in db.query(Employee.uuid, Employee.name, Employee.email, Employee.expires_at)
+        .filter(
+            Employee.expires_at > now,
+            Employee.expires_at <= now + timedelta(days=days),
+            Employee.is_active.is_(True),
+            # A changed expiry date gets a new reminder
+            or_(Employee.expiry_reminder_sent_for.is_(None), Employee.expiry_reminder_sent_for != Employee.expires_at),
+        )
+        .order_by(Employee.expires_at)
+        .limit(batch_size)
+    ]
+
+
+def claim_reminder(db: Session, employee_id: uuid.UUID, expires_at: datetime) -> bool:
+    """
+    Marks a reminder as sent before it is sent, so that it goes out once.
+
+    The conditional UPDATE succeeds for one caller only; a concurrent sweep
+    (another worker) gets no row back and skips the reminder.
+
+    Returns:
+        bool: True if this caller claimed the reminder and should send it.
+    """
+    claimed = db.execute(
+        update(Employee)
+        .where(
+            Employee.uuid == employee_id,
+            Employee.expires_at == expires_at,
+            Employee.is_active.is_(True),
+            or_(Employee.expiry_reminder_sent_for.is_(None), Employee.expiry_reminder_sent_for != expires_at),
+        )
+        .values(expiry_reminder_sent_for=expires_at)
+        .returning(Employee.uuid)
+        .execution_options(synchronize_session=False)
+    ).first()
+    db.commit()
+    return claimed is not None
+
+
+def release_reminder(db: Session, employee_id: uuid.UUID, expires_at: datetime) -> None:
+    """
+    Gives back a claimed reminder that could not be sent, so the next sweep retries it.
+    """
+    db.execute(
+        update(Employee)
+        .where(Employee.uuid == employee_id, Employee.expiry_reminder_sent_for == expires_at)
+        .values(expiry_reminder_sent_for=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _in_session(session_factory: sessionmaker, fn, *args):
+    with session_factory() as db:
+        return fn(db, *args)
+
+
+async def sweep(session_factory: sessionmaker = SessionLocal, now: Optional[datetime] = None) -> dict:
+    """
+    Deactivates every expired account and sends the due expiry reminders.
+
+    Database work runs in the threadpool, one short transaction per batch.
+    Each reminder is claimed before it is sent; a failed email is logged,
+    released and retried on the next sweep.
+
+    Args:
+        session_factory (sessionmaker): Creates database sessions.
+        now (datetime, optional): Reference time, defaults to now.
+
+    Returns:
+        dict: Numbers of deactivated accounts and sent reminders.
+    """
+    now = now or datetime.now()
+    stats = {"deactivated": 0, "reminded": 0}
+
+    while True:
+        expired = await run_in_threadpool(_in_session, session_factory, deactivate_expired, now)
+        stats["deactivated"] += len(expired)
+        for employee_id in expired:
+            logger.info(f"Access of employee {employee_id} expired, account deactivated")
+            notify_revoked(employee_id, "EXPIRED")
+        if len(expired) < EXPIRY_SWEEP_BATCH_SIZE:
+            break
+
+    for employee_id, name, email, expires_at in await run_in_threadpool(_in_session, session_factory, due_reminders, now):
+        if not await run_in_threadpool(_in_session, session_factory, claim_reminder, employee_id, expires_at):
+            continue
+        try:
+            await send_expiry_reminder_email(email, name, expires_at)
+        except Exception as e:
+            logger.error(f"Failed to send expiry reminder to {email}: {e}")
+            await run_in_threadpool(_in_session, session_factory, release_reminder, employee_id, expires_at)
+            continue
+        stats["reminded"] += 1
+
+    return stats
+
+
+async def sweep_loop(session_factory: sessionmaker = SessionLocal, interval: float = EXPIRY_SWEEP_INTERVAL_SECONDS) -> None:
+    """
+    Runs the expiry sweep periodically for the lifetime of the application.
+
+    Every worker runs this loop; the advisory lock lets one of them sweep each round.
+    """
+    while True:
+        try:
+            async with exclusively(session_factory.kw["bind"], "expiry_sweeper.sweep") as acquired:
+                if acquired:
+                    stats = await sweep(session_factory)
+                    if any(stats.values()):
+                        logger.info(f"Expiry sweep: {stats}")
+        except Exception as e:
+            logger.error(f"Expiry sweep failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Hashable, Optional
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models import AccessLog, AccessLogStatus, Employee
+
+# How long the decision of a request is returned for retries carrying the same Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = settings.idempotency_ttl_seconds
+IDEMPOTENCY_MAX_SIZE = settings.idempotency_max_size
+
+# Decisions with the hash of the frame they were made for
+_results = TTLCache(maxsize=IDEMPOTENCY_MAX_SIZE, ttl=IDEMPOTENCY_TTL_SECONDS)
+# Requests currently being processed, awaited by duplicates arriving meanwhile
+_in_flight: dict[Hashable, tuple[Optional[str], asyncio.Task]] = {}
+# Key and frame hash of the request being processed, stamped on its access log by the log writer
+_current_key: ContextVar[Optional[str]] = ContextVar("idempotency_key", default=None)
+_current_frame_hash: ContextVar[Optional[str]] = ContextVar("idempotency_frame_hash", default=None)
+
+
+class IdempotencyConflict(Exception):
+    """
+    Raised when an Idempotency-Key is reused with a different frame.
+    """
+
+
+def frame_hash(photo: Optional[bytes]) -> Optional[str]:
+    """
+    Returns the SHA-256 hex digest of an uploaded frame (None for an unreadable one).
+    """
+    return None if photo is None else hashlib.sha256(photo).hexdigest()
+
+
+def current_key() -> Optional[str]:
+    """
+    Returns the Idempotency-Key of the request being processed, if it sent one.
+    """
+    return _current_key.get()
+
+
+def current_frame_hash() -> Optional[str]:
+    """
+    Returns the hash of the frame of the request being processed, if it sent an Idempotency-Key.
+    """
+    return _current_frame_hash.get()
+
+
+def _check_frame(stored: Optional[str], sent: Optional[str]) -> None:
+    if stored != sent:
+        raise IdempotencyConflict()
+
+
+def replay_from_log(db: Session, key: str, employee_uid: str, frame: Optional[str] = None) -> Optional[dict]:
+    """
+    Rebuilds the response of an earlier request from its access log.
+
+    Covers retries handled by another worker process, which cannot see this
+    process's result store. Logs of failed processing (SYS_ERR) are ignored
+    so that the retry is processed again.
+
+    Args:
+        db (Session): Database session.
+        key (str): The Idempotency-Key of the request.
+        employee_uid (str): The QR code the retry was sent with.
+        frame (str, optional): Hash of the frame the retry was sent with.
+
+    Returns:
+        dict: The original response, or None if no usable log exists.
+
+    Raises:
+        IdempotencyConflict: The logged request was sent with a different frame.
+    """
+    query = (
+        db.query(AccessLog.status, AccessLog.reason, AccessLog.frame_hash, Employee.name)
+        .outerjoin(Employee, AccessLog.employee_id == Employee.uuid)
+        .filter(
+            AccessLog.request_id == key,
+            # Bounds the lookup to the recent partitions
+            AccessLog.timestamp >= datetime.now() - timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+        )
+    )
+    try:
+        query = query.filter(AccessLog.employee_id == uuid.UUID(employee_uid))
+    except ValueError:
+        query = query.filter(AccessLog.employee_id.is_(None))
+
+    row = query.order_by(AccessLog.timestamp.desc()).first()
+    if row is None or (row.reason or "").startswith("SYS_ERR"):
+        return None
+    _check_frame(row.frame_hash, frame)
+    if row.status == AccessLogStatus.GRANTED:
+        return {"access": "GRANTED", "name": row.name, "message": f"Welcome, {row.name}"}
+    return {"access": "DENIED", "reason": row.reason}
+
+
+def _store(key: Hashable, frame: Optional[str], task: asyncio.Task) -> None:
+    _in_flight.pop(key, None)
+    if task.cancelled() or task.exception() is not None:
+        return
+
+    result = task.result()
+    # Failed processing is not a decision: a retry gets another chance
+    if result.get("reason") != "PROCESSING_ERROR":
+        _results.set(key, (frame, result))
+
+
+async def run_once(
+    key: str, employee_uid: str, frame: Optional[str], compute: Callable[[], Awaitable[dict]], db: Session
+) -> tuple[dict, bool]:
+    """
+    Processes an access-verify request at most once per Idempotency-Key.
+
+    A duplicate returns the stored decision without running detection or
+    writing another access log. Duplicates arriving while the first request
+    is still running wait for its result. Keys are scoped to the QR code, so
+    a reused key never returns another employee's decision, and a decision is
+    only replayed for the same frame: a key reused with another frame is a
+    client bug, not a retry, and is rejected.
+
+    Args:
+        key (str): The Idempotency-Key sent by the terminal.
+        employee_uid (str): The QR code of the request.
+        frame (str, optional): Hash of the uploaded frame (see `frame_hash`).
+        compute (Callable): Coroutine factory processing the request.
+        db (Session): Database session, used to find requests processed by other workers.
+
+    Returns:
+        tuple[dict, bool]: The response and whether it was replayed.
+
+    Raises:
+        IdempotencyConflict: The key was already used with a different frame.
+    """
+    scoped = (key, employee_uid)
+    stored = _results.get(scoped)
+    if stored is not None:
+        _check_frame(stored[0], frame)
+        metrics.record_idempotent_replay("memory")
+        return stored[1], True
+
+    running = _in_flight.get(scoped)
+    if running is not None and not running[1].done():
+        _check_frame(running[0], frame)
+        metrics.record_idempotent_replay("in_flight")
+        return await asyncio.shield(running[1]), True
+
+    result = replay_from_log(db, key, employee_uid, frame)
+    if result is not None:
+        metrics.record_idempotent_replay("log")
+        _results.set(scoped, (frame, result))
+        return result, True
+
+    # The task copies the current context, so its access log is stamped with the key and frame hash
+    key_token = _current_key.set(key)
+    frame_token = _current_frame_hash.set(frame)
+    try:
+        task = asyncio.ensure_future(compute())
+    finally:
+        _current_frame_hash.reset(frame_token)
+        _current_key.reset(key_token)
+    _in_flight[scoped] = (frame, task)
+    task.add_done_callback(lambda done: _store(scoped, frame, done))
+
+    # Shielded: a client giving up must not abort a decision its retry will ask for
+    return await asyncio.shield(task), False
+
+
+def clear() -> None:
+    _results.clear()
+    _in_flight.clear()
@@ -0,0 +1,221 @@
+import struct
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+
+# cv2 and numpy are imported on first decode, so processes that never decode stay light
+if TYPE_CHECKING:
+    import numpy as np
+
+# Largest accepted upload; a 1080p JPEG is ~0.5 MB, a full-size phone photo a few MB
+MAX_UPLOAD_BYTES = settings.max_upload_bytes
+# Longest image side handed to the face detector; larger images are downscaled
+DETECTOR_MAX_SIDE = settings.detector_max_side
+# Pixel count above which an image is refused without decoding (decompression bombs)
+MAX_IMAGE_PIXELS = settings.max_image_pixels
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Reduced decode flags by downscale factor (JPEG decodes these directly at lower resolution)
+_REDUCED_COLOR = {8: "IMREAD_REDUCED_COLOR_8", 4: "IMREAD_REDUCED_COLOR_4", 2: "IMREAD_REDUCED_COLOR_2"}
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Uncompressed uint8 BGR pixels of an aligned face, sent by terminals that crop
+# and align faces themselves: magic, height, width, channels, then the pixels
+RAW_IMAGE_MAGIC = b"RAW8"
+_RAW_HEADER = struct.Struct("<4s3H")
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+
+async def read_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Reads an upload in chunks, stopping as soon as it exceeds `max_bytes`.
+
+    Args:
+        file (UploadFile): The uploaded file.
+        max_bytes (int): Maximum accepted size.
+
+    Returns:
+        bytes: The file content.
+
+    Raises:
+        UploadTooLarge: If the upload is larger than `max_bytes`.
+    """
+    chunks, size = [], 0
+    while chunk := await file.read(READ_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class StreamReader:
+    """
+    Reads a request body from its chunk stream without buffering it to disk.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The body chunks, e.g. `Request.stream()`.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._buffer = b""
+
+    async def read_exactly(self, size: int) -> bytes:
+        """
+        Reads the next `size` bytes.
+
+        Raises:
+            ValueError: If the body ends first.
+        """
+        while len(self._buffer) < size:
+            chunk = await anext(self._chunks, None)
+            if chunk is None:
+                raise ValueError("Body ended unexpectedly")
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    async def read_rest(self, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+        """
+        Reads the remainder of the body, stopping as soon as it exceeds `max_bytes`.
+
+        Raises:
+            UploadTooLarge: If the remainder is larger than `max_bytes`.
+        """
+        chunks, size = [], 0
+        self._buffer, pending = b"", self._buffer
+        while pending is not None:
+            size += len(pending)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+            chunks.append(pending)
+            pending = await anext(self._chunks, None)
+        return b"".join(chunks)
+
+
+def encode_raw_image(pixels: "np.ndarray") -> bytes:
+    """
+    Packs a uint8 BGR image as a RAW8 payload, accepted wherever an encoded image is.
+    """
+    height, width, channels = pixels.shape
+    return _RAW_HEADER.pack(RAW_IMAGE_MAGIC, height, width, channels) + pixels.tobytes()
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """
+    Identifies the image format from its magic bytes. Returns None for anything else.
+    """
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data.startswith(b"BM"):
+        return "bmp"
+    if data.startswith(RAW_IMAGE_MAGIC):
+        return "raw"
+    return None
+
+
+def image_size(data: bytes, kind: str) -> Optional[tuple[int, int]]:
+    """
+    Reads (width, height) from the JPEG, PNG or RAW8 header without decoding pixels.
+    Returns None if the header cannot be parsed or the format is not supported.
+    """
+    try:
+        if kind == "raw":
+            _, height, width, _ = _RAW_HEADER.unpack_from(data)
+            return width, height
+
+        if kind == "png":
+            width, height = struct.unpack(">II", data[16:24])
+            return width, height
+
+        if kind == "jpeg":
+            offset = 2
+            while offset + 9 < len(data):
+                if data[offset] != 0xFF:
+                    return None
+                marker = data[offset + 1]
+                if marker == 0xFF:
+                    offset += 1
+                    continue
+                length = struct.unpack(">H", data[offset + 2:offset + 4])[0]
+                if marker in _JPEG_SOF_MARKERS:
+                    height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+                    return width, height
+                offset += 2 + length
+    except struct.error:
+        return None
+    return None
+
+
+def _reduction_factor(width: int, height: int, max_side: int) -> int:
+    longest = max(width, height)
+    for factor in (8, 4, 2):
+        if longest // factor >= max_side:
+            return factor
+    return 1
+
+
+def decode_image(data: bytes, max_side: int = DETECTOR_MAX_SIDE) -> "np.ndarray":
+    """
+    Validates and decodes an uploaded image at the resolution the detector needs.
+
+    JPEGs whose header shows they are much larger than `max_side` are decoded
+    directly at 1/2, 1/4 or 1/8 scale, skipping most of the decoding work.
+    Whatever remains above `max_side` is downscaled with area interpolation.
+
+    Args:
+        data (bytes): Raw uploaded bytes.
+        max_side (int): Maximum length of the longer side of the result.
+
+    Returns:
+        np.ndarray: BGR image.
+
+    RAW8 payloads are used as they are, without decoding.
+
+    Raises:
+        ValueError: "INVALID_IMAGE" if the data is not a decodable JPEG, PNG, WebP, BMP
+                    or well-formed RAW8 image, or exceeds MAX_IMAGE_PIXELS.
+    """
+    import cv2
+    import numpy as np
+
+    kind = sniff_image_type(data)
+    if kind is None:
+        raise ValueError("INVALID_IMAGE")
+
+    flags = cv2.IMREAD_COLOR
+    size = image_size(data, kind)
+    if size:
+        width, height = size
+        if width * height > MAX_IMAGE_PIXELS:
+            raise ValueError("INVALID_IMAGE")
+        if kind == "jpeg":
+            reduced = _REDUCED_COLOR.get(_reduction_factor(width, height, max_side))
+            flags = getattr(cv2, reduced) if reduced else cv2.IMREAD_COLOR
+
+    if kind == "raw":
+        _, height, width, channels = _RAW_HEADER.unpack_from(data)
+        if channels != 3 or len(data) != _RAW_HEADER.size + height * width * channels:
+            raise ValueError("INVALID_IMAGE")
+        img = np.frombuffer(data, np.uint8, offset=_RAW_HEADER.size).reshape(height, width, channels)
+    else:
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+        if img is None:
+            raise ValueError("INVALID_IMAGE")
+
+    height, width = img.shape[:2]
+    scale = max_side / max(width, height)
+    if scale < 1:
+        img = cv2.resize(img, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    return img
@@ -0,0 +1,162 @@
+import logging
+import sys
+from array import array
+from functools import lru_cache
+from typing import Optional
+
+from app.core.config import settings
+from app.services import biometric_service
+from app.services.biometric_service import DETECTOR_BACKEND, MODEL_NAME
+
+logger = logging.getLogger("uvicorn")
+
+# Base URL of the inference server (app/inference_server.py); empty runs inference in-process
+INFERENCE_URL = settings.inference_url
+INFERENCE_TIMEOUT_SECONDS = settings.inference_timeout_seconds
+# Kept-alive connections to the inference server per API process
+INFERENCE_POOL_SIZE = settings.inference_pool_size
+
+EMBEDDING_CONTENT_TYPE = "application/x-float32-le"
+
+
+class InferenceUnavailable(Exception):
+    """Raised when the inference server cannot be reached or fails."""
+
+
+def encode_embedding(embedding) -> bytes:
+    """
+    Packs an embedding as little-endian float32 (2 KB for 512 dimensions).
+    """
+    packed = array("f", embedding)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def decode_embedding(data: bytes) -> list:
+    """
+    Unpacks an embedding produced by `encode_embedding`.
+    """
+    packed = array("f")
+    packed.frombytes(data)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tolist()
+
+
+class LocalInferenceClient:
+    """
+    Runs inference in the calling process, with the model loaded in this worker.
+
+    Used when INFERENCE_URL is not set, in tests and on single-process setups.
+    """
+
+    def embed(self, file_bytes: bytes, model_name: str = MODEL_NAME, detector_backend: str = DETECTOR_BACKEND) -> Optional[list]:
+        return biometric_service.generate_face_embedding(file_bytes, model_name, detector_backend)
+
+    def health(self) -> dict:
+        return {"status": "ok", "transport": "local"}
+
+    def warm_up(self) -> None:
+        biometric_service.load_models()
+
+    def close(self) -> None:
+        pass
+
+
+class HttpInferenceClient:
+    """
+    Sends inference requests to the inference server.
+
+    The image travels as the raw request body and the embedding comes back as
+    raw float32, so neither side spends time on JSON or base64. Connections
+    are pooled and kept alive between requests.
+
+    Responses: 200 with the embedding, 204 if no face was found, 422 with
+    {"error": "MULTIPLE_FACES_DETECTED" | "INVALID_IMAGE"}.
+
+    Args:
+        base_url (str): Address of the inference server.
+        timeout (float): Per-request timeout in seconds.
+        pool_size (int): Maximum number of connections.
+        client (httpx.Client, optional): Preconfigured HTTP client (e.g. a test client).
+    """
+
+    def __init__(self, base_url: str, timeout: float = INFERENCE_TIMEOUT_SECONDS, pool_size: int = INFERENCE_POOL_SIZE, client=None):
+        if client is None:
+            import httpx
+
+            client = httpx.Client(
+                base_url=base_url,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+        self._client = client
+
+    def embed(self, file_bytes: bytes, model_name: str = MODEL_NAME, detector_backend: str = DETECTOR_BACKEND) -> Optional[list]:
+        """
+        Embeds an image on the inference server.
+
+        Returns:
+            list: The embedding, or None if no face was found.
+
+        Raises:
+            ValueError: "MULTIPLE_FACES_DETECTED" or "INVALID_IMAGE", as in biometric_service.
+            InferenceUnavailable: If the server is unreachable or fails.
+        """
+        import httpx
+
+        try:
+            response = self._client.post(
+                "/v1/embed",
+                content=file_bytes,
+                params={"model": model_name, "detector": detector_backend},
+                headers={"Content-Type": "application/octet-stream"},
+            )
+        except httpx.HTTPError as e:
+            raise InferenceUnavailable(f"Inference server unreachable: {e}") from e
+
+        if response.status_code == 200:
+            return decode_embedding(response.content)
+        if response.status_code == 204:
+            return None
+        if response.status_code == 422:
+            raise ValueError(response.json()["error"])
+        raise InferenceUnavailable(f"Inference server returned {response.status_code}")
+
+    def health(self) -> dict:
+        import httpx
+
+        try:
+            response = self._client.get("/health")
+        except httpx.HTTPError as e:
+            return {"status": "unreachable", "error": str(e)}
+        return response.json()
+
+    def warm_up(self) -> None:
+        health = self.health()
+        if health.get("status") != "ok":
+            logger.warning(f"Inference server not ready: {health}")
+
+    def close(self) -> None:
+        self._client.close()
+
+
+@lru_cache(maxsize=1)
+def get_inference_client():
+    """
+    Returns the inference client configured by INFERENCE_URL.
+    """
+    if INFERENCE_URL:
+        return HttpInferenceClient(INFERENCE_URL)
+    return LocalInferenceClient()
+
+
+def generate_face_embedding(file_bytes: bytes, model_name: str = MODEL_NAME, detector_backend: str = DETECTOR_BACKEND) -> Optional[list]:
+    """
+    Generates a facial embedding through the configured inference client.
+
+    Same contract as `biometric_service.generate_face_embedding`, plus
+    InferenceUnavailable when a remote inference server cannot be used.
+    """
+    return get_inference_client().embed(file_bytes, model_name, detector_backend)
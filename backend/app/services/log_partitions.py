@@ -0,0 +1,210 @@
+import asyncio
+import gzip
+import logging
+import os
+import re
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.locks import exclusively, lock_key
+
+logger = logging.getLogger("uvicorn")
+
+# Monthly partitions created ahead of time, so inserts never hit the default partition
+LOG_PARTITIONS_AHEAD = settings.log_partitions_ahead
+# Months of raw logs kept in the database, 0 disables archival
+LOG_RETENTION_MONTHS = settings.log_retention_months
+LOG_ARCHIVE_DIR = settings.log_archive_dir
+LOG_MAINTENANCE_INTERVAL_SECONDS = settings.log_maintenance_interval_seconds
+
+PARENT_TABLE = "access_logs"
+PARTITION_NAME = re.compile(r"^access_logs_y(\d{4})m(\d{2})$")
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def planned_partitions(today: date, months_ahead: int = LOG_PARTITIONS_AHEAD) -> list[tuple[str, date, date]]:
+    """
+    Returns (name, start, end) of the monthly partitions that should exist:
+    the current month and `months_ahead` following ones.
+    """
+    first = date(today.year, today.month, 1)
+    return [
+        (partition_name(start), start, _add_months(start, 1))
+        for start in (_add_months(first, offset) for offset in range(months_ahead + 1))
+    ]
+
+
+def expired_partitions(names: Iterable[str], today: date, retention_months: int = LOG_RETENTION_MONTHS) -> list[str]:
+    """
+    Returns the monthly partitions whose whole range is older than the retention period.
+    """
+    if retention_months <= 0:
+        return []
+
+    cutoff = _add_months(date(today.year, today.month, 1), -retention_months)
+    expired = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match and _add_months(date(int(match[1]), int(match[2]), 1), 1) <= cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+def is_partitioned(engine: Engine) -> bool:
+    """
+    Checks that access_logs was created as a partitioned table.
+
+    Databases created before partitioning was introduced keep a plain table
+    until they are migrated, in which case maintenance is skipped.
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+            {"table": PARENT_TABLE},
+        ).first() is not None
+
+
+def ensure_partitions(engine: Engine, today: Optional[date] = None) -> list[str]:
+    """
+    Creates the upcoming monthly partitions and the default partition.
+
+    Args:
+        engine (Engine): Database engine.
+        today (date, optional): Reference date, defaults to today.
+
+    Returns:
+        list[str]: Names of the partitions that should now exist.
+    """
+    planned = planned_partitions(today or date.today())
+
+    with engine.begin() as conn:
+        # Workers starting together wait for each other instead of racing on CREATE TABLE
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": lock_key("log_partitions.ensure")})
+        for name, start, end in planned:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+        # Catches rows outside the planned range (e.g. clock skew) instead of failing inserts
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {PARENT_TABLE}_default PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+    return [name for name, _, _ in planned]
+
+
+def list_partitions(engine: Engine) -> list[str]:
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = :table"
+        ), {"table": PARENT_TABLE}).all()
+    return [row[0] for row in rows]
+
+
+def archive_partition(engine: Engine, name: str, archive_dir: str = LOG_ARCHIVE_DIR) -> Path:
+    """
+    Exports a partition to a gzip-compressed CSV file, then detaches and drops it.
+
+    Everything happens in one transaction. The partition is locked against
+    writes, copied while still attached, and detached and dropped only once
+    the archive is synced to disk. A failure at any step rolls back and
+    leaves the partition attached, to be archived by the next run.
+
+    Args:
+        engine (Engine): Database engine.
+        name (str): Partition to archive (must match access_logs_yYYYYmMM).
+        archive_dir (str): Directory receiving the archive files.
+
+    Returns:
+        Path: Location of the written archive.
+    """
+    if not PARTITION_NAME.match(name):
+        raise ValueError(f"Not an access log partition: {name}")
+
+    target = Path(archive_dir) / f"{name}.csv.gz"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_suffix(".gz.partial")
+
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            # Past the retention period nothing should write to it; SHARE makes sure until the drop
+            cursor.execute(f"LOCK TABLE {name} IN SHARE MODE")
+            with gzip.open(partial, "wb") as archive:
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER true)", archive)
+
+            with open(partial, "rb") as archive:
+                os.fsync(archive.fileno())
+            partial.rename(target)
+
+            cursor.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+            cursor.execute(f"DROP TABLE {name}")
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    logger.info(f"Archived access log partition {name} to {target}")
+    return target
+
+
+def prepare_partitions(engine: Engine) -> None:
+    """
+    Creates the partitions of the current and upcoming months at startup, before
+    the first access is logged, instead of waiting for the maintenance loop.
+    """
+    if is_partitioned(engine):
+        ensure_partitions(engine)
+
+
+def run_maintenance(engine: Engine, today: Optional[date] = None) -> None:
+    """
+    Creates upcoming partitions and archives the ones past the retention period.
+    """
+    if not is_partitioned(engine):
+        logger.warning("access_logs is not partitioned, skipping partition maintenance")
+        return
+
+    today = today or date.today()
+    ensure_partitions(engine, today)
+
+    for name in expired_partitions(list_partitions(engine), today):
+        archive_partition(engine, name)
+
+
+async def maintenance_loop(engine: Engine, interval: float = LOG_MAINTENANCE_INTERVAL_SECONDS) -> None:
+    """
+    Runs partition maintenance periodically for the lifetime of the application.
+
+    The partitions the application needs right away are created at startup
+    (see `prepare_partitions`); this loop keeps them ahead and archives old
+    ones. Every worker runs it; the advisory lock lets one of them do each round.
+    """
+    while True:
+        try:
+            async with exclusively(engine, "log_partitions.maintenance") as acquired:
+                if acquired:
+                    await run_in_threadpool(run_maintenance, engine)
+        except Exception as e:
+            logger.error(f"Access log partition maintenance failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session, object_session, sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.db.models import Employee
+from app.services.biometric_service import generate_face_embedding
+
+logger = logging.getLogger("uvicorn")
+
+PHOTO_SUFFIXES = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+
+def photo_directory_loader(directory: str) -> Callable[[Employee], Optional[bytes]]:
+    """
+    Returns a loader reading enrollment photos named `<employee uuid>.<ext>` from a directory.
+    """
+    root = Path(directory)
+
+    def load(employee: Employee) -> Optional[bytes]:
+        for suffix in PHOTO_SUFFIXES:
+            path = root / f"{employee.uuid}{suffix}"
+            if path.is_file():
+                return path.read_bytes()
+        return None
+
+    return load
+
+
+def stored_photo_loader(employee: Employee) -> Optional[bytes]:
+    """
+    Loads the latest enrollment photo of an employee from the blob store.
+    """
+    from app.services.enrollment_photos import latest_photo_bytes
+
+    return latest_photo_bytes(object_session(employee), employee.uuid)
+
+
+def _embed(job: tuple[bytes, str, str]) -> Optional[list]:
+    photo, model_name, detector_backend = job
+    try:
+        return generate_face_embedding(photo, model_name, detector_backend)
+    except ValueError:
+        return None
+
+
+class _InlineExecutor:
+    def map(self, fn, iterable):
+        return map(fn, iterable)
+
+    def shutdown(self):
+        pass
+
+
+class ReembeddingJob:
+    """
+    Computes templates for a new model/detector from the enrollment photos,
+    in batches, into `Employee.next_embedding`.
+
+    Production keeps verifying against the current templates until the job is
+    complete and `promote` swaps them in. Progress is checkpointed after every
+    committed batch, so an interrupted run resumes where it stopped; the
+    checkpoint is removed once a run completes.
+
+    To share the machine with the terminals, inference runs in a small process
+    pool of its own, batches are rate-limited to `max_rate` photos per second,
+    and the job pauses while `is_busy()` reports load on the live inference path.
+
+    Args:
+        session_factory (sessionmaker): Creates database sessions.
+        model_name (str): Target recognition model.
+        detector_backend (str): Target face detector.
+        load_photo (Callable): Returns the enrollment photo of an employee, or None.
+        checkpoint_path (str): File recording the last processed employee.
+        batch_size (int): Employees per batch and transaction.
+        workers (int): Inference processes, 0 runs in the calling process.
+        max_rate (float): Maximum photos per second, 0 for no limit.
+        is_busy (Callable, optional): Returns True while the job should pause.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        model_name: str,
+        detector_backend: str,
+        load_photo: Callable[[Employee], Optional[bytes]],
+        checkpoint_path: str,
+        batch_size: int = 16,
+        workers: int = 1,
+        max_rate: float = 2.0,
+        is_busy: Optional[Callable[[], bool]] = None,
+        busy_poll_seconds: float = 5.0,
+    ):
+        self.session_factory = session_factory
+        self.model_name = model_name
+        self.detector_backend = detector_backend
+        self.load_photo = load_photo
+        self.checkpoint_path = Path(checkpoint_path)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.max_rate = max_rate
+        self.is_busy = is_busy or (lambda: False)
+        self.busy_poll_seconds = busy_poll_seconds
+
+    # --- Checkpoint ---
+
+    def load_checkpoint(self) -> Optional[uuid.UUID]:
+        try:
+            data = json.loads(self.checkpoint_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if (data.get("model"), data.get("detector")) != (self.model_name, self.detector_backend):
+            return None
+        return uuid.UUID(data["last_uuid"]) if data.get("last_uuid") else None
+
+    def save_checkpoint(self, last_uuid: uuid.UUID) -> None:
+        partial = self.checkpoint_path.with_suffix(".tmp")
+        partial.write_text(json.dumps({"model": self.model_name, "detector": self.detector_backend, "last_uuid": str(last_uuid)}))
+        os.replace(partial, self.checkpoint_path)
+
+    def clear_checkpoint(self) -> None:
+        self.checkpoint_path.unlink(missing_ok=True)
+
+    # --- Job ---
+
+    def _next_batch(self, db: Session, after: Optional[uuid.UUID]) -> list[Employee]:
+        query = db.query(Employee).filter(
+            Employee.embedding.isnot(None),
+            # Already produced by the target model: nothing to do
+            or_(
+                Employee.embedding_model.is_(None),
+                Employee.embedding_model != self.model_name,
+                Employee.embedding_detector != self.detector_backend,
+            ),
+            # Computed by an earlier run
+            or_(
+                Employee.next_embedding_model.is_(None),
+                Employee.next_embedding_model != self.model_name,
+                Employee.next_embedding_detector != self.detector_backend,
+            ),
+        )
+        if after is not None:
+            query = query.filter(Employee.uuid > after)
+        return query.order_by(Employee.uuid).limit(self.batch_size).all()
+
+    def _wait_until_idle(self) -> None:
+        while self.is_busy():
+            logger.info("Re-embedding paused: live inference is busy")
+            time.sleep(self.busy_poll_seconds)
+
+    def run(self, executor: Optional[Executor] = None) -> dict:
+        """
+        Processes all remaining employees.
+
+        Returns:
+            dict: Counts of re-embedded employees, missing photos and photos without a usable face.
+        """
+        stats = {"embedded": 0, "missing_photo": 0, "no_face": 0}
+        last = self.load_checkpoint()
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else _InlineExecutor()
+
+        try:
+            while True:
+                # Pause before opening a session, so no connection is held while waiting
+                self._wait_until_idle()
+                started = time.monotonic()
+
+                with self.session_factory() as db:
+                    batch = self._next_batch(db, last)
+                    if not batch:
+                        break
+
+                    photos = [(employee, self.load_photo(employee)) for employee in batch]
+                    with_photo = [(employee, photo) for employee, photo in photos if photo]
+                    batch_stats = {"embedded": 0, "missing_photo": len(photos) - len(with_photo), "no_face": 0}
+
+                    embeddings = list(executor.map(
+                        _embed, [(photo, self.model_name, self.detector_backend) for _, photo in with_photo]
+                    ))
+                    for (employee, _), embedding in zip(with_photo, embeddings):
+                        if embedding is None:
+                            batch_stats["no_face"] += 1
+                            continue
+                        employee.next_embedding = embedding
+                        employee.next_embedding_model = self.model_name
+                        employee.next_embedding_detector = self.detector_backend
+                        batch_stats["embedded"] += 1
+
+                    try:
+                        db.commit()
+                    except StaleDataError:
+                        # An admin edited (or deleted) an employee of the batch meanwhile:
+                        # the batch is read again, with the current photos
+                        db.rollback()
+                        logger.info("Re-embedding batch changed concurrently, retrying it")
+                        continue
+
+                    for key, value in batch_stats.items():
+                        stats[key] += value
+                    last = batch[-1].uuid
+                    self.save_checkpoint(last)
+
+                if self.max_rate > 0:
+                    time.sleep(max(0.0, len(batch) / self.max_rate - (time.monotonic() - started)))
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+        # A finished run starts over next time, so employees enrolled (or
+        # re-enrolled) meanwhile below the last UUID are not skipped
+        self.clear_checkpoint()
+        logger.info(f"Re-embedding for {self.model_name}/{self.detector_backend} finished: {stats}")
+        return stats
+
+    def promote(self) -> int:
+        """
+        Makes the computed templates current, in a single UPDATE.
+
+        Returns:
+            int: Number of employees switched to the target model.
+        """
+        with self.session_factory() as db:
+            result = db.execute(
+                update(Employee)
+                .where(and_(
+                    Employee.next_embedding.isnot(None),
+                    Employee.next_embedding_model == self.model_name,
+                    Employee.next_embedding_detector == self.detector_backend,
+                ))
+                .values(
+                    embedding=Employee.next_embedding,
+                    embedding_model=Employee.next_embedding_model,
+                    embedding_detector=Employee.next_embedding_detector,
+                    next_embedding=None,
+                    next_embedding_model=None,
+                    next_embedding_detector=None,
+                    version=Employee.version + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            return result.rowcount
@@ -0,0 +1,186 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from app.services import biometric_service
+from app.services.thresholds import FACE_MATCH_THRESHOLD
+
+# Outcomes of running a pipeline on one frame, mapped to the terminal's denial reasons
+OUTCOME_REASONS = {
+    "NO_FACE": "NO_FACE_DETECTED",
+    "MULTIPLE_FACES": "MULTIPLE_FACES",
+    "INVALID_IMAGE": "INVALID_IMAGE",
+    "ERROR": "PROCESSING_ERROR",
+}
+
+
+@dataclass(frozen=True)
+class Pipeline:
+    """
+    A detector/model/threshold combination to evaluate.
+
+    Parsed from "Model:detector[:threshold]", e.g. "ArcFace:yunet:0.55".
+    """
+    model_name: str = biometric_service.MODEL_NAME
+    detector_backend: str = biometric_service.DETECTOR_BACKEND
+    threshold: float = FACE_MATCH_THRESHOLD
+
+    @classmethod
+    def parse(cls, spec: str) -> "Pipeline":
+        parts = spec.split(":")
+        if len(parts) not in (2, 3):
+            raise ValueError(f"Expected Model:detector[:threshold], got {spec!r}")
+        threshold = float(parts[2]) if len(parts) == 3 else FACE_MATCH_THRESHOLD
+        return cls(parts[0], parts[1], threshold)
+
+    def __str__(self) -> str:
+        return f"{self.model_name}:{self.detector_backend}:{self.threshold}"
+
+
+def run_pipeline(frame: bytes, pipeline: Pipeline) -> Dict[str, Any]:
+    """
+    Computes the embedding of a frame with the given pipeline and times it.
+
+    Returns:
+        dict: outcome ("EMBEDDING", "NO_FACE", "MULTIPLE_FACES", "INVALID_IMAGE" or "ERROR"),
+              embedding (list or None) and seconds.
+    """
+    started = time.perf_counter()
+    try:
+        embedding = biometric_service.generate_face_embedding(frame, pipeline.model_name, pipeline.detector_backend)
+        outcome = "EMBEDDING" if embedding is not None else "NO_FACE"
+    except ValueError as e:
+        embedding = None
+        outcome = "MULTIPLE_FACES" if str(e) == "MULTIPLE_FACES_DETECTED" else "INVALID_IMAGE"
+    except Exception:
+        embedding = None
+        outcome = "ERROR"
+
+    return {"outcome": outcome, "embedding": embedding, "seconds": time.perf_counter() - started}
+
+
+def decide(result: Dict[str, Any], reference: Optional[list], threshold: float) -> Dict[str, Any]:
+    """
+    Turns a pipeline result into a terminal decision against a reference embedding.
+    """
+    if result["outcome"] != "EMBEDDING":
+        return {"access": "DENIED", "reason": OUTCOME_REASONS[result["outcome"]], "distance": None}
+    if reference is None:
+        return {"access": "UNKNOWN", "reason": "NO_REFERENCE", "distance": None}
+
+    is_match, distance = biometric_service.verify_face(reference, result["embedding"], threshold=threshold)
+    if is_match:
+        return {"access": "GRANTED", "reason": "SUCCESS", "distance": float(distance)}
+    return {"access": "DENIED", "reason": "FACE_MISMATCH", "distance": float(distance)}
+
+
+def _evaluate_file(job: tuple[str, Pipeline]) -> Dict[str, Any]:
+    path, pipeline = job
+    return run_pipeline(Path(path).read_bytes(), pipeline)
+
+
+def _latency_summary(seconds: list) -> Dict[str, float]:
+    import numpy as np
+
+    millis = np.asarray(seconds) * 1000 if seconds else np.zeros(1)
+    return {
+        "mean_ms": float(millis.mean()),
+        "p50_ms": float(np.percentile(millis, 50)),
+        "p95_ms": float(np.percentile(millis, 95)),
+    }
+
+
+def replay(
+    captures: Iterable[tuple[Path, Dict[str, Any]]],
+    baseline: Pipeline,
+    candidate: Pipeline,
+    references: Optional[Dict[str, Path]] = None,
+    workers: int = 2,
+    evaluate: Callable[[tuple[str, Pipeline]], Dict[str, Any]] = _evaluate_file,
+    max_examples: int = 50,
+) -> Dict[str, Any]:
+    """
+    Re-evaluates stored captures with a baseline and a candidate pipeline.
+
+    Both pipelines compare against references produced by themselves, since
+    embeddings of different models are not comparable. References are taken
+    from `references` (employee ID -> photo) or, failing that, from the
+    employee's earliest GRANTED capture, which is then left out of the evaluation.
+
+    Args:
+        captures (Iterable): (frame path, metadata) pairs from the capture store.
+        baseline (Pipeline): Usually the production pipeline.
+        candidate (Pipeline): The pipeline under consideration.
+        references (dict, optional): Reference photo per employee ID.
+        workers (int): Worker processes; 0 evaluates in the calling process.
+        evaluate (Callable): Frame evaluation function (must be picklable for workers).
+        max_examples (int): Disagreeing captures listed in the report.
+
+    Returns:
+        dict: Latency per pipeline and the decision disagreements.
+    """
+    captures = list(captures)
+    reference_paths = {str(k): Path(v) for k, v in (references or {}).items()}
+    for path, meta in captures:
+        employee_id = meta.get("employee_id")
+        if employee_id and employee_id not in reference_paths and meta.get("status") == "GRANTED":
+            reference_paths[employee_id] = path
+
+    evaluated = [(path, meta) for path, meta in captures if path not in reference_paths.values()]
+    reference_items = list(reference_paths.items())
+
+    jobs = [(str(path), pipeline) for pipeline in (baseline, candidate) for path, _ in evaluated]
+    jobs += [(str(path), pipeline) for pipeline in (baseline, candidate) for _, path in reference_items]
+
+    if workers > 0:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(evaluate, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        results = [evaluate(job) for job in jobs]
+
+    n = len(evaluated)
+    baseline_results, candidate_results = results[:n], results[n:2 * n]
+    reference_results = results[2 * n:]
+    refs = {
+        pipeline: {
+            employee_id: result["embedding"]
+            for (employee_id, _), result in zip(reference_items, reference_results[i * len(reference_items):(i + 1) * len(reference_items)])
+        }
+        for i, pipeline in enumerate((baseline, candidate))
+    }
+
+    confusion: Dict[str, int] = {}
+    disagreements = []
+    for (path, meta), base, cand in zip(evaluated, baseline_results, candidate_results):
+        employee_id = meta.get("employee_id")
+        base_decision = decide(base, refs[baseline].get(employee_id), baseline.threshold)
+        cand_decision = decide(cand, refs[candidate].get(employee_id), candidate.threshold)
+
+        key = f"{base_decision['access']}->{cand_decision['access']}"
+        confusion[key] = confusion.get(key, 0) + 1
+        if base_decision["access"] != cand_decision["access"] and len(disagreements) < max_examples:
+            disagreements.append({
+                "capture": str(path),
+                "employee_id": employee_id,
+                "recorded": meta.get("reason"),
+                "baseline": base_decision,
+                "candidate": cand_decision,
+            })
+
+    disagreeing = sum(count for key, count in confusion.items() if key.split("->")[0] != key.split("->")[1])
+    base_latency = _latency_summary([r["seconds"] for r in baseline_results])
+    cand_latency = _latency_summary([r["seconds"] for r in candidate_results])
+
+    return {
+        "captures": n,
+        "references": len(reference_items),
+        "baseline": {"pipeline": str(baseline), **base_latency},
+        "candidate": {"pipeline": str(candidate), **cand_latency},
+        "latency_delta_ms": {key: cand_latency[key] - base_latency[key] for key in base_latency},
+        "disagreements": disagreeing,
+        "disagreement_rate": disagreeing / n if n else 0.0,
+        "confusion": confusion,
+        "examples": disagreements,
+    }
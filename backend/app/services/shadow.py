@@ -0,0 +1,107 @@
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core import metrics
+from app.services import biometric_service
+from app.services.replay import Pipeline, decide, run_pipeline
+
+logger = logging.getLogger("uvicorn")
+
+# Candidate pipeline evaluated on live traffic, "Model:detector[:threshold]"; empty disables shadow mode
+SHADOW_PIPELINE = settings.shadow_pipeline
+SHADOW_SAMPLE_RATE = settings.shadow_sample_rate
+# Sampled frames waiting for the shadow worker; more are skipped
+SHADOW_MAX_PENDING = settings.shadow_max_pending
+
+
+class ShadowEvaluator:
+    """
+    Runs a candidate pipeline on a sample of live verifications, after the
+    production decision has been made, and records whether it agrees.
+
+    The candidate runs on its own single worker thread with a small pending
+    limit, so it can never delay or change a terminal decision. Decisions are
+    only compared when the candidate uses the model of the employee's template
+    (e.g. a detector swap), since embeddings are not comparable across models; otherwise
+    only the detection outcome and latency are recorded. Full comparisons of
+    model swaps are done offline with the replay runner.
+
+    Args:
+        candidate (Pipeline, optional): Pipeline to evaluate, None disables shadow mode.
+        sample_rate (float): Fraction of verifications evaluated.
+    """
+
+    def __init__(self, candidate: Optional[Pipeline], sample_rate: float = SHADOW_SAMPLE_RATE, max_pending: int = SHADOW_MAX_PENDING):
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow") if candidate else None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def maybe_evaluate(
+        self, frame: bytes, reference: Optional[list], production: Dict[str, Any], reference_model: Optional[str] = None
+    ) -> bool:
+        """
+        Schedules a shadow evaluation of the frame if it is sampled.
+
+        Args:
+            frame (bytes): The verified image.
+            reference (list, optional): The employee's stored embedding.
+            production (dict): The production decision ("access" and "reason").
+            reference_model (str, optional): Model that produced `reference`,
+                defaults to the production model.
+
+        Returns:
+            bool: True if an evaluation was scheduled.
+        """
+        if not self._executor or not frame or random.random() >= self.sample_rate:
+            return False
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                metrics.record_shadow("skipped")
+                return False
+            self._pending += 1
+
+        self._executor.submit(self._evaluate, frame, reference, production, reference_model or biometric_service.MODEL_NAME)
+        return True
+
+    def close(self) -> None:
+        """
+        Waits for the scheduled evaluations to finish (graceful shutdown).
+        """
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    def _evaluate(self, frame: bytes, reference: Optional[list], production: Dict[str, Any], reference_model: str) -> Optional[str]:
+        try:
+            result = run_pipeline(frame, self.candidate)
+            metrics.observe_shadow_latency(result["seconds"])
+
+            if self.candidate.model_name == reference_model:
+                candidate = decide(result, reference, self.candidate.threshold)
+                agreement = "agree" if candidate["access"] == production["access"] else "disagree"
+            else:
+                # Only the detection outcome is comparable across models
+                detected = result["outcome"] == "EMBEDDING"
+                candidate = {"access": None, "reason": result["outcome"]}
+                agreement = "agree" if detected == (production["reason"] in ("SUCCESS", "FACE_MISMATCH")) else "disagree"
+
+            metrics.record_shadow(agreement)
+            if agreement == "disagree":
+                logger.info(f"Shadow pipeline {self.candidate} disagrees: production {production}, candidate {candidate}")
+            return agreement
+        except Exception as e:
+            logger.error(f"Shadow evaluation failed: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+shadow_evaluator = ShadowEvaluator(Pipeline.parse(SHADOW_PIPELINE) if SHADOW_PIPELINE else None)
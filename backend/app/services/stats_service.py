@@ -0,0 +1,267 @@
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import AccessLog, AccessLogStatus, AccessStatsRollup
+
+# Sentinel values used in the rollup primary key
+ALL_EMPLOYEES = uuid.UUID(int=0)
+UNKNOWN_EMPLOYEE = uuid.UUID(int=1)
+ANY_REASON = "*"
+
+GRANULARITIES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Upper bound of buckets returned by one query, keeps every read O(1) in log volume
+MAX_BUCKETS = 24 * 31
+# Rows each ALL_EMPLOYEES counter is spread over (see AccessStatsRollup)
+STATS_ROLLUP_SHARDS = settings.stats_rollup_shards
+
+
+def truncate(timestamp: datetime, granularity: str) -> datetime:
+    """
+    Returns the start of the bucket that contains the timestamp.
+    """
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def normalize_reason(reason: Optional[str]) -> str:
+    """
+    Collapses free-form reasons (e.g. "SYS_ERR: <message>") into a bounded set of keys.
+    """
+    if not reason:
+        return "NONE"
+    if reason.startswith("SYS_ERR"):
+        return "SYS_ERR"
+    return reason
+
+
+def _insert(db: Session):
+    return sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+
+
+def _rollup_rows(
+    status: AccessLogStatus, reason: str, employee_id: Optional[uuid.UUID], timestamp: datetime,
+    count: int = 1, shard: int = 0,
+):
+    for granularity in GRANULARITIES:
+        bucket_start = truncate(timestamp, granularity)
+        yield {
+            "granularity": granularity, "bucket_start": bucket_start, "status": status,
+            "reason": reason, "employee_id": ALL_EMPLOYEES, "shard": shard, "count": count,
+        }
+        # One employee passes a gate at a time: these rows are not contended
+        yield {
+            "granularity": granularity, "bucket_start": bucket_start, "status": status,
+            "reason": ANY_REASON, "employee_id": employee_id or UNKNOWN_EMPLOYEE, "shard": 0, "count": count,
+        }
+
+
+def record_access(db: Session, log: AccessLog) -> None:
+    """
+    Increments the hourly and daily counters for a single access decision.
+
+    Runs in the caller's transaction as one multi-row upsert, so counters are
+    committed atomically with the log entry itself. The totals over all
+    employees go to a random shard, so concurrent decisions rarely wait for
+    each other's row locks until commit.
+
+    Args:
+        db (Session): Session of the request writing the log.
+        log (AccessLog): The log entry being stored (timestamp must be set).
+    """
+    shard = random.randrange(STATS_ROLLUP_SHARDS)
+    rows = list(_rollup_rows(log.status, normalize_reason(log.reason), log.employee_id, log.timestamp, shard=shard))
+
+    stmt = _insert(db)(AccessStatsRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "status", "reason", "employee_id", "shard"],
+        set_={"count": AccessStatsRollup.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+
+
+def materialize_rollups(db: Session, start: datetime, end: datetime) -> int:
+    """
+    Rebuilds the rollup rows for [start, end) from the raw access logs.
+
+    Used to backfill history created before the rollups existed, or to repair
+    counters after a manual data fix. Boundaries are aligned to whole days.
+
+    On PostgreSQL the rollup table is locked against writes first. Log writers
+    that already incremented a counter are waited for and counted in the
+    rebuild; those that come later wait until it commits and increment the
+    rebuilt rows. No decision is counted twice or lost. Terminals logging
+    meanwhile wait for the rebuild, so keep the period short.
+
+    Args:
+        db (Session): Database session.
+        start (datetime): Beginning of the period to rebuild.
+        end (datetime): End of the period to rebuild (exclusive).
+
+    Returns:
+        int: Number of access logs that were aggregated.
+    """
+    start = truncate(start, "day")
+    end = truncate(end - timedelta(microseconds=1), "day") + timedelta(days=1)
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Conflicts with the ROW EXCLUSIVE lock of every insert/update, until commit
+        db.execute(text(f"LOCK TABLE {AccessStatsRollup.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+
+    db.execute(
+        delete(AccessStatsRollup).where(
+            AccessStatsRollup.bucket_start >= start,
+            AccessStatsRollup.bucket_start < end,
+        )
+    )
+
+    # Aggregate to hourly groups in SQL, then derive every rollup row in Python
+    hour = func.date_trunc("hour", AccessLog.timestamp)
+    if db.get_bind().dialect.name == "sqlite":
+        hour = func.strftime("%Y-%m-%d %H:00:00", AccessLog.timestamp)
+
+    grouped = db.execute(
+        select(hour, AccessLog.status, AccessLog.reason, AccessLog.employee_id, func.count())
+        .where(AccessLog.timestamp >= start, AccessLog.timestamp < end)
+        .group_by(hour, AccessLog.status, AccessLog.reason, AccessLog.employee_id)
+    ).all()
+
+    totals: dict[tuple, int] = {}
+    processed = 0
+    for bucket, status, reason, employee_id, count in grouped:
+        if isinstance(bucket, str):
+            bucket = datetime.fromisoformat(bucket)
+        processed += count
+        for row in _rollup_rows(status, normalize_reason(reason), employee_id, bucket, count):
+            key = (row["granularity"], row["bucket_start"], row["status"], row["reason"], row["employee_id"])
+            totals[key] = totals.get(key, 0) + count
+
+    if totals:
+        # Rebuilt totals live in shard 0; later increments add to random shards
+        db.execute(
+            _insert(db)(AccessStatsRollup),
+            [
+                {
+                    "granularity": granularity, "bucket_start": bucket_start, "status": status,
+                    "reason": reason, "employee_id": employee_id, "shard": 0, "count": count,
+                }
+                for (granularity, bucket_start, status, reason, employee_id), count in totals.items()
+            ],
+        )
+
+    db.commit()
+    return processed
+
+
+def clamp_range(granularity: str, start: Optional[datetime], end: Optional[datetime]) -> tuple[datetime, datetime]:
+    """
+    Resolves the requested period, defaulting to the last 24 hours / 30 days,
+    and caps it at MAX_BUCKETS buckets.
+    """
+    step = GRANULARITIES[granularity]
+    end = end or datetime.now()
+    default_span = timedelta(hours=24) if granularity == "hour" else timedelta(days=30)
+    start = start or end - default_span
+    start = max(truncate(start, granularity), end - step * MAX_BUCKETS)
+    return start, end
+
+
+def get_timeseries(
+    db: Session,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    status: Optional[AccessLogStatus] = None,
+    employee_id: Optional[uuid.UUID] = None,
+) -> list[dict]:
+    """
+    Returns access counts per bucket and status for the period.
+
+    Without an employee the pre-aggregated ALL_EMPLOYEES rows are summed over
+    reasons, so the number of rows read depends only on the period length.
+    """
+    query = select(
+        AccessStatsRollup.bucket_start, AccessStatsRollup.status, func.sum(AccessStatsRollup.count)
+    ).where(
+        AccessStatsRollup.granularity == granularity,
+        AccessStatsRollup.bucket_start >= start,
+        AccessStatsRollup.bucket_start < end,
+    )
+    if employee_id:
+        query = query.where(AccessStatsRollup.employee_id == employee_id, AccessStatsRollup.reason == ANY_REASON)
+    else:
+        query = query.where(AccessStatsRollup.employee_id == ALL_EMPLOYEES)
+    if status:
+        query = query.where(AccessStatsRollup.status == status)
+
+    query = query.group_by(AccessStatsRollup.bucket_start, AccessStatsRollup.status).order_by(AccessStatsRollup.bucket_start)
+
+    return [
+        {"bucket_start": bucket_start, "status": row_status.value, "count": int(count)}
+        for bucket_start, row_status, count in db.execute(query).all()
+    ]
+
+
+def get_reason_breakdown(db: Session, start: datetime, end: datetime) -> list[dict]:
+    """
+    Returns access counts per (status, reason) for the period, based on daily rollups.
+    """
+    query = (
+        select(AccessStatsRollup.status, AccessStatsRollup.reason, func.sum(AccessStatsRollup.count))
+        .where(
+            AccessStatsRollup.granularity == "day",
+            AccessStatsRollup.bucket_start >= truncate(start, "day"),
+            AccessStatsRollup.bucket_start < end,
+            AccessStatsRollup.employee_id == ALL_EMPLOYEES,
+        )
+        .group_by(AccessStatsRollup.status, AccessStatsRollup.reason)
+        .order_by(func.sum(AccessStatsRollup.count).desc())
+    )
+
+    return [
+        {"status": row_status.value, "reason": reason, "count": int(count)}
+        for row_status, reason, count in db.execute(query).all()
+    ]
+
+
+def get_employee_counts(db: Session, start: datetime, end: datetime, limit: int = 50) -> list[dict]:
+    """
+    Returns per-employee counts by status for the period, busiest employees first.
+    """
+    total = func.sum(AccessStatsRollup.count)
+    granted = func.sum(AccessStatsRollup.count).filter(AccessStatsRollup.status == AccessLogStatus.GRANTED)
+
+    query = (
+        select(AccessStatsRollup.employee_id, total, granted)
+        .where(
+            AccessStatsRollup.granularity == "day",
+            AccessStatsRollup.bucket_start >= truncate(start, "day"),
+            AccessStatsRollup.bucket_start < end,
+            AccessStatsRollup.reason == ANY_REASON,
+            AccessStatsRollup.employee_id != ALL_EMPLOYEES,
+        )
+        .group_by(AccessStatsRollup.employee_id)
+        .order_by(total.desc())
+        .limit(limit)
+    )
+
+    return [
+        {
+            "employee_id": None if employee_id == UNKNOWN_EMPLOYEE else employee_id,
+            "total": int(count),
+            "granted": int(granted_count or 0),
+            "denied": int(count) - int(granted_count or 0),
+        }
+        for employee_id, count, granted_count in db.execute(query).all()
+    ]
@@ -0,0 +1,75 @@
+"""
+Binary upload format of terminal frames.
+
+A frame is a fixed 28-byte header, the terminal id, then the image:
+
+    offset  size  field
+    0       2     magic b"EF"
+    2       1     format version (1)
+    3       16    employee UUID from the QR code, raw bytes
+    19      8     crop box in the original camera frame: x, y, width, height
+                  (uint16 little-endian; all zero when the whole frame is sent)
+    27      1     length of the terminal id
+    28      n     terminal id, UTF-8
+    28 + n  ...   JPEG/PNG/WebP/BMP of the frame or face crop, or a RAW8 aligned
+                  face (see image_ingest.encode_raw_image)
+
+It is posted as the raw body of /api/terminal/access-verify/frame, which reads
+it straight from the request stream: no multipart parsing, no spooled file.
+"""
+import struct
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from app.services.image_ingest import StreamReader
+
+FRAME_CONTENT_TYPE = "application/x-entry-frame"
+FRAME_MAGIC = b"EF"
+FRAME_VERSION = 1
+
+_HEADER = struct.Struct("<2sB16s4HB")
+
+
+@dataclass(frozen=True)
+class FrameHeader:
+    employee_uid: str
+    terminal_id: str
+    # (x, y, width, height) of the sent crop within the camera frame
+    crop: Optional[tuple[int, int, int, int]] = None
+
+
+def encode_frame(employee_uid: str, image: bytes, terminal_id: str = "", crop: Optional[tuple] = None) -> bytes:
+    """
+    Builds a frame (used by terminals and tests).
+
+    Args:
+        employee_uid (str): The UUID decoded from the QR code.
+        image (bytes): Encoded image or RAW8 payload.
+        terminal_id (str): Identifier of the sending terminal, at most 255 bytes.
+        crop (tuple, optional): Crop box (x, y, width, height) of `image` in the camera frame.
+
+    Returns:
+        bytes: The frame.
+    """
+    terminal = terminal_id.encode()
+    header = _HEADER.pack(
+        FRAME_MAGIC, FRAME_VERSION, uuid.UUID(employee_uid).bytes, *(crop or (0, 0, 0, 0)), len(terminal)
+    )
+    return header + terminal + image
+
+
+async def read_frame_header(reader: StreamReader) -> FrameHeader:
+    """
+    Reads the header of a frame, leaving the image unread in `reader`.
+
+    Raises:
+        ValueError: If the body is not a frame of a supported version.
+    """
+    magic, version, uid, x, y, width, height, terminal_length = _HEADER.unpack(await reader.read_exactly(_HEADER.size))
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise ValueError("Not a version 1 frame")
+
+    terminal_id = (await reader.read_exactly(terminal_length)).decode(errors="replace")
+    crop = (x, y, width, height) if width and height else None
+    return FrameHeader(str(uuid.UUID(bytes=uid)), terminal_id, crop)
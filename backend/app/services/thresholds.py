@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn")
+
+# Cosine distance below which a face matches, used when no calibration file applies
+FACE_MATCH_THRESHOLD = settings.face_match_threshold
+# JSON file written by scripts/calibrate_thresholds.py, re-read when it changes
+FACE_THRESHOLDS_FILE = settings.face_thresholds_file
+# Model FACE_MATCH_THRESHOLD (and a calibration file without "model") applies to
+EMBEDDING_MODEL = settings.embedding_model
+
+# DeepFace's cosine distance thresholds, for templates of a model nothing was
+# calibrated for (e.g. the other template during a re-embedding)
+MODEL_DEFAULT_THRESHOLDS = {
+    "VGG-Face": 0.68,
+    "Facenet": 0.40,
+    "Facenet512": 0.30,
+    "OpenFace": 0.10,
+    "DeepFace": 0.23,
+    "DeepID": 0.015,
+    "ArcFace": 0.68,
+    "Dlib": 0.07,
+    "SFace": 0.593,
+    "GhostFaceNet": 0.65,
+}
+
+
+class ThresholdStore:
+    """
+    Global and per-employee match thresholds loaded from a calibration file.
+
+    The file has the form `{"model": "Facenet512", "global": 0.31,
+    "employees": {"<uuid>": 0.27}, "models": {"ArcFace": 0.6}, ...}`. The
+    global and per-employee thresholds only apply to distances of "model";
+    templates of other models use their "models" entry, or DeepFace's
+    threshold for that model. It is checked at most once per `check_interval`
+    seconds and reloaded only when its modification time changes, so lookups
+    stay a dictionary read. An unreadable file keeps the last good thresholds.
+
+    Args:
+        path (str): Calibration file, empty to always use `default`.
+        default (float): Threshold of `model` used without a calibration file.
+        model (str): Model `default` and files without "model" are calibrated for.
+    """
+
+    def __init__(
+        self, path: str = FACE_THRESHOLDS_FILE, default: float = FACE_MATCH_THRESHOLD, check_interval: float = 5.0,
+        model: str = EMBEDDING_MODEL,
+    ):
+        self.path = path
+        self.default = default
+        self.check_interval = check_interval
+        self.model = model
+        self._model = model
+        self._global = default
+        self._employees: dict[str, float] = {}
+        self._models: dict[str, float] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if not self.path or now - self._checked_at < self.check_interval:
+            return
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime == self._mtime:
+                    return
+                with open(self.path) as f:
+                    data = json.load(f)
+                self._model = str(data.get("model", self.model))
+                self._global = float(data.get("global", self.default))
+                self._employees = {str(k): float(v) for k, v in data.get("employees", {}).items()}
+                self._models = {str(k): float(v) for k, v in data.get("models", {}).items()}
+                self._mtime = mtime
+                logger.info(f"Loaded face match thresholds from {self.path} ({len(self._employees)} per-employee)")
+            except (OSError, ValueError, AttributeError) as e:
+                logger.error(f"Could not load face match thresholds from {self.path}: {e}")
+
+    def threshold_for(self, employee_id: Optional[uuid.UUID] = None, model_name: Optional[str] = None) -> float:
+        """
+        Returns the threshold for a distance between templates of `model_name`
+        (default: the calibrated model), for `employee_id` if given.
+        """
+        self._refresh()
+        if model_name is not None and model_name != self._model:
+            if model_name in self._models:
+                return self._models[model_name]
+            return MODEL_DEFAULT_THRESHOLDS.get(model_name, self.default)
+        if employee_id is not None:
+            return self._employees.get(str(employee_id), self._global)
+        return self._global
+
+
+def save_thresholds(
+    path: str, global_threshold: float, employees: dict, metadata: Optional[dict] = None,
+    model: str = EMBEDDING_MODEL, models: Optional[dict] = None,
+) -> None:
+    """
+    Atomically writes a calibration file read by ThresholdStore.
+
+    Args:
+        path (str): Destination file.
+        global_threshold (float): Threshold for employees without their own value.
+        employees (dict): Employee UUID (str) -> threshold.
+        metadata (dict, optional): Extra information stored alongside (e.g. FAR/FRR at the chosen points).
+        model (str): Model the distances were calibrated on.
+        models (dict, optional): Global thresholds of other models (name -> threshold).
+    """
+    data = {
+        "model": model,
+        "global": global_threshold,
+        "employees": employees,
+        **({"models": models} if models else {}),
+        **({"metadata": metadata} if metadata else {}),
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, suffix=".tmp") as f:
+        json.dump(data, f, indent=2)
+    os.replace(f.name, path)
+
+
+thresholds = ThresholdStore()
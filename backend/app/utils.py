@@ -1,10 +1,9 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from fastapi import UploadFile
-import qrcode
-from qrcode.image.styles.moduledrawers.pil import RoundedModuleDrawer
+from functools import lru_cache
 from io import BytesIO
-import os
+from datetime import datetime
 from dotenv import load_dotenv
+from app.core.config import settings
 from app.core.security import get_password_hash
 from app.db.session import SessionLocal
 from app.db import models
@@ -21,6 +20,10 @@ def generate_qr_code(data: str) -> BytesIO:
     Returns:
         str: A Base64 string representation of the generated PNG image.
     """
+    # Imported on first use: qrcode pulls in Pillow, which the app import does not need
+    import qrcode
+    from qrcode.image.styles.moduledrawers.pil import RoundedModuleDrawer
+
     qr=qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -38,17 +41,25 @@ def generate_qr_code(data: str) -> BytesIO:
 
     return img_byte_arr
 
-conf = ConnectionConfig(
-    MAIL_USERNAME = os.getenv("MAIL_USERNAME", ""),
-    MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", ""),
-    MAIL_FROM = os.getenv("MAIL_FROM"),
-    MAIL_PORT = int(os.getenv("MAIL_PORT", 587)),
-    MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com"),
-    MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "True"),
-    MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS", "False"),
-    USE_CREDENTIALS = os.getenv("USE_CREDENTIALS", "True"),
-    VALIDATE_CERTS = os.getenv("VALIDATE_CERTS", "True")
-)
+@lru_cache(maxsize=1)
+def get_mail_config():
+    """
+    Builds the SMTP configuration on first use; fastapi_mail (and its HTTP
+    stack) is only imported by processes that actually send mail.
+    """
+    from fastapi_mail import ConnectionConfig
+
+    return ConnectionConfig(
+        MAIL_USERNAME = settings.mail_username,
+        MAIL_PASSWORD = settings.mail_password,
+        MAIL_FROM = settings.mail_from,
+        MAIL_PORT = settings.mail_port,
+        MAIL_SERVER = settings.mail_server,
+        MAIL_STARTTLS = settings.mail_starttls,
+        MAIL_SSL_TLS = settings.mail_ssl_tls,
+        USE_CREDENTIALS = settings.use_credentials,
+        VALIDATE_CERTS = settings.validate_certs
+    )
 
 async def send_qr_code_via_email(email: str, qr_code_stream: BytesIO):
     """
@@ -66,6 +77,8 @@ async def send_qr_code_via_email(email: str, qr_code_stream: BytesIO):
         Configuration (SMTP server, ports, credentials) is loaded from
         environment variables.
     """
+    from fastapi_mail import FastMail, MessageSchema
+
     qr_code_file = UploadFile(file=qr_code_stream, filename="qrcode.png")
     message = MessageSchema(
         subject="Welcome to FaceOn Entry System - Your Access QR Code",
@@ -74,7 +87,30 @@ async def send_qr_code_via_email(email: str, qr_code_stream: BytesIO):
         subtype="html",
         attachments=[qr_code_file]
     )
-    fm = FastMail(conf)
+    fm = FastMail(get_mail_config())
+    await fm.send_message(message)
+
+async def send_expiry_reminder_email(email: str, name: str, expires_at: datetime):
+    """
+    Notifies an employee that their access is about to expire.
+
+    Args:
+        email (str): The employee's email address.
+        name (str): The employee's name.
+        expires_at (datetime): When the access expires.
+    """
+    from fastapi_mail import FastMail, MessageSchema
+
+    message = MessageSchema(
+        subject="FaceOn Entry System - Your access is about to expire",
+        recipients=[email],
+        body=(
+            f"Hello {name},<br><br>your access to the building expires on "
+            f"{expires_at.strftime('%Y-%m-%d %H:%M')}. Please contact your administrator to extend it."
+        ),
+        subtype="html",
+    )
+    fm = FastMail(get_mail_config())
     await fm.send_message(message)
 
 def create_default_admin():
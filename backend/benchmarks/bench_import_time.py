@@ -0,0 +1,99 @@
+"""
+Import-time benchmark of the API application.
+
+Imports `app.main` in fresh interpreters and reports the wall time, the peak
+RSS and which heavy libraries got loaded. Importing the app must not pull in
+the biometric stack: DeepFace, TensorFlow, scipy and OpenCV are imported on
+first use (or at startup, see BIOMETRIC_PRELOAD), so admin-only workers boot
+fast and small.
+
+Most of the import time is FastAPI, pydantic and SQLAlchemy themselves
+(about 0.6 s on a laptop, over 1 s on a small VM), which the application
+cannot reduce. The frameworks are therefore imported first and timed
+separately, and the gate applies to what the application adds on top:
+
+    python -m benchmarks.bench_import_time --runs 5 --max-app-seconds 0.5
+
+Exits with status 1 if a heavy module was imported, or the median exceeds
+--max-app-seconds (application only) or --max-seconds (total). Run from the
+`backend` directory.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("deepface", "tensorflow", "keras", "tf_keras", "scipy", "cv2", "numpy", "fastapi_mail")
+
+# Imported ahead of the application to time them separately
+FRAMEWORK_MODULES = ("fastapi", "fastapi.security", "pydantic_settings", "sqlalchemy.orm", "sqlalchemy.dialects.postgresql")
+
+_PROBE = """
+import importlib, json, resource, sys, time
+started = time.perf_counter()
+for module in %r:
+    importlib.import_module(module)
+frameworks_done = time.perf_counter()
+import app.main
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "app_seconds": time.perf_counter() - frameworks_done,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": sorted(m for m in %r if m in sys.modules),
+}))
+""" % (FRAMEWORK_MODULES, HEAVY_MODULES)
+
+
+def measure_import(env: dict = None) -> dict:
+    """
+    Imports the application once in a new interpreter.
+
+    Returns:
+        dict: "seconds" (total), "app_seconds" (after the frameworks), "max_rss_mb"
+            and the loaded "heavy_modules".
+    """
+    probe_env = {
+        "DATABASE_URL": "sqlite://",
+        "MAIL_FROM": "bench@example.com",
+        **os.environ,
+        **(env or {}),
+    }
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=backend_dir, env=probe_env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, help="Fail if the median total import time is above this")
+    parser.add_argument("--max-app-seconds", type=float,
+                        help="Fail if the median import time added by the application is above this")
+    args = parser.parse_args(argv)
+
+    runs = [measure_import() for _ in range(args.runs)]
+    median = statistics.median(run["seconds"] for run in runs)
+    app_median = statistics.median(run["app_seconds"] for run in runs)
+    heavy = sorted({module for run in runs for module in run["heavy_modules"]})
+
+    print(f"import app.main: median {median * 1000:.0f} ms over {args.runs} runs "
+          f"({app_median * 1000:.0f} ms after the frameworks), "
+          f"peak RSS {max(run['max_rss_mb'] for run in runs):.0f} MB")
+    if heavy:
+        print(f"FAIL: heavy modules imported: {', '.join(heavy)}")
+        return 1
+    if args.max_app_seconds is not None and app_median > args.max_app_seconds:
+        print(f"FAIL: median import time of the application above {args.max_app_seconds:.2f} s")
+        return 1
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"FAIL: median import time above {args.max_seconds:.2f} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Production server settings: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The application is imported and the schema created once in the master,
+before the workers are forked. The master stays free of TensorFlow, which
+does not survive a fork: each worker loads the recognition model in its own
+startup (BIOMETRIC_PRELOAD), or all of them share the inference server
+(INFERENCE_URL), which keeps a single copy of the weights.
+
+Background jobs (log partition maintenance, the expiry sweep) start in every
+worker, but a database advisory lock lets only one worker run each round.
+
+On SIGTERM, workers stop accepting connections, finish in-flight requests
+within `graceful_timeout`, then run the application shutdown, which drains
+the capture and shadow queues.
+
+Metrics are collected in prometheus_client's multiprocess mode: each worker
+writes to files in PROMETHEUS_MULTIPROC_DIR and /metrics adds them up.
+"""
+import gc
+import multiprocessing
+import os
+import sys
+
+from app.core.config import settings
+
+# Must be set before the application (and prometheus_client) is imported
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.prometheus_multiproc_dir)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+bind = settings.gunicorn_bind
+# Default: one worker per core
+workers = settings.web_concurrency or multiprocessing.cpu_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+
+preload_app = True
+
+# Seconds a worker may spend on one request (model warm-up included) before it is restarted
+timeout = settings.gunicorn_timeout
+graceful_timeout = settings.gunicorn_graceful_timeout
+keepalive = settings.gunicorn_keepalive
+
+accesslog = "-"
+errorlog = "-"
+loglevel = settings.gunicorn_log_level
+
+
+def on_starting(server):
+    """
+    Runs in the master at startup: drops the metric files of a previous run.
+    """
+    from app.core import metrics
+
+    metrics.prepare_multiprocess_dir(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+
+def child_exit(server, worker):
+    from app.core import metrics
+
+    metrics.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    """
+    Runs in the master once the application is imported, before any worker is forked.
+    """
+    from app.db.session import engine
+    from app.main import init_database
+
+    init_database()
+    # Connections opened in the master must not be shared with forked workers
+    engine.dispose()
+
+    if "tensorflow" in sys.modules:
+        server.log.warning("TensorFlow was imported in the master; workers may hang on their first inference")
+
+    # Moves everything loaded so far out of the garbage collector's reach, so
+    # collections in the workers do not touch (and copy) the shared pages
+    gc.freeze()
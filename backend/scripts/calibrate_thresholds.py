@@ -0,0 +1,146 @@
+"""
+Calibrates face match thresholds from labelled data and writes the file the
+verification path loads (`FACE_THRESHOLDS_FILE`).
+
+Sources (at least one):
+
+    # Stored access attempts: distances from access_logs.debug_distance, labels from a CSV
+    # with columns log_id,label where label is "genuine" or "impostor"
+    python -m scripts.calibrate_thresholds --labels labels.csv --output thresholds.json
+
+    # Labelled embeddings: an .npz with arrays "embeddings" (n x 512) and "labels" (n)
+    python -m scripts.calibrate_thresholds --embeddings enrollment.npz --output thresholds.json
+
+    # Labelled photos: DIR/<person>/<photo>.jpg, embedded with the production model
+    python -m scripts.calibrate_thresholds --photos photos/ --output thresholds.json
+
+Per-employee thresholds are only proposed from access log data (which knows
+the claimed employee) and only for employees with enough samples. Without
+--output, the report is printed and nothing is written. The file is marked as
+calibrated for EMBEDDING_MODEL; templates of other models keep their own
+thresholds.
+
+Run from the `backend` directory.
+"""
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from app.services import calibration
+from app.services.thresholds import save_thresholds
+
+PHOTO_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def load_labels(path: str) -> dict[int, bool]:
+    with open(path, newline="") as f:
+        return {int(row["log_id"]): row["label"].strip().lower() == "genuine" for row in csv.DictReader(f)}
+
+
+def load_log_distances(labels: dict[int, bool]) -> tuple[np.ndarray, np.ndarray, list]:
+    """
+    Reads the recorded distances of the labelled access attempts.
+
+    Returns:
+        tuple: distances, genuine flags, claimed employee IDs.
+    """
+    from app.db.models import AccessLog
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        rows = (
+            db.query(AccessLog.id, AccessLog.debug_distance, AccessLog.employee_id)
+            .filter(AccessLog.id.in_(list(labels)), AccessLog.debug_distance.isnot(None))
+            .all()
+        )
+
+    distances = np.array([row.debug_distance for row in rows], dtype=np.float64)
+    genuine = np.array([labels[row.id] for row in rows], dtype=bool)
+    return distances, genuine, [row.employee_id for row in rows]
+
+
+def load_photo_embeddings(directory: str) -> tuple[np.ndarray, list]:
+    from app.services.biometric_service import generate_face_embedding
+
+    embeddings, labels = [], []
+    for path in sorted(Path(directory).glob("*/*")):
+        if path.suffix.lower() not in PHOTO_SUFFIXES:
+            continue
+        try:
+            embedding = generate_face_embedding(path.read_bytes())
+        except ValueError as e:
+            print(f"skipping {path}: {e}", file=sys.stderr)
+            continue
+        if embedding is None:
+            print(f"skipping {path}: no face detected", file=sys.stderr)
+            continue
+        embeddings.append(embedding)
+        labels.append(path.parent.name)
+    return np.asarray(embeddings), labels
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", help="CSV of labelled access log IDs")
+    parser.add_argument("--embeddings", help=".npz with labelled embeddings")
+    parser.add_argument("--photos", help="Directory of labelled photos")
+    parser.add_argument("--target-far", type=float, default=0.001, help="Maximum false accept rate")
+    parser.add_argument("--min-samples", type=int, default=20, help="Genuine and impostor attempts needed per employee")
+    parser.add_argument("--max-delta", type=float, default=0.05, help="Maximum per-employee deviation from the global threshold")
+    parser.add_argument("--output", help="Thresholds file to write")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not (args.labels or args.embeddings or args.photos):
+        print("Provide --labels, --embeddings or --photos", file=sys.stderr)
+        return 2
+
+    genuine, impostor = [], []
+    log_distances = log_genuine = log_employees = None
+
+    if args.labels:
+        log_distances, log_genuine, log_employees = load_log_distances(load_labels(args.labels))
+        genuine.append(log_distances[log_genuine])
+        impostor.append(log_distances[~log_genuine])
+
+    labelled_sets = []
+    if args.embeddings:
+        data = np.load(args.embeddings, allow_pickle=False)
+        labelled_sets.append((data["embeddings"], data["labels"]))
+    if args.photos:
+        labelled_sets.append(load_photo_embeddings(args.photos))
+
+    for embeddings, labels in labelled_sets:
+        same, different = calibration.genuine_impostor_distances(embeddings, labels)
+        genuine.append(same)
+        impostor.append(different)
+
+    genuine, impostor = np.concatenate(genuine), np.concatenate(impostor)
+    if not len(genuine) or not len(impostor):
+        print("Need both genuine and impostor samples to calibrate", file=sys.stderr)
+        return 1
+
+    report = calibration.summarize(genuine, impostor, args.target_far)
+    employees = {}
+    if log_distances is not None:
+        employees = calibration.per_employee_thresholds(
+            log_distances, log_genuine, log_employees, report["threshold"],
+            args.target_far, min_samples=args.min_samples, max_delta=args.max_delta,
+        )
+
+    print(json.dumps({**report, "per_employee": len(employees)}, indent=2))
+
+    if args.output:
+        save_thresholds(args.output, report["threshold"], employees, metadata=report)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Exports employees with their face templates to a portable backup file, or
+imports one, directly against the database.
+
+    # Back up every employee
+    python -m scripts.employee_backup export employees.ebak
+
+    # Seed or migrate a site; existing employees are kept (or overwritten with --update)
+    python -m scripts.employee_backup import employees.ebak --update
+
+The file format is the one of GET /admin/employees/export and
+POST /admin/employees/import (see app/services/employee_backup.py), so files
+can be moved between the API and this script. Run from the `backend` directory.
+"""
+import argparse
+import sys
+
+from app.db.session import SessionLocal
+from app.services import employee_backup
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+def read_blocks(path: str):
+    with open(path, "rb") as f:
+        while block := f.read(READ_BLOCK_SIZE):
+            yield block
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("path", help="Backup file")
+    parser.add_argument("--update", action="store_true", help="On import, overwrite employees that already exist")
+    parser.add_argument("--batch-size", type=int, default=employee_backup.BACKUP_BATCH_SIZE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    if args.command == "export":
+        size = 0
+        with open(args.path, "wb") as f:
+            for chunk in employee_backup.iter_export(SessionLocal, batch_size=args.batch_size):
+                f.write(chunk)
+                size += len(chunk)
+        print(f"Wrote {size} bytes to {args.path}")
+        return 0
+
+    try:
+        counts = employee_backup.import_chunks(
+            read_blocks(args.path), SessionLocal, "update" if args.update else "skip", batch_size=args.batch_size
+        )
+    except ValueError as e:
+        print(f"Import stopped: {e}", file=sys.stderr)
+        return 1
+    print(counts)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
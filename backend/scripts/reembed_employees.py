@@ -0,0 +1,83 @@
+"""
+Re-computes employee templates with a new model/detector in the background,
+then promotes them once every employee is done.
+
+    # 1. Compute next_embedding for everyone from the stored enrollment photos (resumable, throttled)
+    python -m scripts.reembed_employees --model ArcFace --detector retinaface \
+        --workers 2 --rate 2 --metrics-url http://localhost:8000/metrics
+
+    # 2. Switch production: set EMBEDDING_MODEL/EMBEDDING_DETECTOR and restart.
+    #    Employees with a computed template are verified with it, the others
+    #    keep using their stored template and model (dual read).
+
+    # 3. Make the computed templates current
+    python -m scripts.reembed_employees --model ArcFace --detector retinaface --promote
+
+With --metrics-url, the job pauses while the backend reports more than
+--max-queue-depth requests waiting for inference. Run from the `backend` directory.
+"""
+import argparse
+import sys
+import urllib.request
+
+from app.db.session import SessionLocal
+from app.services.reembedding import ReembeddingJob, photo_directory_loader, stored_photo_loader
+
+
+def inference_busy_check(metrics_url: str, max_queue_depth: float):
+    """
+    Returns a callable reading entry_inference_queue_depth from the backend's /metrics.
+    """
+    def is_busy() -> bool:
+        try:
+            with urllib.request.urlopen(metrics_url, timeout=5) as response:
+                for line in response.read().decode().splitlines():
+                    if line.startswith("entry_inference_queue_depth "):
+                        return float(line.split()[1]) > max_queue_depth
+        except OSError:
+            # Backend unreachable: don't block the job on monitoring
+            return False
+        return False
+
+    return is_busy
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True, help="Target DeepFace model, e.g. ArcFace")
+    parser.add_argument("--detector", required=True, help="Target DeepFace detector, e.g. retinaface")
+    parser.add_argument("--photos", help="Directory of photos named <employee uuid>.<ext> (default: stored enrollment photos)")
+    parser.add_argument("--checkpoint", default="reembedding.checkpoint.json")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="Inference processes")
+    parser.add_argument("--rate", type=float, default=2.0, help="Maximum photos per second (0: unlimited)")
+    parser.add_argument("--metrics-url", help="Backend /metrics URL used to pause while terminals are busy")
+    parser.add_argument("--max-queue-depth", type=float, default=0, help="Inference queue depth tolerated before pausing")
+    parser.add_argument("--promote", action="store_true", help="Swap in the computed templates and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    job = ReembeddingJob(
+        SessionLocal,
+        args.model,
+        args.detector,
+        load_photo=photo_directory_loader(args.photos) if args.photos else stored_photo_loader,
+        checkpoint_path=args.checkpoint,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        max_rate=args.rate,
+        is_busy=inference_busy_check(args.metrics_url, args.max_queue_depth) if args.metrics_url else None,
+    )
+
+    if args.promote:
+        print(f"Promoted {job.promote()} templates to {args.model}/{args.detector}")
+        return 0
+
+    print(job.run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Replays stored verification captures through a baseline and a candidate
+pipeline and reports latency deltas and decision disagreements.
+
+    # Detector swap, 4 worker processes
+    python -m scripts.replay_captures --candidate Facenet512:yunet --workers 4
+
+    # Model swap with its own threshold and explicit reference photos (<employee uuid>.jpg)
+    python -m scripts.replay_captures --candidate ArcFace:retinaface:0.55 --references refs/ --output report.json
+
+Captures are recorded by the backend when CAPTURE_ENABLED=true (see
+app/services/capture_store.py). Run from the `backend` directory.
+"""
+import argparse
+import json
+import os
+import sys
+from itertools import islice
+from pathlib import Path
+
+from app.services.capture_store import CAPTURE_DIR, CaptureStore
+from app.services.replay import Pipeline, replay
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--captures", default=CAPTURE_DIR, help="Capture store directory")
+    parser.add_argument("--baseline", type=Pipeline.parse, default=Pipeline(), help="Model:detector[:threshold], default: production")
+    parser.add_argument("--candidate", type=Pipeline.parse, required=True, help="Model:detector[:threshold]")
+    parser.add_argument("--references", help="Directory of reference photos named <employee uuid>.<ext>")
+    parser.add_argument("--limit", type=int, help="Replay at most this many captures")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Worker processes")
+    parser.add_argument("--output", help="Write the full report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    captures = list(islice(CaptureStore(args.captures).iter_captures(), args.limit))
+    if not captures:
+        print(f"No captures found in {args.captures}", file=sys.stderr)
+        return 1
+
+    references = None
+    if args.references:
+        references = {path.stem: path for path in Path(args.references).iterdir() if path.is_file()}
+
+    report = replay(captures, args.baseline, args.candidate, references=references, workers=args.workers)
+
+    print(f"Replayed {report['captures']} captures ({report['references']} references)")
+    for side in ("baseline", "candidate"):
+        r = report[side]
+        print(f"  {side:<9} {r['pipeline']:<32} mean {r['mean_ms']:.1f} ms  p95 {r['p95_ms']:.1f} ms")
+    print(f"  latency delta p95 {report['latency_delta_ms']['p95_ms']:+.1f} ms")
+    print(f"  disagreements {report['disagreements']} ({report['disagreement_rate']:.2%})")
+    for key, count in sorted(report["confusion"].items()):
+        print(f"    {key:<22} {count}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,27 @@ import pytest
 from unittest.mock import patch, MagicMock
 import uuid
 
+from app.db.models import Employee
+
 def test_get_all_employees(client, mock_db_session, mock_employee):
     """Test for retrieving the list of employees."""
-    mock_db_session.query().all.return_value = [mock_employee]
+    listing = mock_db_session.query.return_value.options.return_value
+    listing.order_by.return_value.limit.return_value.all.return_value = [mock_employee]
 
     response = client.get("/admin/employees")
 
     assert response.status_code == 200
     assert len(response.json()) == 1
     assert response.json()[0]["email"] == mock_employee.email
+    assert "x-next-cursor" not in response.headers
+
+def test_get_all_employees_rejects_invalid_cursor(client):
+    """Test that a malformed listing cursor is rejected with 400."""
+    response = client.get("/admin/employees", params={"cursor": "not-a-cursor"})
 
-def test_update_employee_profile_with_photo(client, mock_db_session, mock_employee):
+    assert response.status_code == 400
+
+def test_update_employee_profile_with_photo(client, sqlite_db, mock_employee):
     """
     Test the successful update of an employee's profile including biometrics.
 
@@ -20,9 +30,10 @@ def test_update_employee_profile_with_photo(client, mock_db_session, mock_employ
     WHEN: A PUT request is sent to the administration update endpoint.
     THEN: The system should update the name, email, and generate a new embedding.
     """
-    # First call: find the employee to update
-    # Second call: check if the new email is already in use (should return None)
-    mock_db_session.query().filter().first.side_effect = [mock_employee, None]
+    uid = mock_employee.uuid
+    with sqlite_db() as db:
+        db.add(mock_employee)
+        db.commit()
 
     with patch("app.api.admin_routes.generate_face_embedding") as mock_emb, \
          patch("app.api.admin_routes.send_qr_code_via_email") as mock_email:
@@ -32,7 +43,7 @@ def test_update_employee_profile_with_photo(client, mock_db_session, mock_employ
         mock_email.return_value = None
 
         response = client.put(
-            f"/admin/employees/{mock_employee.uuid}",
+            f"/admin/employees/{uid}",
             data={"name": "New Name", "email": "new_email@test.com"},
             files={"photo": ("new_face.jpg", b"fake_image_bytes", "image/jpeg")}
         )
@@ -40,8 +51,10 @@ def test_update_employee_profile_with_photo(client, mock_db_session, mock_employ
     # Assertions to verify correct behavior
     assert response.status_code == 200
     assert response.json()["message"] == "Updated successfully"
-    assert mock_employee.name == "New Name"
-    assert mock_db_session.commit.called
+    with sqlite_db() as db:
+        employee = db.get(Employee, uid)
+        assert (employee.name, employee.email, employee.embedding) == ("New Name", "new_email@test.com", [0.9, 0.8, 0.7])
+    mock_email.assert_called_once()
 
 def test_delete_employee_success(client, mock_db_session, mock_employee):
     """Test for deleting an employee."""
@@ -0,0 +1,91 @@
+import asyncio
+import os
+
+import httpx
+
+from benchmarks import bench_access_verify
+from benchmarks.bench_access_verify import compare_to_baseline, parse_server_timing, summarize
+from app.core.timing import StageTimer, request_timer, timed
+
+
+def test_server_timing_round_trip():
+    """Test that stage timings survive the Server-Timing header round trip."""
+    timer = StageTimer()
+    timer.stages = {"embedding": 0.0425, "log": 0.003}
+
+    assert parse_server_timing(timer.server_timing()) == {"embedding": 42.5, "log": 3.0}
+    assert parse_server_timing(None) == {}
+
+
+def test_timed_is_noop_outside_request():
+    """Test that timed() only records stages inside a request timer."""
+    with timed("lookup"):
+        pass
+
+    with request_timer() as timer:
+        with timed("lookup"):
+            pass
+    assert list(timer.stages) == ["lookup"]
+
+
+def test_compare_to_baseline_flags_regressions():
+    """Test that slower latency and throughput beyond the tolerance are reported as regressions."""
+    baseline = {"scenarios": {"terminal": summarize([0.010] * 100, 1.0, 0, {})}}
+    slower = {"scenarios": {"terminal": summarize([0.013] * 100, 1.3, 0, {})}}
+    similar = {"scenarios": {"terminal": summarize([0.0105] * 100, 1.05, 0, {})}}
+
+    regressions = compare_to_baseline(slower, baseline, max_regression=0.10)
+    assert len(regressions) == 2
+    assert compare_to_baseline(similar, baseline, max_regression=0.10) == []
+
+
+def test_verify_access_reports_server_timing(client, mock_db_session, mock_employee):
+    """Test that access-verify reports the time of each stage in Server-Timing."""
+    from unittest.mock import patch
+
+    mock_db_session.query().filter().first.return_value = mock_employee
+    with patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1] * 512):
+        response = client.post(
+            "/api/terminal/access-verify",
+            data={"employee_uid": str(mock_employee.uuid)},
+            files={"file": ("face.jpg", b"fake", "image/jpeg")},
+        )
+
+    stages = parse_server_timing(response.headers.get("server-timing"))
+    assert {"lookup", "read", "embedding", "compare", "log"} <= set(stages)
+
+
+def test_app_import_does_not_load_biometric_stack():
+    """Test that importing the app does not import TensorFlow, DeepFace or OpenCV."""
+    from benchmarks.bench_import_time import measure_import
+
+    assert measure_import()["heavy_modules"] == []
+
+
+def test_undecided_terminal_answers_count_as_errors():
+    """Test that a 200 carrying PROCESSING_ERROR is reported as a failed request."""
+    answers = iter([{"access": "GRANTED"}, {"access": "DENIED", "reason": "FACE_MISMATCH"},
+                    {"access": "DENIED", "reason": "PROCESSING_ERROR"}, {"detail": "?"}])
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=next(answers)))
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await bench_access_verify.run_scenario(
+                client, lambda client, i: client.get("/"), 4, 1, bench_access_verify.decision_failed
+            )
+
+    assert asyncio.run(run())["errors"] == 2
+
+
+def test_in_process_benchmark_reaches_decisions(monkeypatch):
+    """Test that the stubbed in-process benchmark verifies without errors."""
+    monkeypatch.setenv("DATABASE_URL", os.environ["DATABASE_URL"])
+    args = bench_access_verify.parse_args([
+        "--scenarios", "terminal", "--requests", "6", "--concurrency", "2", "--warmup", "0",
+        "--employees", "2", "--stub-latency-ms", "0",
+    ])
+
+    report = asyncio.run(bench_access_verify.benchmark(args))["scenarios"]["terminal"]
+
+    assert (report["requests"], report["errors"]) == (6, 0)
+    assert "compare" in report["stages_ms"]
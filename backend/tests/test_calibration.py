@@ -0,0 +1,97 @@
+import json
+import os
+import uuid
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services import calibration
+from app.services.thresholds import ThresholdStore, save_thresholds
+
+
+def _embeddings(people=5, photos=4, noise=0.15):
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(people, 128))
+    embeddings = np.repeat(centers, photos, axis=0) + rng.normal(scale=noise, size=(people * photos, 128))
+    return embeddings, [f"person{i // photos}" for i in range(people * photos)]
+
+
+def test_genuine_impostor_split_counts_every_pair_once():
+    """Test that every pair of samples is counted once, as genuine or impostor."""
+    embeddings, labels = _embeddings()
+
+    genuine, impostor = calibration.genuine_impostor_distances(embeddings, labels)
+
+    assert len(genuine) == 5 * (4 * 3 // 2)
+    assert len(impostor) == (20 * 19 // 2) - len(genuine)
+    assert genuine.max() < impostor.min()
+
+
+def test_error_curve_and_operating_points():
+    """Test the FAR/FRR curve and the thresholds picked from it."""
+    genuine = np.array([0.05, 0.10, 0.15, 0.20, 0.40])
+    impostor = np.array([0.25, 0.50, 0.60, 0.70, 0.80])
+
+    curve = calibration.error_curve(genuine, impostor, thresholds=np.array([0.0, 0.21, 0.3, 0.45, 1.0]))
+    assert curve.far.tolist() == [0.0, 0.0, 0.2, 0.2, 1.0]
+    assert curve.frr.tolist() == [1.0, 0.2, 0.2, 0.0, 0.0]
+
+    threshold, far, frr = calibration.threshold_for_far(curve, target_far=0.0)
+    assert (threshold, far, frr) == (0.21, 0.0, 0.2)
+
+    eer, _ = calibration.equal_error_rate(calibration.error_curve(genuine, impostor))
+    assert eer == pytest.approx(0.2)
+
+
+def test_per_employee_thresholds_are_clamped_and_need_samples():
+    """Test that per-employee thresholds need enough samples and stay within bounds."""
+    rng = np.random.default_rng(1)
+    loose, sparse = uuid.uuid4(), uuid.uuid4()
+    distances = np.concatenate([rng.uniform(0.3, 0.4, 20), rng.uniform(0.8, 0.9, 20), [0.1, 0.9]])
+    genuine = np.array([True] * 20 + [False] * 20 + [True, False])
+    employees = [loose] * 40 + [sparse] * 2
+
+    result = calibration.per_employee_thresholds(distances, genuine, employees, 0.3, target_far=0.0, min_samples=20, max_delta=0.05)
+
+    assert result == {str(loose): 0.35}
+
+
+def test_threshold_store_reloads_changed_file(tmp_path):
+    """Test that the threshold store picks up a rewritten thresholds file."""
+    path = str(tmp_path / "thresholds.json")
+    employee = uuid.uuid4()
+    store = ThresholdStore(path, default=0.3, check_interval=0)
+
+    assert store.threshold_for(employee) == 0.3
+
+    save_thresholds(path, 0.32, {str(employee): 0.28}, model="Facenet512", models={"SFace": 0.55})
+    assert store.threshold_for(employee) == 0.28
+    assert store.threshold_for(uuid.uuid4()) == 0.32
+    # Thresholds of the calibrated model never apply to another model's distances
+    assert store.threshold_for(employee, "Facenet512") == 0.28
+    assert store.threshold_for(employee, "SFace") == 0.55
+    assert store.threshold_for(employee, "ArcFace") == 0.68
+
+    with open(path, "w") as f:
+        f.write("{broken")
+    os.utime(path, (1, 1))
+    assert store.threshold_for(employee) == 0.28
+
+
+def test_terminal_records_distance_and_uses_calibrated_threshold(client, mock_db_session, mock_employee):
+    """Test that the terminal logs the match distance and compares it to the calibrated threshold."""
+    mock_db_session.query().filter().first.return_value = mock_employee
+
+    with patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2, 0.3]), \
+         patch("app.api.terminal_routes.thresholds.threshold_for", return_value=0.0) as threshold_for:
+        response = client.post(
+            "/api/terminal/access-verify",
+            data={"employee_uid": str(mock_employee.uuid)},
+            files={"file": ("face.jpg", b"fake", "image/jpeg")},
+        )
+
+    assert response.json()["reason"] == "FACE_MISMATCH"
+    threshold_for.assert_called_once_with(mock_employee.uuid, "Facenet512")
+    log = mock_db_session.add.call_args.args[0]
+    assert log.debug_distance is not None and log.debug_distance < 1e-6
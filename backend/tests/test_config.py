@@ -0,0 +1,31 @@
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+
+
+def test_settings_are_read_from_the_environment(monkeypatch):
+    """Test that settings are read from environment variables."""
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("EMBEDDING_CACHE_MODE", "perceptual")
+    monkeypatch.setenv("CAPTURE_ENABLED", "true")
+
+    settings = Settings()
+
+    assert settings.db_pool_size == 20
+    assert settings.embedding_cache_mode == "perceptual"
+    assert settings.capture_enabled is True
+
+
+@pytest.mark.parametrize("name, value", [
+    ("EMBEDDING_CACHE_MODE", "fuzzy"),
+    ("DB_POOL_SIZE", "0"),
+    ("SHADOW_SAMPLE_RATE", "1.5"),
+    ("MAX_UPLOAD_BYTES", "lots"),
+])
+def test_invalid_settings_fail_validation(monkeypatch, name, value):
+    """Test that out-of-range settings fail at startup."""
+    monkeypatch.setenv(name, value)
+
+    with pytest.raises(ValidationError):
+        Settings()
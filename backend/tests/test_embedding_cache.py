@@ -0,0 +1,98 @@
+import asyncio
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+from app.services import embedding_cache
+
+
+def _post_capture(client, employee, photo=b"same-capture"):
+    return client.post(
+        "/api/terminal/access-verify",
+        data={"employee_uid": str(employee.uuid)},
+        files={"file": ("face.jpg", photo, "image/jpeg")},
+    )
+
+
+def test_retried_capture_costs_one_inference(client, mock_db_session, mock_employee):
+    """Test that re-sending the same capture is answered from the cache."""
+    mock_db_session.query().filter().first.return_value = mock_employee
+
+    with patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2, 0.3]) as mock_embed:
+        first = _post_capture(client, mock_employee)
+        retry = _post_capture(client, mock_employee)
+        other = _post_capture(client, mock_employee, photo=b"another-capture")
+
+    assert first.json()["access"] == retry.json()["access"] == "GRANTED"
+    assert other.json()["access"] == "GRANTED"
+    assert mock_embed.call_count == 2
+
+
+def test_no_face_and_multiple_faces_results_are_cached(client, mock_db_session, mock_employee):
+    """Test that no-face and multiple-faces outcomes are cached as well."""
+    mock_db_session.query().filter().first.return_value = mock_employee
+
+    with patch("app.api.terminal_routes.generate_face_embedding", side_effect=ValueError("MULTIPLE_FACES_DETECTED")) as mock_embed:
+        assert _post_capture(client, mock_employee).json()["reason"] == "MULTIPLE_FACES"
+        assert _post_capture(client, mock_employee).json()["reason"] == "MULTIPLE_FACES"
+    assert mock_embed.call_count == 1
+
+    with patch("app.api.terminal_routes.generate_face_embedding", return_value=None) as mock_embed:
+        assert _post_capture(client, mock_employee, b"empty-scene").json()["reason"] == "NO_FACE_DETECTED"
+        assert _post_capture(client, mock_employee, b"empty-scene").json()["reason"] == "NO_FACE_DETECTED"
+    assert mock_embed.call_count == 1
+
+
+def test_concurrent_double_submit_shares_one_computation():
+    """Test that concurrent identical captures share a single inference."""
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return [0.5]
+
+    async def run():
+        return await asyncio.gather(*(embedding_cache.get_or_compute(b"burst", compute) for _ in range(5)))
+
+    assert asyncio.run(run()) == [[0.5]] * 5
+    assert calls == 1
+
+
+def test_perceptual_key_matches_reencoded_frame():
+    """Test that the perceptual key matches a re-encoded copy of the same frame."""
+    rng = np.random.default_rng(0)
+    frame = cv2.GaussianBlur(rng.integers(0, 255, size=(480, 640, 3), dtype=np.uint8), (51, 51), 0)
+    high = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+    low = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+    different = cv2.imencode(".jpg", cv2.flip(frame, 1), [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+
+    assert embedding_cache.cache_key(high) != embedding_cache.cache_key(low)
+    assert embedding_cache._is_near(embedding_cache.cache_key(high, "perceptual"), embedding_cache.cache_key(low, "perceptual"))
+    assert not embedding_cache._is_near(embedding_cache.cache_key(high, "perceptual"), embedding_cache.cache_key(different, "perceptual"))
+    assert embedding_cache.cache_key(high, "off") is None
+
+
+def test_perceptual_matches_are_not_shared_between_employees():
+    """Test that a near-identical frame scanned for another QR code is embedded again."""
+    rng = np.random.default_rng(0)
+    frame = cv2.GaussianBlur(rng.integers(0, 255, size=(480, 640, 3), dtype=np.uint8), (51, 51), 0)
+    first = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+    second = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+    perceptual_key = embedding_cache.cache_key
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return [float(len(calls))]
+
+    async def run():
+        alice = await embedding_cache.get_or_compute(first, compute, variant="m", scope="alice")
+        retry = await embedding_cache.get_or_compute(second, compute, variant="m", scope="alice")
+        bob = await embedding_cache.get_or_compute(second, compute, variant="m", scope="bob")
+        return alice, retry, bob
+
+    with patch.object(embedding_cache, "cache_key",
+                      side_effect=lambda data, **kwargs: perceptual_key(data, "perceptual", **kwargs)):
+        assert asyncio.run(run()) == ([1.0], [1.0], [2.0])
@@ -0,0 +1,158 @@
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.db.models import Employee
+from app.db.session import get_session_factory
+from app.main import app
+from app.services import employee_backup
+
+
+@pytest.fixture
+def source(session_factory):
+    with session_factory() as db:
+        db.add_all([
+            Employee(uuid=uuid.uuid4(), name=f"Employee {i:02d}", email=f"e{i}@corp.pl", is_active=i % 2 == 0,
+                     expires_at=datetime(2027, 1, i + 1) if i % 3 else None,
+                     embedding=[i / 8, 0.5, -0.25] if i != 4 else None, embedding_model="Facenet512")
+            for i in range(5)
+        ])
+        db.add(Employee(uuid=uuid.uuid4(), name="Tab\tand\nnewline", email="odd@corp.pl", is_active=True,
+                        embedding=[1.0, 2.0], next_embedding=[3.0, 4.0, 5.0], next_embedding_model="ArcFace"))
+        db.commit()
+    return session_factory
+
+
+def _snapshot(factory):
+    with factory() as db:
+        return {
+            e.uuid: (e.name, e.email, e.is_active, e.expires_at, e.embedding, e.next_embedding, e.next_embedding_model)
+            for e in db.query(Employee)
+        }
+
+
+def test_export_import_round_trip_in_small_chunks(source, make_session_factory):
+    """Test that a backup fed in small chunks restores every employee unchanged."""
+    backup = b"".join(employee_backup.iter_export(source, batch_size=2))
+    target = make_session_factory()
+
+    # Feeding 7-byte pieces exercises records split across chunks
+    chunks = (backup[i:i + 7] for i in range(0, len(backup), 7))
+    assert employee_backup.import_chunks(chunks, target, batch_size=4) == {"inserted": 6, "updated": 0, "skipped": 0}
+    assert _snapshot(target) == _snapshot(source)
+
+
+def test_conflicts_are_skipped_or_updated(source, make_session_factory):
+    """Test that existing employees are kept or overwritten, and foreign emails skipped."""
+    backup = b"".join(employee_backup.iter_export(source))
+    target = make_session_factory()
+    employee_backup.import_chunks([backup], target)
+
+    with target() as db:
+        renamed = db.query(Employee).filter(Employee.email == "e1@corp.pl").one()
+        renamed.name = "Renamed"
+        # Another employee now owns an email of the backup
+        db.query(Employee).filter(Employee.email == "e2@corp.pl").delete()
+        db.add(Employee(uuid=uuid.uuid4(), name="Newcomer", email="e2@corp.pl", is_active=True))
+        db.commit()
+
+    assert employee_backup.import_chunks([backup], target) == {"inserted": 0, "updated": 0, "skipped": 6}
+    assert employee_backup.import_chunks([backup], target, "update") == {"inserted": 0, "updated": 5, "skipped": 1}
+    with target() as db:
+        assert db.query(Employee.name).filter(Employee.email == "e1@corp.pl").scalar() == "Employee 01"
+        assert db.query(Employee.name).filter(Employee.email == "e2@corp.pl").scalar() == "Newcomer"
+
+
+def test_truncated_or_foreign_data_is_rejected(source, make_session_factory):
+    """Test that truncated backups and other files are rejected."""
+    backup = b"".join(employee_backup.iter_export(source))
+
+    with pytest.raises(ValueError, match="truncated"):
+        employee_backup.import_chunks([backup[:-4]], make_session_factory())
+    with pytest.raises(ValueError, match="Not a version 1"):
+        employee_backup.import_chunks([b"name;email\n"], make_session_factory())
+
+
+def test_copy_values_are_escaped():
+    """Test the escaping of values in the COPY text format."""
+    assert employee_backup._copy_value(None) == "\\N"
+    assert employee_backup._copy_value(True) == "t"
+    assert employee_backup._copy_value(b"\x80\x04") == "\\\\x8004"
+    assert employee_backup._copy_value("a\tb\\c\n") == "a\\tb\\\\c\\n"
+
+
+def test_api_export_and_import(client, source, make_session_factory):
+    """Test the export and import endpoints end to end."""
+    target = make_session_factory()
+
+    app.dependency_overrides[get_session_factory] = lambda: source
+    exported = client.get("/admin/employees/export")
+    assert exported.headers["content-type"] == employee_backup.BACKUP_CONTENT_TYPE
+
+    app.dependency_overrides[get_session_factory] = lambda: target
+    imported = client.post("/admin/employees/import", content=exported.content)
+    assert imported.json() == {"inserted": 6, "updated": 0, "skipped": 0}
+    assert _snapshot(target) == _snapshot(source)
+
+    assert client.post("/admin/employees/import", content=b"garbage!").status_code == 400
+
+
+@pytest.mark.parametrize("on_conflict, clause", [
+    ("skip", "ON CONFLICT (uuid) DO NOTHING"),
+    ("update", "ON CONFLICT (uuid) DO UPDATE SET name = EXCLUDED.name, email = EXCLUDED.email"),
+])
+def test_postgres_batches_are_copied_into_a_temp_table_and_merged(on_conflict, clause):
+    """Test the statements of the PostgreSQL import: temp table, COPY of the batch, one merging INSERT."""
+    rows = [
+        dict.fromkeys(employee_backup.COLUMNS) | {"uuid": uuid.uuid4(), "name": f"E{i}", "email": f"e{i}@corp.pl",
+                                                  "is_active": True, "embedding": [0.5]}
+        for i in range(3)
+    ]
+    db = MagicMock()
+    cursor = db.connection().connection.cursor()
+    copied = []
+    cursor.copy_expert.side_effect = lambda sql, buffer: copied.append((sql, buffer.read()))
+    db.execute.return_value.all.return_value = [SimpleNamespace(inserted=True), SimpleNamespace(inserted=False)]
+
+    counts = employee_backup._import_batch_copy(db, rows, on_conflict)
+
+    create, merge = (" ".join(str(call.args[0]).split()) for call in db.execute.call_args_list)
+    [(copy, data)] = copied
+    assert create.startswith("CREATE TEMP TABLE IF NOT EXISTS employee_import (LIKE employees")
+    assert copy == f"COPY employee_import ({', '.join(employee_backup.COLUMNS)}) FROM STDIN"
+    assert [line.split("\t")[:3] for line in data.splitlines()] == [
+        [str(row["uuid"]), row["name"], row["email"]] for row in rows
+    ]
+    assert merge.startswith(f"INSERT INTO employees ({', '.join(employee_backup.COLUMNS)}) SELECT")
+    assert clause in merge
+    assert merge.endswith("RETURNING (xmax = 0) AS inserted")
+    if on_conflict == "update":
+        assert "version = employees.version + 1" in merge
+    assert counts == {"inserted": 1, "updated": 1, "skipped": 1}
+    cursor.close.assert_called()
+    db.commit.assert_called_once()
+
+
+@pytest.mark.postgres
+def test_postgres_import_round_trip_and_conflicts(source, postgres_session_factory):
+    """Test the COPY import on PostgreSQL: restored rows, skipped and updated conflicts, foreign emails."""
+    backup = b"".join(employee_backup.iter_export(source))
+    target = postgres_session_factory
+
+    assert employee_backup.import_chunks([backup], target, batch_size=4) == {"inserted": 6, "updated": 0, "skipped": 0}
+    assert _snapshot(target) == _snapshot(source)
+
+    with target() as db:
+        db.query(Employee).filter(Employee.email == "e1@corp.pl").update({"name": "Renamed"})
+        db.query(Employee).filter(Employee.email == "e2@corp.pl").delete()
+        db.add(Employee(uuid=uuid.uuid4(), name="Newcomer", email="e2@corp.pl", is_active=True))
+        db.commit()
+
+    assert employee_backup.import_chunks([backup], target) == {"inserted": 0, "updated": 0, "skipped": 6}
+    assert employee_backup.import_chunks([backup], target, "update") == {"inserted": 0, "updated": 5, "skipped": 1}
+    with target() as db:
+        assert db.query(Employee.name).filter(Employee.email == "e1@corp.pl").scalar() == "Employee 01"
+        assert db.query(Employee.name).filter(Employee.email == "e2@corp.pl").scalar() == "Newcomer"
@@ -0,0 +1,64 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect
+
+from app.db.models import Employee
+from app.services import employee_directory
+
+
+@pytest.fixture
+def db(session_factory):
+    now = datetime.now()
+    with session_factory() as session:
+        session.add_all([
+            Employee(uuid=uuid.uuid4(), name=f"Employee {i:02d}", email=f"e{i:02d}@corp.pl", is_active=i % 2 == 0,
+                     expires_at=now + timedelta(days=i, hours=-1), embedding=[0.1] * 512)
+            for i in range(25)
+        ])
+        session.add(Employee(uuid=uuid.uuid4(), name="Zofia Nowak", email="zofia@corp.pl", is_active=True, embedding=[0.2]))
+        session.commit()
+        yield session
+
+
+def test_keyset_pages_cover_all_employees_once(db):
+    """Test that following the cursors lists every employee exactly once, in order."""
+    seen, cursor = [], None
+    while True:
+        page, cursor = employee_directory.list_employees(db, limit=10, cursor=cursor)
+        seen.extend(e.name for e in page)
+        if cursor is None:
+            break
+
+    assert len(seen) == 26
+    assert seen == sorted(seen)
+
+
+def test_listing_does_not_load_embeddings(db):
+    """Test that the listing does not load the face templates."""
+    db.expunge_all()
+    page, _ = employee_directory.list_employees(db, limit=5)
+
+    assert all("embedding" in inspect(employee).unloaded for employee in page)
+
+
+def test_prefix_search_and_filters(db):
+    """Test the prefix search and the status and expiry filters."""
+    by_name, _ = employee_directory.list_employees(db, search="zof")
+    by_email, _ = employee_directory.list_employees(db, search="E1")
+    wildcard, _ = employee_directory.list_employees(db, search="%")
+    inactive, _ = employee_directory.list_employees(db, is_active=False)
+    expiring, _ = employee_directory.list_employees(db, expiring_within_days=3)
+
+    assert [e.name for e in by_name] == ["Zofia Nowak"]
+    assert len(by_email) == 10
+    assert wildcard == []
+    assert len(inactive) == 12
+    assert [e.name for e in expiring] == ["Employee 01", "Employee 02", "Employee 03"]
+
+
+def test_invalid_cursor_is_rejected(db):
+    """Test that a malformed cursor raises ValueError."""
+    with pytest.raises(ValueError):
+        employee_directory.list_employees(db, cursor="bm9wZQ")
@@ -0,0 +1,131 @@
+import uuid
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.db.models import Employee
+
+
+@pytest.fixture
+def employee_uid(sqlite_db):
+    uid = uuid.uuid4()
+    with sqlite_db() as db:
+        db.add(Employee(uuid=uid, name="Jan Kowalski", email="jan@test.pl", is_active=True))
+        db.commit()
+    return uid
+
+
+def _version(factory, uid):
+    with factory() as db:
+        return db.get(Employee, uid).version
+
+
+def test_status_update_is_conditional_on_if_match(client, sqlite_db, employee_uid):
+    """Test that a status change with a stale If-Match is rejected with 412."""
+    # The status endpoint inverts is_active (see the frontend toggle)
+    response = client.patch(f"/admin/employees/{employee_uid}/status", json={"is_active": True},
+                            headers={"If-Match": '"1"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+    assert response.json()["is_active"] is False
+
+    # A second admin still holding version 1 does not overwrite the change
+    stale = client.patch(f"/admin/employees/{employee_uid}/status", json={"is_active": False},
+                         headers={"If-Match": '"1"'})
+    assert stale.status_code == 412
+    assert _version(sqlite_db, employee_uid) == 2
+
+    missing = client.patch(f"/admin/employees/{uuid.uuid4()}/status", json={"is_active": True})
+    assert missing.status_code == 404
+
+
+def test_profile_update_and_delete_check_the_version(client, sqlite_db, employee_uid):
+    """Test that PUT and DELETE check If-Match and return the new ETag."""
+    assert client.put(f"/admin/employees/{employee_uid}", data={"name": "X"},
+                      headers={"If-Match": '"7"'}).status_code == 412
+
+    response = client.put(f"/admin/employees/{employee_uid}", data={"name": "Jan Nowak"},
+                          headers={"If-Match": 'W/"1"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+
+    assert client.delete(f"/admin/employees/{employee_uid}", headers={"If-Match": '"1"'}).status_code == 412
+    assert client.delete(f"/admin/employees/{employee_uid}", headers={"If-Match": "*"}).status_code == 200
+
+
+def test_invalid_if_match_is_rejected(client, sqlite_db, employee_uid):
+    """Test that an If-Match that is not a version is rejected with 400."""
+    response = client.patch(f"/admin/employees/{employee_uid}/status", json={"is_active": True},
+                            headers={"If-Match": '"abc"'})
+    assert response.status_code == 400
+    assert _version(sqlite_db, employee_uid) == 1
+
+
+def test_concurrent_flush_of_a_stale_row_is_detected(sqlite_db, employee_uid):
+    """Test that flushing an employee changed by another session raises StaleDataError."""
+    with sqlite_db() as first, sqlite_db() as second:
+        a = first.get(Employee, employee_uid)
+        b = second.get(Employee, employee_uid)
+        a.name, a.version = "First", a.version + 1
+        first.commit()
+
+        b.name, b.version = "Second", b.version + 1
+        with pytest.raises(StaleDataError):
+            second.commit()
+
+
+def test_terminals_are_notified_only_when_an_employee_is_deactivated(client, sqlite_db, employee_uid):
+    """Test that revocation notices are sent only on an active to inactive change."""
+    with patch("app.api.admin_routes.notify_revoked") as notify:
+        # Deactivates, then repeats the same request on the already inactive employee
+        client.patch(f"/admin/employees/{employee_uid}/status", json={"is_active": True})
+        client.patch(f"/admin/employees/{employee_uid}/status", json={"is_active": True})
+        client.put(f"/admin/employees/{employee_uid}", data={"name": "Jan Nowak"})
+        client.delete(f"/admin/employees/{employee_uid}")
+
+    notify.assert_called_once_with(employee_uid, "DEACTIVATED")
+
+
+def test_profile_update_without_photo_is_one_conditional_update(client, sqlite_db, employee_uid):
+    """Test that a PUT without a photo writes with a single UPDATE ... RETURNING and no SELECT."""
+    statements = []
+
+    def record(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = sqlite_db.kw["bind"]
+    event.listen(engine, "before_cursor_execute", record)
+    response = client.put(f"/admin/employees/{employee_uid}", data={"name": "Jan Nowak"},
+                          headers={"If-Match": '"1"'})
+    event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    [statement] = [s for s in statements if s.lstrip().upper().startswith(("SELECT", "UPDATE"))]
+    assert statement.lstrip().startswith("UPDATE employees SET")
+    assert "RETURNING" in statement
+
+
+def test_stale_photo_update_is_rejected_before_the_embedding(client, sqlite_db, employee_uid):
+    """Test that a PUT with a photo and a stale If-Match does no embedding or blob work."""
+    with patch("app.api.admin_routes.generate_face_embedding") as embed, \
+            patch("app.api.admin_routes.enrollment_photos.store_enrollment_photo") as store:
+        response = client.put(f"/admin/employees/{employee_uid}", data={"name": "X"},
+                              files={"photo": ("face.jpg", b"jpeg", "image/jpeg")}, headers={"If-Match": '"7"'})
+
+    assert response.status_code == 412
+    embed.assert_not_called()
+    store.assert_not_called()
+
+
+def test_profile_update_to_a_taken_email_is_rejected(client, sqlite_db, employee_uid):
+    """Test that changing the email to another employee's is rejected with 400."""
+    with sqlite_db() as db:
+        db.add(Employee(uuid=uuid.uuid4(), name="Anna Nowak", email="anna@test.pl", is_active=True))
+        db.commit()
+
+    response = client.put(f"/admin/employees/{employee_uid}", data={"email": "anna@test.pl"})
+
+    assert response.status_code == 400
+    assert _version(sqlite_db, employee_uid) == 1
@@ -0,0 +1,133 @@
+import hashlib
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pytest
+
+from app.db.models import Employee, EnrollmentPhoto
+from app.services import enrollment_photos
+from app.services.blob_store import LocalBlobStore, get_blob_store
+
+
+def _jpeg(width=1200, height=900):
+    frame = np.random.default_rng(0).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+def test_local_blob_store_deduplicates_and_streams(tmp_path):
+    """Test that the local blob store deduplicates content and streams it back in chunks."""
+    store = LocalBlobStore(str(tmp_path))
+
+    digest = store.put_stream([b"abc", b"def"])
+    assert store.put(b"abcdef") == digest
+    assert list(store.iter_chunks(digest, chunk_size=4)) == [b"abcd", b"ef"]
+    assert len([p for p in tmp_path.rglob("*") if p.is_file()]) == 1
+
+    with pytest.raises(ValueError):
+        store.exists("../../etc/passwd")
+
+
+def test_enrollment_photo_thumbnail_is_generated_once(session_factory):
+    """Test that identical enrollment photos share one blob and one thumbnail."""
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    photo = _jpeg()
+
+    with session_factory() as db:
+        db.add_all([
+            Employee(uuid=alice, name="Alice", email="a@x.com", is_active=True),
+            Employee(uuid=bob, name="Bob", email="b@x.com", is_active=True),
+        ])
+        with patch.object(enrollment_photos, "make_thumbnail", wraps=enrollment_photos.make_thumbnail) as make_thumbnail:
+            first = enrollment_photos.store_enrollment_photo(db, alice, photo)
+            db.flush()
+            again = enrollment_photos.store_enrollment_photo(db, alice, photo)
+            shared = enrollment_photos.store_enrollment_photo(db, bob, photo)
+            db.commit()
+
+        assert again is first
+        assert make_thumbnail.call_count == 1
+        assert shared.thumbnail_sha256 == first.thumbnail_sha256
+        assert (first.width, first.height, first.content_type) == (1200, 900, "image/jpeg")
+        assert db.query(EnrollmentPhoto).count() == 2
+
+        thumbnail = cv2.imdecode(np.frombuffer(get_blob_store().get(first.thumbnail_sha256), np.uint8), cv2.IMREAD_COLOR)
+        assert max(thumbnail.shape[:2]) == enrollment_photos.THUMBNAIL_MAX_SIDE
+        assert enrollment_photos.latest_photo_bytes(db, alice) == photo
+
+
+def test_enrollment_photo_is_streamed_with_etag(client, mock_db_session, mock_employee):
+    """Test that enrollment photos are streamed with an ETag and answer 304."""
+    digest = get_blob_store().put(b"original-bytes")
+    mock_db_session.query().filter().first.return_value = EnrollmentPhoto(
+        id=1, employee_id=mock_employee.uuid, sha256=digest, content_type="image/png", size_bytes=14, created_at=datetime.now()
+    )
+    url = f"/admin/employees/{mock_employee.uuid}/photos/1"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == b"original-bytes"
+    assert response.headers["content-type"] == "image/png"
+
+    assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert client.get(url, params={"variant": "thumbnail"}).status_code == 404
+
+
+def test_create_employee_keeps_enrollment_photo(client, mock_db_session):
+    """Test that creating an employee stores the enrollment photo."""
+    mock_db_session.query().filter().first.return_value = None
+
+    with patch("app.api.admin_routes.generate_face_embedding", return_value=[0.1, 0.2]), \
+         patch("app.api.admin_routes.send_qr_code_via_email"), \
+         patch("app.api.admin_routes.enrollment_photos.store_enrollment_photo") as store:
+        response = client.post(
+            "/admin/create_employee",
+            data={"name": "New Person", "email": "new@test.pl"},
+            files={"photo": ("face.jpg", b"jpeg-bytes", "image/jpeg")},
+        )
+
+    assert response.status_code == 200
+    employee = mock_db_session.add.call_args_list[0].args[0]
+    store.assert_called_once_with(mock_db_session, employee.uuid, b"jpeg-bytes")
+
+
+def test_deleted_employee_photos_leave_the_blob_store(client, sqlite_db):
+    """Test that deleting an employee removes blobs no other employee shares."""
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    shared, own = _jpeg(320, 240), _jpeg(400, 300)
+
+    with sqlite_db() as db:
+        db.add_all([
+            Employee(uuid=alice, name="Alice", email="a@x.com", is_active=True),
+            Employee(uuid=bob, name="Bob", email="b@x.com", is_active=True),
+        ])
+        kept = enrollment_photos.store_enrollment_photo(db, bob, shared)
+        removed = [enrollment_photos.store_enrollment_photo(db, alice, data) for data in (shared, own)]
+        db.commit()
+        digests = enrollment_photos.photo_digests(removed)
+        kept_digests = enrollment_photos.photo_digests([kept])
+
+    assert client.delete(f"/admin/employees/{alice}").status_code == 200
+
+    store = get_blob_store()
+    assert all(store.exists(digest) for digest in kept_digests)
+    assert not any(store.exists(digest) for digest in digests - kept_digests)
+
+
+def test_blobs_of_a_failed_update_are_deleted(client, sqlite_db):
+    """Test that a photo stored for an update that fails to commit is removed again."""
+    uid = uuid.uuid4()
+    with sqlite_db() as db:
+        db.add(Employee(uuid=uid, name="Alice", email="a@x.com", is_active=True))
+        db.commit()
+    photo = _jpeg(360, 270)
+
+    with patch("app.api.admin_routes._embedding_from_photo", return_value=([0.1] * 512, photo)), \
+         patch("sqlalchemy.orm.Session.commit", side_effect=OSError("connection lost")):
+        with pytest.raises(OSError):
+            client.put(f"/admin/employees/{uid}", data={"name": "Alice B"},
+                       files={"photo": ("face.jpg", photo, "image/jpeg")})
+
+    assert not get_blob_store().exists(hashlib.sha256(photo).hexdigest())
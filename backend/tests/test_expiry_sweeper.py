@@ -0,0 +1,68 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.db.models import Employee
+from app.services import expiry_sweeper
+
+NOW = datetime(2026, 3, 1, 12, 0)
+
+
+@pytest.fixture(autouse=True)
+def employees(session_factory):
+    with session_factory() as db:
+        db.add_all([
+            Employee(uuid=uuid.uuid4(), name="Expired", email="old@corp.pl", is_active=True, expires_at=NOW - timedelta(hours=1)),
+            Employee(uuid=uuid.uuid4(), name="Soon", email="soon@corp.pl", is_active=True, expires_at=NOW + timedelta(days=2)),
+            Employee(uuid=uuid.uuid4(), name="Later", email="later@corp.pl", is_active=True, expires_at=NOW + timedelta(days=30)),
+            Employee(uuid=uuid.uuid4(), name="Permanent", email="perm@corp.pl", is_active=True),
+        ])
+        db.commit()
+
+
+def _active(factory):
+    with factory() as db:
+        return {e.name for e in db.query(Employee).filter(Employee.is_active.is_(True))}
+
+
+def test_sweep_deactivates_expired_and_reminds_once(session_factory):
+    """Test that a sweep deactivates expired accounts and sends each reminder once."""
+    with patch.object(expiry_sweeper, "send_expiry_reminder_email", new_callable=AsyncMock) as send:
+        first = asyncio.run(expiry_sweeper.sweep(session_factory, now=NOW))
+        second = asyncio.run(expiry_sweeper.sweep(session_factory, now=NOW))
+
+    assert first == {"deactivated": 1, "reminded": 1}
+    assert second == {"deactivated": 0, "reminded": 0}
+    assert _active(session_factory) == {"Soon", "Later", "Permanent"}
+    send.assert_awaited_once_with("soon@corp.pl", "Soon", NOW + timedelta(days=2))
+
+
+def test_sweep_deactivates_in_batches_and_retries_failed_reminders(session_factory):
+    """Test that deactivation runs in batches and failed reminders are retried."""
+    with patch.object(expiry_sweeper, "EXPIRY_SWEEP_BATCH_SIZE", 1), \
+         patch.object(expiry_sweeper, "send_expiry_reminder_email", new_callable=AsyncMock, side_effect=OSError("smtp down")):
+        stats = asyncio.run(expiry_sweeper.sweep(session_factory, now=NOW + timedelta(days=3)))
+
+    assert stats == {"deactivated": 2, "reminded": 0}
+    assert _active(session_factory) == {"Later", "Permanent"}
+
+    with session_factory() as db:
+        assert len(expiry_sweeper.due_reminders(db, NOW + timedelta(days=25))) == 1
+
+
+def test_reminder_is_claimed_once_before_sending(session_factory):
+    """Test that a reminder claimed by one sweep is not sent again by a concurrent sweep."""
+    with session_factory() as db:
+        (employee_id, _, _, expires_at), = expiry_sweeper.due_reminders(db, NOW)
+
+    with session_factory() as first, session_factory() as second:
+        assert expiry_sweeper.claim_reminder(first, employee_id, expires_at) is True
+        assert expiry_sweeper.claim_reminder(second, employee_id, expires_at) is False
+
+    with patch.object(expiry_sweeper, "send_expiry_reminder_email", new_callable=AsyncMock) as send:
+        stats = asyncio.run(expiry_sweeper.sweep(session_factory, now=NOW))
+    assert stats["reminded"] == 0
+    send.assert_not_awaited()
@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.db.models import AccessLog, AccessLogStatus, Employee
+from app.services import idempotency
+
+
+def _post_scan(client, employee, key, photo=b"scan"):
+    return client.post(
+        "/api/terminal/access-verify",
+        data={"employee_uid": str(employee.uuid)},
+        files={"file": ("face.jpg", photo, "image/jpeg")},
+        headers={"Idempotency-Key": key},
+    )
+
+
+def test_retry_with_same_key_is_not_processed_again(client, mock_db_session, mock_employee):
+    """Test that a retried scan with the same key is answered without a second verification."""
+    mock_db_session.query().filter().first.return_value = mock_employee
+
+    with patch.object(idempotency, "replay_from_log", return_value=None), \
+         patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2, 0.3]) as mock_embed:
+        first = _post_scan(client, mock_employee, "scan-1")
+        retry = _post_scan(client, mock_employee, "scan-1")
+        # The same key with another frame is not a retry
+        reused = _post_scan(client, mock_employee, "scan-1", photo=b"scan-resent")
+
+    assert first.json() == retry.json()
+    assert first.json()["access"] == "GRANTED"
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert reused.status_code == 409
+    assert mock_embed.call_count == 1
+    assert mock_db_session.add.call_count == 1
+    logged = mock_db_session.add.call_args.args[0]
+    assert logged.request_id == "scan-1"
+    assert logged.frame_hash == idempotency.frame_hash(b"scan")
+
+
+def test_processing_errors_are_not_replayed():
+    """Test that concurrent duplicates share one attempt and processing errors are retried."""
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"access": "DENIED", "reason": "PROCESSING_ERROR"} if calls == 1 else {"access": "GRANTED"}
+
+    async def run():
+        with patch.object(idempotency, "replay_from_log", return_value=None):
+            # Concurrent duplicates share the running attempt
+            burst = await asyncio.gather(*(idempotency.run_once("k", "uid", "f", compute, None) for _ in range(3)))
+            retry = await idempotency.run_once("k", "uid", "f", compute, None)
+        return burst, retry
+
+    burst, retry = asyncio.run(run())
+    assert [replayed for _, replayed in burst] == [False, True, True]
+    assert retry == ({"access": "GRANTED"}, False)
+    assert calls == 2
+
+
+def test_replay_from_log_finds_requests_of_other_workers(session_factory):
+    """Test that decisions logged by another worker are replayed from the access log."""
+    employee = Employee(uuid=uuid.uuid4(), name="Anna Nowak", email="anna@corp.pl", is_active=True)
+
+    with session_factory() as db:
+        db.add(employee)
+        db.add_all([
+            AccessLog(id=1, timestamp=datetime.now(), status=AccessLogStatus.GRANTED, reason="SUCCESS",
+                      employee_id=employee.uuid, request_id="granted", frame_hash="f1"),
+            AccessLog(id=2, timestamp=datetime.now(), status=AccessLogStatus.DENIED_FACE, reason="SYS_ERR: boom",
+                      employee_id=employee.uuid, request_id="failed"),
+            AccessLog(id=3, timestamp=datetime.now(), status=AccessLogStatus.DENIED_QR, reason="QR_INVALID_FORMAT",
+                      request_id="bad-qr"),
+        ])
+        db.commit()
+
+        uid = str(employee.uuid)
+        assert idempotency.replay_from_log(db, "granted", uid, "f1") == {
+            "access": "GRANTED", "name": "Anna Nowak", "message": "Welcome, Anna Nowak",
+        }
+        with pytest.raises(idempotency.IdempotencyConflict):
+            idempotency.replay_from_log(db, "granted", uid, "f2")
+        assert idempotency.replay_from_log(db, "granted", str(uuid.uuid4()), "f1") is None
+        assert idempotency.replay_from_log(db, "failed", uid) is None
+        assert idempotency.replay_from_log(db, "bad-qr", "not-a-uuid") == {"access": "DENIED", "reason": "QR_INVALID_FORMAT"}
@@ -0,0 +1,130 @@
+import asyncio
+import io
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import UploadFile
+
+from app.core.body_limit import MAX_REQUEST_BYTES, BodySizeLimitMiddleware
+from app.services import image_ingest
+from app.services.image_ingest import UploadTooLarge, decode_image, image_size, read_upload
+
+
+def _encode(ext: str, width: int, height: int) -> bytes:
+    frame = np.random.default_rng(0).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    return cv2.imencode(ext, frame)[1].tobytes()
+
+
+def test_large_jpeg_is_decoded_reduced_and_capped():
+    """Test that large JPEGs are decoded at reduced size and capped to the detector resolution."""
+    data = _encode(".jpg", 4032, 3024)
+
+    assert image_size(data, "jpeg") == (4032, 3024)
+    with patch("cv2.imdecode", wraps=cv2.imdecode) as imdecode:
+        img = decode_image(data, max_side=1024)
+
+    assert imdecode.call_args.args[1] == cv2.IMREAD_REDUCED_COLOR_2
+    assert max(img.shape[:2]) == 1024
+
+
+def test_small_png_is_left_untouched():
+    """Test that small images are decoded at full size."""
+    data = _encode(".png", 640, 480)
+
+    assert image_size(data, "png") == (640, 480)
+    assert decode_image(data, max_side=1024).shape == (480, 640, 3)
+
+
+@pytest.mark.parametrize("payload", [b"", b"not an image", b"\xff\xd8\xff" + b"\x00" * 64])
+def test_invalid_payload_is_rejected(payload):
+    """Test that payloads that are not images are rejected."""
+    with pytest.raises(ValueError, match="INVALID_IMAGE"):
+        decode_image(payload)
+
+
+def test_decompression_bomb_is_rejected_before_decoding():
+    """Test that images with huge dimensions are rejected from their header."""
+    data = _encode(".png", 64, 64)
+    with patch.object(image_ingest, "MAX_IMAGE_PIXELS", 1000), \
+         patch("cv2.imdecode") as imdecode:
+        with pytest.raises(ValueError, match="INVALID_IMAGE"):
+            decode_image(data)
+    imdecode.assert_not_called()
+
+
+def test_read_upload_stops_at_limit():
+    """Test that reading an upload stops once the size limit is exceeded."""
+    upload = UploadFile(file=io.BytesIO(b"x" * (3 * image_ingest.READ_CHUNK_SIZE)))
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(read_upload(upload, max_bytes=image_ingest.READ_CHUNK_SIZE))
+
+
+def test_terminal_denies_oversized_upload(client, mock_db_session, mock_employee):
+    """Test that the terminal denies an oversized upload without inference."""
+    mock_db_session.query().filter().first.return_value = mock_employee
+
+    with patch("app.api.terminal_routes.read_upload", side_effect=UploadTooLarge), \
+         patch("app.api.terminal_routes.generate_face_embedding") as mock_embed:
+        response = client.post(
+            "/api/terminal/access-verify",
+            data={"employee_uid": str(mock_employee.uuid)},
+            files={"file": ("huge.jpg", b"x", "image/jpeg")},
+        )
+
+    assert response.json() == {"access": "DENIED", "reason": "IMAGE_TOO_LARGE"}
+    mock_embed.assert_not_called()
+
+
+def test_terminal_denies_non_image_before_inference(client, mock_db_session, mock_employee):
+    """Test that the terminal denies a non-image upload without inference."""
+    mock_db_session.query().filter().first.return_value = mock_employee
+
+    with patch("deepface.DeepFace.represent") as mock_represent:
+        response = client.post(
+            "/api/terminal/access-verify",
+            data={"employee_uid": str(mock_employee.uuid)},
+            files={"file": ("capture.jpg", b"<html>not a photo</html>", "image/jpeg")},
+        )
+
+    assert response.json() == {"access": "DENIED", "reason": "INVALID_IMAGE"}
+    mock_represent.assert_not_called()
+
+
+def test_oversized_multipart_is_refused_before_parsing(client):
+    """Test that an upload declared larger than the limit is refused with 413 before the form is read."""
+    with patch("app.api.terminal_routes.read_upload") as read:
+        response = client.post(
+            "/api/terminal/access-verify",
+            data={"employee_uid": "6f1c2b4e-0d5a-4c3e-9a7b-2f8e1d0c9b6a"},
+            files={"file": ("huge.jpg", b"x" * (MAX_REQUEST_BYTES + 1), "image/jpeg")},
+        )
+
+    assert response.status_code == 413
+    read.assert_not_called()
+
+
+def test_chunked_body_is_cut_off_at_the_limit():
+    """Test that a body without Content-Length stops being read once it passes the limit."""
+    chunks = [{"type": "http.request", "body": b"x" * 100, "more_body": True} for _ in range(50)]
+    sent, read = [], []
+
+    async def app(scope, receive, send):
+        while (message := await receive())["type"] == "http.request":
+            read.append(message)
+        raise RuntimeError("client disconnected")
+
+    async def receive():
+        return chunks.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = BodySizeLimitMiddleware(app, max_bytes=250)
+    asyncio.run(middleware({"type": "http", "path": "/api/terminal/access-verify", "headers": []}, receive, send))
+
+    assert sent[0]["status"] == 413
+    assert len(read) == 2
+    assert len(chunks) == 47
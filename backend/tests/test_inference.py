@@ -0,0 +1,96 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import inference_server
+from app.services import biometric_service
+from app.services.inference_client import HttpInferenceClient, decode_embedding, encode_embedding
+
+
+def fake_embed_batch(images, model_name, detector_backend):
+    results = []
+    for image in images:
+        if image == b"crowd":
+            results.append(ValueError("MULTIPLE_FACES_DETECTED"))
+        elif image == b"empty-room":
+            results.append(None)
+        else:
+            results.append([float(len(image)), 0.5, -1.25])
+    return results
+
+
+@pytest.fixture
+def inference_client():
+    with patch.object(biometric_service, "load_models"), \
+         patch.object(inference_server.batcher, "embed_batch", fake_embed_batch), \
+         TestClient(inference_server.app) as server:
+        yield HttpInferenceClient("http://testserver", client=server)
+
+
+def test_embedding_round_trips_as_float32():
+    """Test that embeddings survive the float32 wire encoding."""
+    assert decode_embedding(encode_embedding([0.25, -1.5, 3.0])) == [0.25, -1.5, 3.0]
+    assert len(encode_embedding([0.0] * 512)) == 2048
+
+
+def test_http_client_maps_server_outcomes(inference_client):
+    """Test that the HTTP client maps inference server responses to results and errors."""
+    assert inference_client.health()["status"] == "ok"
+    assert inference_client.embed(b"face") == [4.0, 0.5, -1.25]
+    assert inference_client.embed(b"empty-room") is None
+    with pytest.raises(ValueError, match="MULTIPLE_FACES_DETECTED"):
+        inference_client.embed(b"crowd")
+
+
+def test_oversized_image_is_refused_before_it_is_read():
+    """Test that the inference server refuses a body above the upload limit with 413."""
+    response = TestClient(inference_server.app).post("/v1/embed", content=b"x" * (inference_server.MAX_UPLOAD_BYTES + 1))
+
+    assert response.status_code == 413
+    assert response.json() == {"error": "IMAGE_TOO_LARGE"}
+
+
+def test_micro_batcher_groups_queued_requests_by_model():
+    """Test that queued requests are embedded in batches per model."""
+    batches = []
+
+    def embed_batch(images, model_name, detector_backend):
+        batches.append((model_name, len(images)))
+        return [[1.0]] * len(images)
+
+    async def scenario():
+        batcher = inference_server.MicroBatcher(embed_batch, max_batch=8, max_wait=0)
+        batcher.start()
+        results = await asyncio.gather(
+            *(batcher.submit(b"img", "Facenet512", "retinaface") for _ in range(5)),
+            batcher.submit(b"img", "ArcFace", "retinaface"),
+        )
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert results == [[1.0]] * 6
+    # All requests were queued before the worker ran: one batch per model
+    assert batches == [("Facenet512", 5), ("ArcFace", 1)]
+
+
+def test_batch_embedding_falls_back_to_single_images():
+    """Test that a failing batch is embedded image by image."""
+    import cv2
+    import numpy as np
+
+    jpeg = cv2.imencode(".jpg", np.zeros((64, 64, 3), np.uint8))[1].tobytes()
+
+    def represent(img_path, **kwargs):
+        if isinstance(img_path, list):
+            raise ValueError("Face could not be detected in one of the images")
+        return [{"embedding": [0.1, 0.2]}]
+
+    with patch("deepface.DeepFace.represent", side_effect=represent):
+        results = biometric_service.generate_face_embeddings([jpeg, b"not an image", jpeg])
+
+    assert results[0] == results[2] == [0.1, 0.2]
+    assert isinstance(results[1], ValueError) and str(results[1]) == "INVALID_IMAGE"
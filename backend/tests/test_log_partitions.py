@@ -0,0 +1,124 @@
+import asyncio
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.db.models import AccessLog
+from app.services import log_partitions
+
+
+def test_access_logs_table_is_range_partitioned_and_indexed():
+    """
+    Verifies the DDL of access_logs: monthly range partitioning and the query indexes.
+    """
+    ddl = str(CreateTable(AccessLog.__table__).compile(dialect=postgresql.dialect()))
+    indexes = {
+        str(CreateIndex(index).compile(dialect=postgresql.dialect())) for index in AccessLog.__table__.indexes
+    }
+
+    assert "PARTITION BY RANGE (timestamp)" in ddl
+    assert "PRIMARY KEY (id, timestamp)" in ddl
+    assert indexes == {
+        "CREATE INDEX ix_access_logs_timestamp ON access_logs (timestamp)",
+        "CREATE INDEX ix_access_logs_employee_id_timestamp ON access_logs (employee_id, timestamp)",
+        "CREATE INDEX ix_access_logs_status_timestamp ON access_logs (status, timestamp)",
+        "CREATE INDEX ix_access_logs_request_id ON access_logs (request_id)",
+    }
+
+
+def test_planned_partitions_cover_current_and_upcoming_months():
+    """
+    Verifies that partitions are planned month by month across a year boundary.
+    """
+    planned = log_partitions.planned_partitions(date(2026, 11, 19), months_ahead=2)
+
+    assert planned == [
+        ("access_logs_y2026m11", date(2026, 11, 1), date(2026, 12, 1)),
+        ("access_logs_y2026m12", date(2026, 12, 1), date(2027, 1, 1)),
+        ("access_logs_y2027m01", date(2027, 1, 1), date(2027, 2, 1)),
+    ]
+
+
+def test_expired_partitions_respect_retention():
+    """
+    Verifies that only monthly partitions entirely older than the retention period are archived.
+    """
+    names = [
+        "access_logs_y2024m09", "access_logs_y2024m10", "access_logs_y2024m11",
+        "access_logs_default", "access_logs_y2026m11",
+    ]
+
+    expired = log_partitions.expired_partitions(names, date(2026, 11, 19), retention_months=24)
+
+    assert expired == ["access_logs_y2024m09", "access_logs_y2024m10"]
+    assert log_partitions.expired_partitions(names, date(2026, 11, 19), retention_months=0) == []
+
+
+def test_maintenance_skipped_for_unpartitioned_table():
+    """
+    Verifies that a legacy (non-partitioned) table is left untouched.
+    """
+    engine = MagicMock()
+    engine.dialect.name = "postgresql"
+    engine.connect().__enter__().execute().first.return_value = None
+    engine.begin.reset_mock()
+
+    log_partitions.run_maintenance(engine, date(2026, 11, 19))
+
+    assert not engine.begin.called
+
+
+def test_maintenance_round_is_skipped_while_another_worker_holds_the_lock(monkeypatch):
+    """Test that a worker skips the maintenance round when the advisory lock is taken."""
+    engine = MagicMock()
+    engine.dialect.name = "postgresql"
+    engine.connect.return_value.execute.return_value.scalar.return_value = False
+    run_maintenance = MagicMock()
+    monkeypatch.setattr(log_partitions, "run_maintenance", run_maintenance)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(log_partitions.maintenance_loop(engine, interval=3600), timeout=0.2))
+
+    run_maintenance.assert_not_called()
+    engine.connect.return_value.close.assert_called_once()
+
+    engine.connect.return_value.execute.return_value.scalar.return_value = True
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(log_partitions.maintenance_loop(engine, interval=3600), timeout=0.2))
+
+    run_maintenance.assert_called_once_with(engine)
+    # Released after the round, not held while sleeping
+    unlock = engine.connect.return_value.execute.call_args_list[-1]
+    assert "pg_advisory_unlock" in str(unlock.args[0])
+
+
+def test_partition_is_copied_before_it_is_detached(tmp_path):
+    """Test that archiving copies the attached partition and only then detaches and drops it."""
+    engine = MagicMock()
+    cursor = engine.raw_connection().cursor().__enter__()
+    cursor.copy_expert.side_effect = lambda sql, out: out.write(b"id,timestamp\n")
+
+    target = log_partitions.archive_partition(engine, "access_logs_y2024m09", str(tmp_path))
+
+    statements = [c.args[0] for c in cursor.method_calls if c[0] in ("execute", "copy_expert")]
+    assert [s.split()[0] for s in statements] == ["LOCK", "COPY", "ALTER", "DROP"]
+    assert target.exists()
+    engine.raw_connection().commit.assert_called_once()
+
+
+def test_failed_export_leaves_the_partition_attached(tmp_path):
+    """Test that a failed export rolls back without detaching the partition."""
+    engine = MagicMock()
+    cursor = engine.raw_connection().cursor().__enter__()
+    cursor.copy_expert.side_effect = OSError("disk full")
+
+    with pytest.raises(OSError):
+        log_partitions.archive_partition(engine, "access_logs_y2024m09", str(tmp_path))
+
+    assert not any("DETACH" in str(c.args[0]) for c in cursor.execute.call_args_list)
+    engine.raw_connection().rollback.assert_called_once()
+    engine.raw_connection().commit.assert_not_called()
@@ -1,4 +1,10 @@
+import asyncio
+import json
+import httpx
+from app.api.admin_routes import LIVE_FEED_KEEPALIVE_SECONDS
 from app.db.models import AccessLog, AccessLogStatus
+from app.main import app
+from app.services.event_broadcaster import AccessEventBroadcaster, access_events
 from unittest.mock import patch
 
 
@@ -114,3 +120,112 @@ def test_log_saved_on_invalid_uuid_format(client, mock_db_session):
     assert saved_log.status == AccessLogStatus.DENIED_QR
     assert saved_log.reason == "QR_INVALID_FORMAT"
     assert saved_log.employee_id is None
+
+
+def test_access_decision_pushed_to_live_feed(client, mock_db_session, mock_employee, mock_admin):
+    """
+    Verifies that a decision made by the terminal is pushed to WebSocket subscribers.
+    """
+    mock_db_session.query().filter().first.return_value = mock_employee
+
+    with patch("app.api.admin_routes.security.authenticate_token", return_value=mock_admin), \
+            patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2]), \
+            patch("app.api.terminal_routes.verify_face", return_value=(True, 0.15)):
+        with client.websocket_connect("/admin/logs/ws?token=test&status=GRANTED") as websocket:
+            client.post(
+                "/api/terminal/access-verify",
+                data={"employee_uid": str(mock_employee.uuid)},
+                files={"file": ("test.jpg", b"fake_bytes", "image/jpeg")}
+            )
+            event = websocket.receive_json()
+
+    assert event["status"] == "GRANTED"
+    assert event["reason"] == "SUCCESS"
+    assert event["employee_name"] == mock_employee.name
+    assert event["employee_id"] == str(mock_employee.uuid)
+
+
+def test_live_feed_drops_oldest_events_for_slow_subscribers():
+    """
+    Verifies that a slow subscriber keeps only the newest events and filters by status.
+    """
+    broadcaster = AccessEventBroadcaster(buffer_size=2)
+
+    async def scenario():
+        subscription = broadcaster.subscribe(status="GRANTED")
+        for i in range(5):
+            broadcaster.publish({"id": i, "status": "GRANTED"})
+        broadcaster.publish({"id": 99, "status": "DENIED_FACE"})
+
+        received = [await subscription.get(timeout=0.1) for _ in range(3)]
+        broadcaster.unsubscribe(subscription)
+        return subscription, received
+
+    subscription, received = asyncio.run(scenario())
+
+    assert [event["id"] for event in received[:2]] == [3, 4]
+    assert received[2] is None
+    assert subscription.dropped == 3
+    assert broadcaster.subscriber_count == 0
+
+
+def test_access_decision_streamed_over_sse(mock_db_session, mock_employee):
+    """
+    Verifies that /admin/logs/stream emits `event: access` frames and applies the status filter.
+
+    GIVEN: A dashboard subscribed to GRANTED events only.
+    WHEN: A terminal reports a face mismatch followed by a successful entry.
+    THEN: Only the successful entry is streamed.
+    """
+    mock_db_session.query().filter().first.return_value = mock_employee
+
+    async def scenario():
+        chunks: asyncio.Queue = asyncio.Queue()
+        disconnect = asyncio.Event()
+        started = asyncio.Event()
+
+        async def receive():
+            if disconnect.is_set():
+                return {"type": "http.disconnect"}
+            if not started.is_set():
+                started.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                await chunks.put(message["body"].decode())
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/admin/logs/stream", "raw_path": b"/admin/logs/stream",
+            "root_path": "", "query_string": b"status=GRANTED", "headers": [(b"host", b"test")],
+            "client": ("test", 1), "server": ("test", 80),
+        }
+        stream = asyncio.create_task(app(scope, receive, send))
+        while not access_events.subscriber_count:
+            await asyncio.sleep(0.01)
+
+        async with httpx.AsyncClient(app=app, base_url="http://test") as async_client:
+            for result in [(False, 0.85), (True, 0.15)]:
+                with patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2]), \
+                        patch("app.api.terminal_routes.verify_face", return_value=result):
+                    await async_client.post(
+                        "/api/terminal/access-verify",
+                        data={"employee_uid": str(mock_employee.uuid)},
+                        files={"file": ("test.jpg", b"fake_bytes", "image/jpeg")}
+                    )
+
+        frame = await asyncio.wait_for(chunks.get(), timeout=2)
+        disconnect.set()
+        await asyncio.wait_for(stream, timeout=LIVE_FEED_KEEPALIVE_SECONDS + 5)
+        return frame
+
+    frame = asyncio.run(scenario())
+
+    assert frame.startswith("event: access\n")
+    event = json.loads(frame.split("data: ", 1)[1])
+    assert event["status"] == "GRANTED"
+    assert event["reason"] == "SUCCESS"
+    assert access_events.subscriber_count == 0
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+from app.core import metrics
+from app.core.metrics import DatabasePoolCollector
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_metrics_exposes_stage_histograms_and_decisions(client, mock_db_session, mock_employee):
+    """Test that /metrics exposes stage latencies and access decision counters."""
+    mock_db_session.query().filter().first.return_value = mock_employee
+
+    with patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2, 0.3]):
+        client.post(
+            "/api/terminal/access-verify",
+            data={"employee_uid": str(mock_employee.uuid)},
+            files={"file": ("face.jpg", b"fake", "image/jpeg")},
+        )
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'entry_verify_stage_duration_seconds_count{stage="embedding"}' in body
+    assert 'entry_verify_stage_duration_seconds_count{stage="log"}' in body
+    assert 'entry_access_decisions_total{reason="SUCCESS",status="GRANTED"}' in body
+    assert "entry_inference_queue_depth 0.0" in body
+
+
+def test_database_pool_collector_reads_pool_state():
+    """Test that the pool collector reports the connection pool usage."""
+    engine = MagicMock()
+    engine.pool.size.return_value = 5
+    engine.pool.checkedout.return_value = 2
+    engine.pool.checkedin.return_value = 3
+    engine.pool.overflow.return_value = -3
+
+    registry = CollectorRegistry()
+    registry.register(DatabasePoolCollector(engine))
+    body = generate_latest(registry).decode()
+
+    assert "entry_db_pool_size 5.0" in body
+    assert "entry_db_pool_checkedout 2.0" in body
+    assert "entry_db_pool_overflow -3.0" in body
+
+
+def _worker(directory) -> int:
+    """Records one decision and one queued inference in a separate process, returns its PID."""
+    script = (
+        "import os; from app.core import metrics; "
+        "metrics.record_decision('GRANTED', 'SUCCESS'); metrics.INFERENCE_QUEUE_DEPTH.inc(); print(os.getpid())"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(directory)}
+    return int(subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env,
+                              capture_output=True, text=True, check=True).stdout)
+
+
+def test_multiprocess_metrics_are_aggregated_across_workers(tmp_path, monkeypatch):
+    """Test that /metrics adds up the workers' counters and the live workers' queue depth."""
+    (tmp_path / "counter_1.db").write_bytes(b"stale")
+    metrics.prepare_multiprocess_dir(str(tmp_path))
+    first, _ = _worker(tmp_path), _worker(tmp_path)
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    metrics.mark_process_dead(first)
+    body = metrics.render_latest()[0].decode()
+
+    assert 'entry_access_decisions_total{reason="SUCCESS",status="GRANTED"} 2.0' in body
+    assert "entry_inference_queue_depth 1.0" in body
+
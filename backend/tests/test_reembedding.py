@@ -0,0 +1,78 @@
+import uuid
+from unittest.mock import patch
+
+from app.db.models import Employee
+from app.services import biometric_service, reembedding
+from app.services.reembedding import ReembeddingJob
+
+
+def _seed(factory, count):
+    with factory() as db:
+        employees = [
+            Employee(uuid=uuid.UUID(int=i + 1), name=f"E{i}", email=f"e{i}@x.com", is_active=True, embedding=[0.1, 0.2])
+            for i in range(count)
+        ]
+        db.add_all(employees)
+        db.commit()
+
+
+def _job(factory, tmp_path, **kwargs):
+    return ReembeddingJob(
+        factory, "ArcFace", "yunet",
+        load_photo=lambda employee: None if employee.name == "E3" else f"photo-{employee.name}".encode(),
+        checkpoint_path=str(tmp_path / "checkpoint.json"),
+        batch_size=2, workers=0, max_rate=0, **kwargs,
+    )
+
+
+def test_reembedding_resumes_from_checkpoint_and_promotes(session_factory, tmp_path):
+    """Test that an interrupted re-embedding resumes from its checkpoint and is promoted."""
+    _seed(session_factory, 5)
+    calls = []
+
+    def fake_embed(job):
+        calls.append(job[0])
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return [1.0, 0.0]
+
+    with patch.object(reembedding, "_embed", fake_embed):
+        try:
+            _job(session_factory, tmp_path).run()
+        except KeyboardInterrupt:
+            pass
+        # The first batch was committed and checkpointed; the interrupted one is redone
+        assert _job(session_factory, tmp_path).run() == {"embedded": 2, "missing_photo": 1, "no_face": 0}
+    assert not (tmp_path / "checkpoint.json").exists()
+
+    assert calls == [b"photo-E0", b"photo-E1", b"photo-E2", b"photo-E2", b"photo-E4"]
+
+    job = _job(session_factory, tmp_path)
+    assert job.promote() == 4
+    with session_factory() as db:
+        employees = {e.name: e for e in db.query(Employee)}
+    assert employees["E0"].embedding == [1.0, 0.0] and employees["E0"].embedding_model == "ArcFace"
+    assert employees["E0"].next_embedding is None
+    assert employees["E3"].embedding == [0.1, 0.2] and employees["E3"].embedding_model is None
+
+
+def test_reembedding_pauses_while_inference_is_busy(session_factory, tmp_path):
+    """Test that re-embedding waits while live inference is busy."""
+    _seed(session_factory, 1)
+    busy = iter([True, True, False, False])
+
+    with patch.object(reembedding, "_embed", return_value=[1.0]), patch.object(reembedding.time, "sleep") as sleep:
+        _job(session_factory, tmp_path, is_busy=lambda: next(busy), busy_poll_seconds=7).run()
+
+    assert [c.args[0] for c in sleep.call_args_list] == [7, 7]
+
+
+def test_select_template_dual_read():
+    """Test which template is compared while a re-embedding is pending."""
+    employee = Employee(embedding=[0.1], embedding_model=None, next_embedding=[0.9], next_embedding_model="ArcFace", next_embedding_detector="yunet")
+
+    assert biometric_service.select_template(employee) == ([0.1], "Facenet512", "retinaface")
+    with patch.object(biometric_service, "MODEL_NAME", "ArcFace"), patch.object(biometric_service, "DETECTOR_BACKEND", "yunet"):
+        assert biometric_service.select_template(employee) == ([0.9], "ArcFace", "yunet")
+        legacy_only = Employee(embedding=[0.1])
+        assert biometric_service.select_template(legacy_only) == ([0.1], "Facenet512", "retinaface")
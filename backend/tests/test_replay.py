@@ -0,0 +1,91 @@
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from app.services import shadow
+from app.services.capture_store import CaptureStore
+from app.services.replay import Pipeline, replay
+
+ALICE = "00000000-0000-0000-0000-00000000000a"
+
+
+def _capture(store, frame, status="GRANTED", reason="SUCCESS", when=None):
+    when = when or datetime.now()
+    return store.write(frame, {"timestamp": when.isoformat(), "employee_id": ALICE, "status": status, "reason": reason})
+
+
+def test_capture_store_prunes_expired_and_oversized_days(tmp_path):
+    """Test that the capture store drops expired days and keeps within its size limit."""
+    store = CaptureStore(str(tmp_path), retention_days=7, max_bytes=1500)
+    today = date(2026, 3, 20)
+    _capture(store, b"x" * 100, when=datetime(2026, 3, 1))
+    _capture(store, b"y" * 2000, when=datetime(2026, 3, 18))
+    _capture(store, b"z" * 1000, when=datetime(2026, 3, 20))
+
+    assert store.prune(today) == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["2026-03-20"]
+    assert len(list(store.iter_captures())) == 1
+
+
+def test_capture_store_offer_respects_sampling(tmp_path):
+    """Test that captures are stored according to the sampling rate."""
+    store = CaptureStore(str(tmp_path), sample_rate=0.0)
+    assert store.offer(b"frame", {"timestamp": datetime.now().isoformat()}) is False
+
+
+def _fake_evaluate(job):
+    path, pipeline = job
+    frame = open(path, "rb").read()
+    # The candidate finds no face on "dark" frames and is twice as slow
+    if pipeline.detector_backend == "candidate" and frame.startswith(b"dark"):
+        return {"outcome": "NO_FACE", "embedding": None, "seconds": 0.2}
+    return {"outcome": "EMBEDDING", "embedding": [1.0, 0.0, 0.0], "seconds": 0.1 if pipeline.detector_backend != "candidate" else 0.2}
+
+
+def test_replay_reports_disagreements_and_latency(tmp_path):
+    """Test that a replay reports decision changes and latency."""
+    store = CaptureStore(str(tmp_path))
+    start = datetime(2026, 3, 20, 8)
+    _capture(store, b"reference", when=start)
+    _capture(store, b"bright", when=start + timedelta(minutes=1))
+    _capture(store, b"dark", when=start + timedelta(minutes=2))
+
+    report = replay(
+        store.iter_captures(),
+        Pipeline("Facenet512", "retinaface", 0.3),
+        Pipeline("Facenet512", "candidate", 0.3),
+        workers=0,
+        evaluate=_fake_evaluate,
+    )
+
+    assert report["captures"] == 2
+    assert report["references"] == 1
+    assert report["confusion"] == {"GRANTED->GRANTED": 1, "GRANTED->DENIED": 1}
+    assert report["disagreements"] == 1
+    assert report["examples"][0]["candidate"]["reason"] == "NO_FACE_DETECTED"
+    assert round(report["latency_delta_ms"]["mean_ms"]) == 100
+
+
+def test_pipeline_spec_parsing():
+    """Test the parsing of model:detector pipeline specs."""
+    assert Pipeline.parse("ArcFace:yunet:0.55") == Pipeline("ArcFace", "yunet", 0.55)
+    assert Pipeline.parse("Facenet512:mtcnn").threshold == 0.3
+
+
+def test_shadow_evaluation_never_changes_decision(client, mock_db_session, mock_employee):
+    """Test that the shadow pipeline never changes the live decision."""
+    mock_db_session.query().filter().first.return_value = mock_employee
+    evaluator = shadow.ShadowEvaluator(Pipeline("Facenet512", "yunet", 0.3), sample_rate=1.0)
+    evaluator._executor.submit = lambda fn, *args: fn(*args)
+
+    with patch("app.api.terminal_routes.shadow_evaluator", evaluator), \
+         patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2, 0.3]), \
+         patch("app.services.shadow.run_pipeline", return_value={"outcome": "NO_FACE", "embedding": None, "seconds": 0.5}), \
+         patch("app.services.shadow.metrics.record_shadow") as record_shadow:
+        response = client.post(
+            "/api/terminal/access-verify",
+            data={"employee_uid": str(mock_employee.uuid)},
+            files={"file": ("face.jpg", b"frame", "image/jpeg")},
+        )
+
+    assert response.json()["access"] == "GRANTED"
+    record_shadow.assert_called_once_with("disagree")
@@ -0,0 +1,228 @@
+import asyncio
+import gc
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.db.models import Admin
+from app.main import app
+
+
+def test_admin_lookup_is_cached_between_requests(mock_db_session):
+    """
+    Verifies that repeated requests with the same token hit the database only once.
+    """
+    admin = Admin(username="cached_admin", hashed_password="x")
+    mock_db_session.query().filter().first.return_value = admin
+    mock_db_session.query.reset_mock()
+
+    token = security.create_access_token(data={"sub": "cached_admin"})
+
+    first = asyncio.run(security.get_current_active_admin(token, mock_db_session))
+    second = asyncio.run(security.get_current_active_admin(token, mock_db_session))
+
+    assert first is admin
+    assert second is admin
+    assert mock_db_session.query.call_count == 1
+
+
+def test_admin_cache_invalidated_after_change(mock_db_session):
+    """
+    Verifies that invalidating the cache forces a fresh database lookup.
+    """
+    mock_db_session.query().filter().first.return_value = Admin(username="cached_admin", hashed_password="x")
+    mock_db_session.query.reset_mock()
+
+    token = security.create_access_token(data={"sub": "cached_admin"})
+    asyncio.run(security.get_current_active_admin(token, mock_db_session))
+
+    security.invalidate_admin_cache()
+    mock_db_session.query().filter().first.return_value = None
+    mock_db_session.query.reset_mock()
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(security.get_current_active_admin(token, mock_db_session))
+
+    assert exc.value.status_code == 401
+    assert mock_db_session.query.call_count == 1
+
+
+def test_expired_token_is_rejected(mock_db_session):
+    """
+    Verifies that an expired token is never accepted, cached or not.
+    """
+    token = security.create_access_token(data={"sub": "cached_admin"}, expires_delta=timedelta(seconds=-1))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(security.get_current_active_admin(token, mock_db_session))
+
+    assert exc.value.status_code == 401
+
+
+def _route_queries_by_model(mock_db_session, admin, employee):
+    from app.db.models import Employee
+
+    def query(model, *args):
+        result = MagicMock()
+        result.filter().first.return_value = admin if model is Admin else employee if model is Employee else None
+        return result
+
+    mock_db_session.query.side_effect = query
+
+
+def test_login_throttled_after_repeated_failures(client, mock_db_session):
+    """
+    Verifies that a username is locked out after too many failures, before any bcrypt work.
+    """
+    mock_db_session.query().filter().first.return_value = Admin(username="admin", hashed_password="x")
+
+    with patch("app.core.security.verify_password", return_value=False) as mock_verify:
+        for _ in range(security.LOGIN_MAX_FAILED_ATTEMPTS):
+            response = client.post("/admin/login", data={"username": "admin", "password": "wrong"})
+            assert response.status_code == 401
+
+        response = client.post("/admin/login", data={"username": "admin", "password": "wrong"})
+
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert mock_verify.call_count == security.LOGIN_MAX_FAILED_ATTEMPTS
+
+
+def test_terminal_latency_unaffected_by_login_storm(mock_db_session, mock_employee):
+    """
+    Verifies that slow password hashing does not stall terminal access checks.
+
+    GIVEN: A burst of logins, each spending BCRYPT_SECONDS in (simulated) bcrypt.
+    WHEN: A terminal verifies access while the logins are in progress.
+    THEN: The terminal requests finish before the logins do, each one well
+          below the cost of a single bcrypt call.
+    """
+    bcrypt_seconds = 0.3
+    admin = Admin(username="admin", hashed_password="x")
+    _route_queries_by_model(mock_db_session, admin, mock_employee)
+
+    def slow_verify(plain_password, hashed_password):
+        time.sleep(bcrypt_seconds)
+        return True
+
+    async def scenario():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as async_client:
+            logins = [
+                asyncio.create_task(
+                    async_client.post("/admin/login", data={"username": f"admin{i}", "password": "secret"})
+                )
+                for i in range(8)
+            ]
+            await asyncio.sleep(0.05)
+
+            latencies = []
+            for _ in range(5):
+                started = time.perf_counter()
+                response = await async_client.post(
+                    "/api/terminal/access-verify",
+                    data={"employee_uid": str(mock_employee.uuid)},
+                    files={"file": ("test.jpg", b"image_content", "image/jpeg")},
+                )
+                latencies.append(time.perf_counter() - started)
+                assert response.json()["access"] == "GRANTED"
+
+            logins_pending_after_terminals = sum(not login.done() for login in logins)
+            await asyncio.gather(*logins)
+            return latencies, logins_pending_after_terminals
+
+    # A full collection of the (TensorFlow-sized) heap takes ~0.3 s on its own,
+    # pause the collector so only event-loop blocking is measured
+    gc.collect()
+    gc.disable()
+    try:
+        with patch("app.core.security.verify_password", side_effect=slow_verify), \
+             patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2]), \
+             patch("app.api.terminal_routes.verify_face", return_value=(True, 0.1)):
+            latencies, logins_pending = asyncio.run(scenario())
+    finally:
+        gc.enable()
+
+    assert logins_pending > 0
+    assert max(latencies) < bcrypt_seconds / 2
+
+
+def test_parallel_login_burst_cannot_bypass_throttle():
+    """
+    Verifies that attempts still being checked count toward the limit.
+    """
+    throttle = security.LoginThrottle(max_attempts=3, window_seconds=60)
+
+    reserved = [throttle.acquire("admin") for _ in range(3)]
+
+    assert reserved == [None, None, None]
+    assert throttle.acquire("admin") is not None
+
+    throttle.release("admin", success=True)
+    assert throttle.acquire("admin") is None
+
+
+def test_login_throttle_memory_is_bounded():
+    """
+    Verifies that spraying random usernames cannot grow the throttle state without limit.
+    """
+    throttle = security.LoginThrottle(max_attempts=3, window_seconds=60, max_tracked=100)
+
+    for i in range(1000):
+        throttle.acquire(f"user{i}")
+        throttle.release(f"user{i}", success=False)
+
+    assert throttle.tracked_count() == 100
+
+
+def test_locked_username_survives_username_spraying():
+    """Test that spraying other usernames neither evicts nor unlocks a locked-out username."""
+    throttle = security.LoginThrottle(max_attempts=3, window_seconds=60, max_tracked=10)
+    for _ in range(3):
+        throttle.acquire("admin")
+        throttle.release("admin", success=False)
+
+    for i in range(100):
+        if throttle.acquire(f"user{i}") is None:
+            throttle.release(f"user{i}", success=False)
+
+    assert throttle.acquire("admin") is not None
+    assert throttle.tracked_count() == 10
+
+
+def test_success_keeps_the_attempts_still_being_checked():
+    """Test that a successful login only clears failures, not parallel attempts still being checked."""
+    throttle = security.LoginThrottle(max_attempts=2, window_seconds=60)
+    assert throttle.acquire("admin") is None
+    assert throttle.acquire("admin") is None
+
+    throttle.release("admin", success=True)
+    # The other attempt is still running and counts toward the limit
+    assert throttle.acquire("admin") is None
+    assert throttle.acquire("admin") is not None
+
+
+def test_bulk_admin_changes_invalidate_cache():
+    """
+    Verifies that bulk query(Admin).update()/.delete() clear cached identities,
+    while bulk changes to other tables leave the cache alone.
+    """
+    from types import SimpleNamespace
+    from sqlalchemy import event, inspect
+    from sqlalchemy.orm import Session
+    from app.db.models import Employee
+
+    assert event.contains(Session, "after_bulk_update", security._invalidate_after_bulk_change)
+    assert event.contains(Session, "after_bulk_delete", security._invalidate_after_bulk_change)
+
+    security._admin_cache.set("cached_admin", Admin(username="cached_admin", hashed_password="x"))
+
+    security._invalidate_after_bulk_change(SimpleNamespace(mapper=inspect(Employee)))
+    assert security._admin_cache.get("cached_admin") is not None
+
+    security._invalidate_after_bulk_change(SimpleNamespace(mapper=inspect(Admin)))
+    assert security._admin_cache.get("cached_admin") is None
@@ -0,0 +1,45 @@
+import runpy
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from app.core.config import settings
+from app.main import app
+
+GUNICORN_CONF = Path(__file__).resolve().parents[1] / "gunicorn.conf.py"
+
+
+def test_readiness_waits_for_startup(client):
+    """Test that readiness reports 503 until startup is complete."""
+    app.state.ready = False
+    assert client.get("/health/ready").status_code == 503
+    assert client.get("/health/live").status_code == 200
+
+    app.state.ready = True
+    try:
+        assert client.get("/health/ready").json() == {"status": "ready"}
+    finally:
+        app.state.ready = False
+
+
+def test_gunicorn_master_prepares_database_but_not_the_model(monkeypatch, tmp_path):
+    """Test that the gunicorn master prepares the database and leaves the model to the workers."""
+    monkeypatch.setattr(settings, "web_concurrency", 3)
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    (tmp_path / "counter_1.db").write_bytes(b"stale")
+    conf = runpy.run_path(str(GUNICORN_CONF))
+    conf["on_starting"](MagicMock())
+    assert list(tmp_path.iterdir()) == []
+
+    assert conf["workers"] == 3
+    assert conf["preload_app"] is True
+    assert conf["worker_class"] == "uvicorn.workers.UvicornWorker"
+
+    with patch("app.main.init_database") as init_database, \
+         patch("app.db.session.engine") as engine, \
+         patch("app.services.biometric_service.load_models") as load_models, \
+         patch("gc.freeze"):
+        conf["when_ready"](MagicMock())
+
+    init_database.assert_called_once()
+    engine.dispose.assert_called_once()
+    load_models.assert_not_called()
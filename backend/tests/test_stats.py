@@ -0,0 +1,101 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.db.models import AccessLog, AccessLogStatus, AccessStatsRollup
+from app.services import stats_service
+
+
+def _executed_rollup_upserts(mock_db_session):
+    return [
+        call.args[0] for call in mock_db_session.execute.call_args_list
+        if getattr(getattr(call.args[0], "table", None), "name", None) == AccessStatsRollup.__tablename__
+    ]
+
+
+def test_record_access_upserts_hourly_and_daily_counters(mock_db_session, mock_employee):
+    """
+    Verifies that one decision increments total and per-employee counters for both granularities.
+    """
+    log = AccessLog(
+        timestamp=datetime(2026, 3, 14, 9, 26, 53),
+        status=AccessLogStatus.DENIED_FACE,
+        reason="SYS_ERR: connection reset",
+        employee_id=mock_employee.uuid,
+    )
+
+    with patch("app.services.stats_service.random.randrange", return_value=3):
+        stats_service.record_access(mock_db_session, log)
+
+    [stmt] = _executed_rollup_upserts(mock_db_session)
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    rows = {
+        (
+            compiled.params[f"granularity_m{i}"], compiled.params[f"reason_m{i}"],
+            compiled.params[f"employee_id_m{i}"], compiled.params[f"shard_m{i}"],
+        )
+        for i in range(4)
+    }
+
+    assert "ON CONFLICT (granularity, bucket_start, status, reason, employee_id, shard) DO UPDATE" in str(compiled)
+    assert compiled.params["bucket_start_m0"] == datetime(2026, 3, 14, 9)
+    assert compiled.params["bucket_start_m2"] == datetime(2026, 3, 14)
+    assert rows == {
+        ("hour", "SYS_ERR", stats_service.ALL_EMPLOYEES, 3),
+        ("hour", stats_service.ANY_REASON, mock_employee.uuid, 0),
+        ("day", "SYS_ERR", stats_service.ALL_EMPLOYEES, 3),
+        ("day", stats_service.ANY_REASON, mock_employee.uuid, 0),
+    }
+
+
+def test_materialize_locks_the_rollups_before_deleting_them(mock_db_session):
+    """Test that a rebuild on PostgreSQL blocks concurrent increments before it deletes the rows."""
+    mock_db_session.get_bind.return_value.dialect.name = "postgresql"
+    mock_db_session.execute.return_value.all.return_value = []
+
+    stats_service.materialize_rollups(mock_db_session, datetime(2026, 3, 1), datetime(2026, 3, 2))
+
+    statements = [str(call.args[0]) for call in mock_db_session.execute.call_args_list]
+    assert statements[0] == "LOCK TABLE access_stats_rollups IN SHARE ROW EXCLUSIVE MODE"
+    assert statements[1].startswith("DELETE FROM access_stats_rollups")
+
+
+def test_terminal_decision_updates_rollups(client, mock_db_session, mock_employee):
+    """
+    Verifies that the terminal log writer maintains the rollups in the same transaction.
+    """
+    mock_db_session.query().filter().first.return_value = mock_employee
+
+    with patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2]), \
+            patch("app.api.terminal_routes.verify_face", return_value=(True, 0.15)):
+        client.post(
+            "/api/terminal/access-verify",
+            data={"employee_uid": str(mock_employee.uuid)},
+            files={"file": ("test.jpg", b"fake_bytes", "image/jpeg")}
+        )
+
+    assert len(_executed_rollup_upserts(mock_db_session)) == 1
+    assert mock_db_session.commit.called
+
+
+def test_get_timeseries_endpoint(client, mock_db_session):
+    """
+    Verifies that /admin/stats/timeseries serves rollup rows without touching access_logs.
+    """
+    bucket = datetime(2026, 3, 14, 9)
+    mock_db_session.execute.return_value.all.return_value = [
+        (bucket, AccessLogStatus.GRANTED, 12),
+        (bucket, AccessLogStatus.DENIED_FACE, 3),
+    ]
+
+    response = client.get("/admin/stats/timeseries", params={"granularity": "hour"})
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"bucket_start": bucket.isoformat(), "status": "GRANTED", "count": 12},
+        {"bucket_start": bucket.isoformat(), "status": "DENIED_FACE", "count": 3},
+    ]
+    query = str(mock_db_session.execute.call_args[0][0])
+    assert "access_stats_rollups" in query
+    assert "access_logs" not in query
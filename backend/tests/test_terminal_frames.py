@@ -0,0 +1,85 @@
+import asyncio
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services import image_ingest
+from app.services.image_ingest import StreamReader, UploadTooLarge, decode_image, encode_raw_image
+from app.services.terminal_frames import FRAME_CONTENT_TYPE, encode_frame, read_frame_header
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def test_frame_header_is_read_across_chunks():
+    """Test that a frame header split across chunks is read correctly."""
+    uid = "6f1c2b4e-0d5a-4c3e-9a7b-2f8e1d0c9b6a"
+    frame = encode_frame(uid, b"image-bytes", terminal_id="gate-2", crop=(10, 20, 160, 160))
+
+    async def read():
+        reader = StreamReader(_chunks(frame, 5))
+        return await read_frame_header(reader), await reader.read_rest()
+
+    header, image = asyncio.run(read())
+    assert (header.employee_uid, header.terminal_id, header.crop) == (uid, "gate-2", (10, 20, 160, 160))
+    assert image == b"image-bytes"
+
+
+def test_stream_reader_stops_at_limit():
+    """Test that the stream reader stops once the size limit is exceeded."""
+    reader = StreamReader(_chunks(b"x" * 1000, 100))
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(reader.read_rest(max_bytes=250))
+
+
+def test_raw_image_is_used_without_decoding():
+    """Test that RAW8 frames are used without image decoding."""
+    face = np.random.default_rng(0).integers(0, 255, size=(160, 160, 3), dtype=np.uint8)
+    data = encode_raw_image(face)
+
+    assert image_ingest.sniff_image_type(data) == "raw"
+    with patch("cv2.imdecode") as imdecode:
+        assert np.array_equal(decode_image(data), face)
+    imdecode.assert_not_called()
+
+    with pytest.raises(ValueError, match="INVALID_IMAGE"):
+        decode_image(data[:-1])
+
+
+def test_frame_endpoint_verifies_like_multipart(client, mock_db_session, mock_employee):
+    """Test that the binary frame endpoint decides like the multipart one."""
+    mock_db_session.query().filter().first.return_value = mock_employee
+    face = encode_raw_image(np.zeros((160, 160, 3), dtype=np.uint8))
+
+    def post(token=None):
+        headers = {"Content-Type": FRAME_CONTENT_TYPE, **({"X-Terminal-Token": token} if token else {})}
+        return client.post(
+            "/api/terminal/access-verify/frame",
+            content=encode_frame(str(mock_employee.uuid), face, terminal_id="gate-1"),
+            headers=headers,
+        )
+
+    with patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2, 0.3]) as mock_embed, \
+         patch("app.api.terminal_routes.TERMINAL_TOKENS", {"gate-1": "s3cret"}):
+        response = post()
+        # An unauthenticated client cannot switch face detection off
+        photo, _, detector = mock_embed.call_args.args
+        assert photo == face and detector != "skip"
+
+        for token in ("wrong", "s3cret"):
+            assert post(token).json()["access"] == "GRANTED"
+        # An aligned face from the configured terminal skips detection
+        _, _, detector = mock_embed.call_args.args
+        assert detector == "skip"
+
+    assert response.json()["access"] == "GRANTED"
+    assert mock_db_session.add.call_count == 3
+
+
+def test_frame_endpoint_rejects_other_bodies(client):
+    """Test that the binary frame endpoint rejects bodies that are not frames."""
+    response = client.post("/api/terminal/access-verify/frame", content=b"employee_uid=123")
+    assert response.status_code == 400
@@ -0,0 +1,68 @@
+import uuid
+from unittest.mock import patch
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.db.session import get_session_factory
+from app.main import app
+from app.services.event_broadcaster import employee_ref, notify_revoked
+from app.services.terminal_frames import encode_frame
+
+
+@pytest.fixture
+def terminal_ws(client, mock_db_session):
+    app.dependency_overrides[get_session_factory] = lambda: (lambda: mock_db_session)
+    with client.websocket_connect("/api/terminal/ws?terminal_id=gate-1") as websocket:
+        assert websocket.receive_json()["type"] == "config"
+        yield websocket
+
+
+def test_verifications_are_multiplexed_by_request_id(terminal_ws, mock_db_session, mock_employee):
+    """Test that WebSocket verifications are answered by request id and replayed on resend."""
+    mock_db_session.query().filter().first.return_value = mock_employee
+    request_id = uuid.uuid4()
+    frame = encode_frame(str(mock_employee.uuid), b"jpeg-bytes", terminal_id="gate-1")
+
+    with patch("app.api.terminal_routes.generate_face_embedding", return_value=[0.1, 0.2, 0.3]) as mock_embed:
+        terminal_ws.send_bytes(request_id.bytes + frame)
+        result = terminal_ws.receive_json()
+        # Re-sent after a reconnect: answered without a second verification
+        terminal_ws.send_bytes(request_id.bytes + frame)
+        resent = terminal_ws.receive_json()
+
+    assert result == {"type": "result", "request_id": str(request_id), "access": "GRANTED",
+                      "name": mock_employee.name, "message": f"Welcome, {mock_employee.name}"}
+    assert resent["replayed"] is True
+    assert mock_embed.call_count == 1
+    assert mock_db_session.add.call_count == 1
+
+
+def test_malformed_frames_are_rejected_without_closing(terminal_ws):
+    """Test that malformed messages get an error without closing the socket."""
+    request_id = uuid.uuid4()
+    terminal_ws.send_bytes(request_id.bytes + b"not a frame")
+    assert terminal_ws.receive_json() == {"type": "error", "request_id": str(request_id), "detail": "Invalid frame."}
+
+    terminal_ws.send_text("hello")
+    assert terminal_ws.receive_json()["type"] == "error"
+
+
+def test_revocations_are_pushed_to_terminals(terminal_ws):
+    """Test that revocations are pushed to connected terminals."""
+    employee_id = uuid.uuid4()
+    notify_revoked(employee_id, "DEACTIVATED")
+
+    notice = terminal_ws.receive_json()
+    assert notice == {"type": "revoked", "employee_ref": employee_ref(employee_id), "reason": "DEACTIVATED"}
+    # The QR credential itself is never broadcast
+    assert str(employee_id) not in str(notice)
+
+
+def test_terminal_with_a_wrong_token_is_refused(client):
+    """Test that a terminal sending a wrong token is refused before the socket is accepted."""
+    with patch("app.api.terminal_routes.TERMINAL_TOKENS", {"gate-1": "s3cret"}):
+        with pytest.raises(WebSocketDisconnect) as refused:
+            with client.websocket_connect("/api/terminal/ws?terminal_id=gate-1&token=guess"):
+                pass
+    assert refused.value.code == 1008
@@ -25,11 +25,11 @@ const EmployeeActions: React.FC<EmployeeActionsProps> = ({
         message.error('No authentication token');
         return;
       }
-      await deleteEmployee(record.uuid, token);
+      await deleteEmployee(record.uuid, token, record.version);
       message.success('Employee deleted');
       onDeleteSuccess();
     } catch (error) {
-      message.error('Failed to delete employee');
+      message.error(error instanceof Error ? error.message : 'Failed to delete employee');
       console.error(error);
     }
   };
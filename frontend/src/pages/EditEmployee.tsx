@@ -48,12 +48,13 @@ const EditEmployee: React.FC = () => {
         }
       }
 
-      await updateEmployee(uuid, formData, token);
+      await updateEmployee(uuid, formData, token, employee?.version);
       message.success('Employee updated successfully');
       navigate('/employees');
 
     } catch (error) {
       console.error('Error:', error);
+      message.error(error instanceof Error ? error.message : 'Failed to update employee');
       throw error;
     } finally {
       setIsSubmitting(false);
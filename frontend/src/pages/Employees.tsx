@@ -63,12 +63,14 @@ const EmployeesPage: React.FC = () => {
           message.error('No authentication token found');
           return;
         }
-        await updateEmployeeStatus(record.uuid, status, token);
+        await updateEmployeeStatus(record.uuid, status, token, record.version);
         message.success('Employee access status updated successfully');
         setRefreshKey((prev) => prev + 1);
       } catch (error) {
         console.error('Error updating employee status:', error);
-        message.error('Failed to update employee status');
+        message.error(error instanceof Error ? error.message : 'Failed to update employee status');
+        // Show the current state, whoever changed it
+        setRefreshKey((prev) => prev + 1);
       }
     };
 
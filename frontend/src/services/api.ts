@@ -4,19 +4,38 @@ import Cookies from 'js-cookie';
 
 const API_BASE_URL = 'http://localhost:8000'; // or your backend URL
 
+// Changes carry the version the employee was read at; the backend answers 412
+// instead of overwriting what another admin changed in the meantime
+const ifMatch = (version?: number): Record<string, string> =>
+  version === undefined ? {} : { 'If-Match': `"${version}"` };
+
+const STALE_EMPLOYEE_MESSAGE = 'Employee was modified by someone else, reload and try again';
+
 export const fetchEmployees = async (token: string): Promise<EmployeeDataType[]> => {
-  const response = await fetch(`${API_BASE_URL}/admin/employees`, {
-    method: 'GET',
-    headers: {
-      'Authorization': `Bearer ${token}`,
-    },
-  });
+  // The listing is paginated; follow X-Next-Cursor until the last page
+  const employees: EmployeeDataType[] = [];
+  let cursor: string | null = null;
 
-  if (!response.ok) {
-    throw new Error('Failed to fetch employees');
-  }
+  do {
+    const params = new URLSearchParams({ limit: '200' });
+    if (cursor) params.set('cursor', cursor);
 
-  return response.json();
+    const response = await fetch(`${API_BASE_URL}/admin/employees?${params}`, {
+      method: 'GET',
+      headers: {
+        'Authorization': `Bearer ${token}`,
+      },
+    });
+
+    if (!response.ok) {
+      throw new Error('Failed to fetch employees');
+    }
+
+    employees.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+
+  return employees;
 };
 
 export const createEmployee = async (
@@ -41,14 +60,19 @@ export const createEmployee = async (
 export const deleteEmployee = async (
   uuid: string,
   token: string,
+  version?: number,
 ): Promise<{ message: string }> => {
   const response = await fetch(`${API_BASE_URL}/admin/employees/${uuid}`, {
     method: 'DELETE',
     headers: {
       'Authorization': `Bearer ${token}`,
+      ...ifMatch(version),
     },
     });
 
+  if (response.status === 412 || response.status === 409) {
+    throw new Error(STALE_EMPLOYEE_MESSAGE);
+  }
   if (!response.ok) {
     throw new Error('Failed to delete employee');
   }
@@ -60,14 +84,19 @@ export const updateEmployee = async (
   uuid: string,
   formData: FormData,
   token: string,
+  version?: number,
 ): Promise<{ message: string }> => {
   const response = await fetch(`${API_BASE_URL}/admin/employees/${uuid}`, {
     method: 'PUT',
     headers: {
       'Authorization': `Bearer ${token}`,
+      ...ifMatch(version),
     },
     body: formData,
   });
+    if (response.status === 412 || response.status === 409) {
+    throw new Error(STALE_EMPLOYEE_MESSAGE);
+    }
     if (!response.ok) {
     throw new Error('Failed to update employee');
     }
@@ -78,15 +107,20 @@ export const updateEmployeeStatus = async (
   uuid: string,
   status: boolean,
   token: string,
+  version?: number,
 ): Promise<{ message: string }> => {
   const response = await fetch(`${API_BASE_URL}/admin/employees/${uuid}/status`, {
     method: 'PATCH',
     headers: {
       'Authorization': `Bearer ${token}`,
       'Content-Type': 'application/json',
+      ...ifMatch(version),
     },
     body: JSON.stringify({employee_uuid: uuid, is_active: status }),
   });
+    if (response.status === 412) {
+    throw new Error(STALE_EMPLOYEE_MESSAGE);
+    }
     if (!response.ok) {
     throw new Error('Failed to update employee status');
     }
@@ -15,4 +15,6 @@ export interface EmployeeDataType {
   email: string;
   is_active: boolean;
   expires_at: string;
+  // Sent back as If-Match when changing the employee
+  version?: number;
 }
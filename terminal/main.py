@@ -1,15 +1,122 @@
 # Entry_System/terminal/main.py
 import cv2
 import numpy as np
+import os
+import socket
+import struct
 import time
+import uuid
 import requests
 
+from tracking import FaceTracker, GateStats
+
 # API Configuration
 API_URL = "http://localhost:8000/api/terminal/access-verify"
+# Compact binary upload (format in backend/app/services/terminal_frames.py)
+FRAME_URL = API_URL + "/frame"
+USE_FRAME_UPLOAD = True
+TERMINAL_ID = socket.gethostname()
+# Token of this terminal in the backend's TERMINAL_TOKENS, if it is listed there
+TERMINAL_TOKEN = os.environ.get("TERMINAL_TOKEN")
+REQUEST_TIMEOUT = 10
+# Gate mode: follow faces across frames and upload the sharpest, most frontal
+# recent frame of the person in front of the camera (see tracking.py)
+TRACKING_MODE = True
+# Tracked frames to choose from before uploading, and the longest wait for them after the QR scan
+MIN_TRACKED_FRAMES = 8
+GATE_WAIT_SECONDS = 1.0
+# Entries between two printouts of the first-try statistics
+STATS_EVERY = 20
+# Attempts per scan; retries repeat the scan's Idempotency-Key, so the server
+# answers them with the first attempt's decision instead of verifying again
+MAX_ATTEMPTS = 2
+
+
+def encode_frame(employee_uid, image, crop=None):
+    terminal = TERMINAL_ID.encode()[:255]
+    header = struct.pack("<2sB16s4HB", b"EF", 1, uuid.UUID(employee_uid).bytes, *(crop or (0, 0, 0, 0)), len(terminal))
+    return header + terminal + image
+
+
+def build_request(data, image, crop=None):
+    try:
+        frame = encode_frame(data, image, crop) if USE_FRAME_UPLOAD else None
+    except ValueError:
+        # Not a UUID: only the multipart form can carry it (and get it logged as invalid)
+        frame = None
+    if frame:
+        headers = {'Content-Type': 'application/x-entry-frame'}
+        if TERMINAL_TOKEN:
+            headers['X-Terminal-Token'] = TERMINAL_TOKEN
+        return FRAME_URL, {'data': frame, 'headers': headers}
+    return API_URL, {
+        'data': {'employee_uid': data},
+        'files': {'file': ('capture.jpg', image, 'image/jpeg')},
+        'headers': {},
+    }
+
+
+def post_scan(data, image, crop=None):
+    scan_id = str(uuid.uuid4())
+    url, request = build_request(data, image, crop)
+    request['headers']['Idempotency-Key'] = scan_id
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return requests.post(url, timeout=REQUEST_TIMEOUT, **request)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            print(f"Attempt {attempt} failed ({e}), retrying scan {scan_id}")
+
+def describe_response(response):
+    if response.status_code != 200:
+        return "Server Error", str(response.status_code), (0, 165, 255)
+
+    result = response.json()
+    if result.get("access") == "GRANTED":
+        return "ACCESS GRANTED", result.get("name", ""), (0, 255, 0)
+
+    reason = result.get("reason", "")
+    if reason == "NO_FACE_DETECTED":
+        sub_message = "NO_FACE_DETECTED!"
+    elif reason == "FACE_MISMATCH":
+        sub_message = "FACE_MISMATCH!"
+    elif reason == "MULTIPLE_FACES":
+        sub_message = "ONE PERSON ONLY!"
+    elif reason == "QR_INVALID_OR_INACTIVE":
+        sub_message = "QR_INVALID_OR_INACTIVE!"
+    else:
+        sub_message = reason
+    return "ACCESS DENIED", sub_message, (0, 0, 255)
+
+
+def verify(data, frame, crop=None):
+    _, img_encoded = cv2.imencode('.jpg', frame)
+    try:
+        return describe_response(post_scan(data, img_encoded.tobytes(), crop))
+    except Exception as e:
+        print(f"Connection Error: {e}")
+        return "API Error", "Check connection", (0, 0, 255)
+
+
+def record_entry(stats, data, message):
+    # Server and connection errors say nothing about the frame
+    if message not in ("ACCESS GRANTED", "ACCESS DENIED"):
+        return
+    stats.record(data, message == "ACCESS GRANTED")
+    if (stats.first_tries + stats.retries) % STATS_EVERY == 0:
+        print(f"Gate statistics: {stats.summary()}")
+
 
 def capture_image():
     cap = cv2.VideoCapture(0)
     detector = cv2.QRCodeDetector()
+    tracker = None
+    if TRACKING_MODE:
+        try:
+            tracker = FaceTracker()
+        except RuntimeError as e:
+            print(f"Tracking mode unavailable ({e}), uploading the frame of the QR scan")
 
     if not cap.isOpened():
         print("Error: Could not open video stream.")
@@ -20,6 +127,11 @@ def capture_image():
     message = "Scan QR code"
     sub_message = ""
     display_color = (255, 255, 255)
+    # QR code waiting for a good face frame, since when and until when
+    pending_qr, pending_since, pending_deadline = None, 0, 0
+    # (QR code, track) of the last granted entry: one verification per approaching person
+    last_verified = None
+    stats = GateStats()
 
     print("Camera started. Press 'q' to exit.")
 
@@ -29,15 +141,20 @@ def capture_image():
             break
 
         current_time = time.time()
+        face_box = tracker.update(frame, current_time) if tracker else None
 
-        if current_time - last_scan_time > 3 and message != "Scan QR code":
+        if current_time - last_scan_time > 3 and message != "Scan QR code" and pending_qr is None:
              message = "Scan QR code"
              sub_message = ""
              display_color = (255, 255, 255)
 
-        if current_time - last_scan_time >= scan_interval:
+        if pending_qr is None and current_time - last_scan_time >= scan_interval:
             data, bbox, _ = detector.detectAndDecode(frame)
 
+            if data and tracker and (data, tracker.track_id) == last_verified and face_box is not None:
+                # Same person still in front of the gate
+                data = None
+
             if data:
                 print(f"QR Detected: {data}")
                 last_scan_time = current_time
@@ -45,51 +162,36 @@ def capture_image():
                 sub_message = "Wait..."
                 display_color = (255, 255, 0) # Yellow
 
-
-                cv2.putText(frame, message, (10, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, display_color, 2)
-                cv2.imshow('FaceOn Terminal', frame)
-                cv2.waitKey(1)
-
-                _, img_encoded = cv2.imencode('.jpg', frame)
-
-                try:
-                    files = {'file': ('capture.jpg', img_encoded.tobytes(), 'image/jpeg')}
-                    payload = {'employee_uid': data}
-
-                    response = requests.post(API_URL, data=payload, files=files, timeout=10)
-
-                    if response.status_code == 200:
-                        result = response.json()
-                        access = result.get("access")
-                        reason = result.get("reason", "")
-
-                        if access == "GRANTED":
-                            message = "ACCESS GRANTED"
-                            sub_message = result.get("name", "")
-                            display_color = (0, 255, 0)
-                        else:
-                            message = "ACCESS DENIED"
-                            display_color = (0, 0, 255)
-                            if reason == "NO_FACE_DETECTED":
-                                sub_message = "NO_FACE_DETECTED!"
-                            elif reason == "FACE_MISMATCH":
-                                sub_message = "FACE_MISMATCH!"
-                            elif reason == "MULTIPLE_FACES":
-                                sub_message = "ONE PERSON ONLY!"
-                            elif reason == "QR_INVALID_OR_INACTIVE":
-                                sub_message = "QR_INVALID_OR_INACTIVE!"
-                            else:
-                                sub_message = reason
-                    else:
-                        message = "Server Error"
-                        sub_message = str(response.status_code)
-                        display_color = (0, 165, 255)
-
-                except Exception as e:
-                    print(f"Connection Error: {e}")
-                    message = "API Error"
-                    sub_message = "Check connection"
-                    display_color = (0, 0, 255)
+                if tracker:
+                    pending_qr, pending_since, pending_deadline = data, current_time, current_time + GATE_WAIT_SECONDS
+                else:
+                    cv2.putText(frame, message, (10, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, display_color, 2)
+                    cv2.imshow('FaceOn Terminal', frame)
+                    cv2.waitKey(1)
+
+                    message, sub_message, display_color = verify(data, frame)
+                    record_entry(stats, data, message)
+
+        if pending_qr is not None:
+            # Uploads the best frame taken since the scan, once there are a few to choose from
+            best = tracker.best_frame(current_time, since=pending_since)
+            tracked = tracker.track_length(current_time, since=pending_since)
+            if tracked >= MIN_TRACKED_FRAMES or current_time >= pending_deadline:
+                if best is not None:
+                    message, sub_message, display_color = verify(pending_qr, best.frame, best.box)
+                else:
+                    message, sub_message, display_color = verify(pending_qr, frame)
+                if message == "ACCESS GRANTED":
+                    last_verified = (pending_qr, tracker.track_id)
+                record_entry(stats, pending_qr, message)
+                pending_qr = None
+                last_scan_time = time.time()
+            else:
+                sub_message = "Look at the camera"
+
+        if face_box is not None:
+            x, y, w, h = face_box
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 255, 0), 1)
 
         cv2.rectangle(frame, (0, 0), (640, 80), (0,0,0), -1)
         cv2.putText(frame, message, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, display_color, 2)
@@ -102,6 +204,7 @@ def capture_image():
 
     cap.release()
     cv2.destroyAllWindows()
+    print(f"Gate statistics: {stats.summary()}")
 
 if __name__ == "__main__":
     capture_image()
@@ -0,0 +1,89 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tracking import FaceTracker, GateStats, face_quality, iou  # noqa: E402
+
+
+class StubDetector:
+    """Returns the faces queued for each frame, in the detector's downscaled coordinates."""
+
+    def __init__(self, detections):
+        self.detections = list(detections)
+
+    def detectMultiScale(self, gray, **kwargs):
+        return self.detections.pop(0)
+
+
+def _frame(seed=0, blur=False):
+    frame = np.random.default_rng(seed).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    if blur:
+        # A flat frame has no edges, like a motion-blurred one
+        frame[:] = frame.mean(axis=(0, 1), dtype=np.uint8)
+    return frame
+
+
+def test_iou():
+    """Test the box overlap of identical, shifted and disjoint boxes."""
+    assert iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert iou((0, 0, 10, 10), (5, 0, 10, 10)) == pytest.approx(50 / 150)
+    assert iou((0, 0, 10, 10), (10, 10, 10, 10)) == 0.0
+
+
+def test_face_quality_prefers_sharp_frontal_faces():
+    """Test that a blurred crop and an asymmetric crop score below a sharp symmetric one."""
+    sharp = _frame()
+    sharp[:, 320:] = sharp[:, 319::-1]
+    box = (220, 140, 200, 200)
+    turned = sharp.copy()
+    turned[:, 320:] = 0
+
+    assert face_quality(sharp, box) > face_quality(turned, box)
+    assert face_quality(sharp, box) > face_quality(_frame(blur=True), box)
+
+
+def test_tracker_follows_overlapping_boxes_and_starts_new_tracks():
+    """Test that overlapping detections keep the track id and a distant face starts a new track."""
+    tracker = FaceTracker(detector=StubDetector([
+        [(100, 60, 40, 40)], [(102, 61, 40, 40)], [], [(10, 10, 40, 40)],
+    ]))
+
+    first = tracker.update(_frame(), now=0.0)
+    assert tracker.update(_frame(), now=0.1) is not None and tracker.track_id == 1
+    assert tracker.update(_frame(), now=0.2) is None and tracker.faces_in_view == 0
+    tracker.update(_frame(), now=0.3)
+
+    assert first == (200, 120, 80, 80)
+    assert tracker.track_id == 2
+    assert tracker.track_length(now=0.3) == 1
+
+
+def test_best_frame_is_taken_after_the_scan():
+    """Test that the best frame is picked among the frames taken since the QR scan."""
+    tracker = FaceTracker(detector=StubDetector([[(100, 60, 40, 40)]] * 3))
+    tracker.update(_frame(seed=1), now=0.0)
+    tracker.update(_frame(seed=2), now=0.5)
+    tracker.update(_frame(blur=True), now=1.0)
+
+    # A sharper frame from before the scan shows a moment the scanner may not be in
+    assert tracker.best_frame(now=1.0).timestamp < 1.0
+    assert tracker.best_frame(now=1.0, since=0.75).timestamp == 1.0
+    assert tracker.track_length(now=1.0, since=0.5) == 2
+    # Frames older than the buffer age are dropped even without a scan time
+    assert tracker.track_length(now=2.2) == 1
+
+
+def test_gate_stats_count_first_scans_and_re_scans():
+    """Test that a denial followed by a re-scan counts as one failed first try."""
+    stats = GateStats(retry_window=30)
+    stats.record("alice", granted=False, now=0)
+    stats.record("alice", granted=True, now=10)
+    stats.record("bob", granted=True, now=20)
+    stats.record("alice", granted=False, now=100)
+
+    assert (stats.first_tries, stats.first_try_grants, stats.retries) == (3, 1, 1)
+    assert stats.first_try_rate == pytest.approx(1 / 3)
@@ -0,0 +1,179 @@
+# Entry_System/terminal/tracking.py
+"""
+Face tracking for the gate mode of the terminal.
+
+Faces are detected on every camera frame at low resolution and followed from
+frame to frame by box overlap, so a person walking up to the gate keeps one
+track id. The frames of the current track are kept in a short ring buffer
+with a quality score. Once the QR code is read, the best frame taken since
+the scan is uploaded, instead of whatever frame happened to be on screen
+(often blinking or motion-blurred). GateStats measures what that buys: how
+often a person gets in on their first scan.
+"""
+import time
+from collections import deque
+
+import cv2
+
+# Width the frames are downscaled to for detection
+DETECT_WIDTH = 320
+# Frames kept, and how old a frame may be to still be uploaded
+BUFFER_SIZE = 30
+BUFFER_SECONDS = 1.5
+# Box overlap (intersection over union) above which a detection continues the current track
+MIN_TRACK_IOU = 0.3
+# Frames without a detection (blinks, detector misses) before the track ends
+MAX_MISSED_FRAMES = 5
+# Side of the face crop the quality is measured on
+QUALITY_SIDE = 96
+# A scan of a QR code denied less than this long ago counts as a re-scan
+RETRY_WINDOW_SECONDS = 30
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = min(ax + aw, bx + bw) - max(ax, bx)
+    h = min(ay + ah, by + bh) - max(ay, by)
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return inter / (aw * ah + bw * bh - inter)
+
+
+def face_quality(frame, box):
+    """
+    Scores a face crop: sharp (variance of the Laplacian) and frontal (left and
+    right halves alike) faces score higher. Blinks and motion blur lower the
+    sharpness, turned heads break the symmetry.
+    """
+    x, y, w, h = box
+    crop = cv2.cvtColor(frame[y:y + h, x:x + w], cv2.COLOR_BGR2GRAY)
+    crop = cv2.resize(crop, (QUALITY_SIDE, QUALITY_SIDE), interpolation=cv2.INTER_AREA)
+
+    sharpness = cv2.Laplacian(crop, cv2.CV_64F).var()
+    asymmetry = cv2.absdiff(crop, cv2.flip(crop, 1)).mean() / 255
+    return sharpness * (1 - asymmetry)
+
+
+class TrackedFrame:
+    def __init__(self, frame, box, score, timestamp, track_id):
+        self.frame = frame
+        self.box = box
+        self.score = score
+        self.timestamp = timestamp
+        self.track_id = track_id
+
+
+class FaceTracker:
+    def __init__(self, buffer_size=BUFFER_SIZE, max_age=BUFFER_SECONDS, detector=None):
+        if detector is None:
+            detector = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            if detector.empty():
+                raise RuntimeError("OpenCV face cascade not found")
+        self.detector = detector
+        self.buffer = deque(maxlen=buffer_size)
+        self.max_age = max_age
+        self.track_id = 0
+        self.box = None
+        self.missed = 0
+        self.faces_in_view = 0
+
+    def detect(self, frame):
+        scale = DETECT_WIDTH / frame.shape[1]
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.equalizeHist(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+        faces = self.detector.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(32, 32))
+        return [tuple(int(v / scale) for v in face) for face in faces]
+
+    def update(self, frame, now=None):
+        """
+        Detects the faces of a frame and extends the current track.
+
+        Returns:
+            tuple: The tracked face box (x, y, w, h), or None if no face is visible.
+        """
+        now = time.time() if now is None else now
+        faces = self.detect(frame)
+        self.faces_in_view = len(faces)
+        if not faces:
+            self.missed += 1
+            if self.missed > MAX_MISSED_FRAMES:
+                self.box = None
+            return None
+
+        box = None
+        if self.box is not None:
+            closest = max(faces, key=lambda face: iou(face, self.box))
+            if iou(closest, self.box) >= MIN_TRACK_IOU:
+                box = closest
+
+        if box is None:
+            # A new person: the largest (closest) face starts a new track
+            box = max(faces, key=lambda face: face[2] * face[3])
+            self.track_id += 1
+
+        self.box = box
+        self.missed = 0
+        self.buffer.append(TrackedFrame(frame.copy(), box, face_quality(frame, box), now, self.track_id))
+        return box
+
+    def track_length(self, now=None, since=None):
+        return len(self._current(now, since))
+
+    def best_frame(self, now=None, since=None):
+        """
+        Returns the highest-scoring recent frame of the current track, or None.
+
+        Args:
+            since (float, optional): Only frames taken at or after this time
+                (the QR scan), so the upload shows the person who scanned and
+                not an earlier moment of the track.
+        """
+        return max(self._current(now, since), key=lambda tracked: tracked.score, default=None)
+
+    def _current(self, now=None, since=None):
+        now = time.time() if now is None else now
+        oldest = now - self.max_age if since is None else max(now - self.max_age, since)
+        return [
+            tracked for tracked in self.buffer
+            if tracked.track_id == self.track_id and tracked.timestamp >= oldest
+        ]
+
+
+class GateStats:
+    """
+    Counts how many people are granted entry on their first scan.
+
+    A scan is a retry when the same QR code was denied less than `retry_window`
+    seconds earlier. Comparing the first-try rate with TRACKING_MODE on and off
+    measures the improvement of uploading the best tracked frame.
+    """
+
+    def __init__(self, retry_window=RETRY_WINDOW_SECONDS):
+        self.retry_window = retry_window
+        self.first_tries = 0
+        self.first_try_grants = 0
+        self.retries = 0
+        self._denied = {}
+
+    def record(self, qr, granted, now=None):
+        now = time.time() if now is None else now
+        denied_at = self._denied.pop(qr, None)
+        if denied_at is not None and now - denied_at < self.retry_window:
+            self.retries += 1
+        else:
+            self.first_tries += 1
+            self.first_try_grants += granted
+        if not granted:
+            self._denied[qr] = now
+
+    @property
+    def first_try_rate(self):
+        return self.first_try_grants / self.first_tries if self.first_tries else 0.0
+
+    def summary(self):
+        return (
+            f"{self.first_try_grants}/{self.first_tries} granted on the first scan "
+            f"({self.first_try_rate:.0%}), {self.retries} re-scans"
+        )